@@ -1,16 +1,20 @@
+from __future__ import annotations
+
+import importlib
+import typing
+
 from endpoints import base
-from endpoints.tickets import Tickets
-from endpoints.replies import Replies
-from endpoints.comments import Comments
-from endpoints.teams import Teams
-from endpoints.users import Users
-from endpoints.customer_groups import CustomerGroups
-from endpoints.attachments import Attachments
-from endpoints.labels import Labels
-from endpoints.emails import Emails
-from endpoints.filters import Filters
-from endpoints.snippets import Snippets
-from endpoints.reports import Reports
+from endpoints.retry import DEFAULT_TIMEOUT
+from endpoints.instrumentation import Hooks
+from endpoints.urls import UrlBuilder
+from endpoints.singleflight import SingleFlight, AsyncSingleFlight
+
+if typing.TYPE_CHECKING:  # Annotations only, the modules are imported when first used
+    from endpoints.transport import Transport
+    from endpoints.aio_transport import AsyncTransport
+    from endpoints.ratelimit import RateLimiter
+    from endpoints.retry import RetryPolicy
+    from endpoints.cache import ResponseCache
 
 # Enums
 BasicOptions        = base.BasicOptions
@@ -20,55 +24,208 @@ SortByOptions       = base.SortByOptions
 UserRoles           = base.UserRoles
 DataPointType       = base.DataPointType
 
+# Errors
+SupportBeeError = base.SupportBeeError
 
-class SupportBee:
-    def __init__(self, token, company_url):
-        self.BASE_URL = company_url + "{url}?auth_token=" + token
+# Public names, imported from their module on first access so `import SupportBee` stays cheap
+_EXPORTS = {
+    "Transport":          "endpoints.transport",
+    "SessionTransport":   "endpoints.transport",
+    "AsyncTransport":     "endpoints.aio_transport",
+    "HttpxTransport":     "endpoints.aio_transport",
+    "RateLimiter":        "endpoints.ratelimit",
+    "RetryPolicy":        "endpoints.retry",
+    "ResponseCache":      "endpoints.cache",
+    "MemoryCacheBackend": "endpoints.cache",
+    "SqliteCacheBackend": "endpoints.cache",
+    "IncrementalSync":    "endpoints.sync",
+    "JsonFileSyncState":  "endpoints.sync",
+    "SqliteSyncState":    "endpoints.sync",
+    "TicketStore":        "endpoints.store",
+    "WebhookReceiver":    "endpoints.webhooks",
+    "WebhookDispatcher":  "endpoints.webhooks",
+    "WebhookEvent":       "endpoints.webhooks",
+    "StoreUpdater":       "endpoints.webhooks",
+    "Reconciler":         "endpoints.webhooks",
+    "ReportsEngine":      "endpoints.report_engine",
+    "ReportQuery":        "endpoints.report_engine",
+    "ReportFrame":        "endpoints.report_engine",
+    "MetricsCollector":   "endpoints.instrumentation",
+    "PrometheusHooks":    "endpoints.instrumentation",
+    "OpenTelemetryHooks": "endpoints.instrumentation",
+    "Ticket":             "endpoints.models",
+    "Reply":              "endpoints.models",
+    "Comment":            "endpoints.models",
+    "User":               "endpoints.models",
+    "Label":              "endpoints.models",
+    "Team":               "endpoints.models",
+    "Snippet":            "endpoints.models",
+    "Thread":             "endpoints.threads",
+    "BatchLoader":        "endpoints.loader",
+    "Outbox":             "endpoints.outbox",
+    "SnippetRenderer":    "endpoints.templates",
+    "Template":           "endpoints.templates",
+    "Tickets":            "endpoints.tickets",
+    "Replies":            "endpoints.replies",
+    "Comments":           "endpoints.comments",
+    "Teams":              "endpoints.teams",
+    "Users":              "endpoints.users",
+    "CustomerGroups":     "endpoints.customer_groups",
+    "Attachments":        "endpoints.attachments",
+    "Labels":             "endpoints.labels",
+    "Emails":             "endpoints.emails",
+    "Filters":            "endpoints.filters",
+    "Snippets":           "endpoints.snippets",
+    "Reports":            "endpoints.reports",
+    "aio":                "endpoints.aio",
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError("module {module!r} has no attribute {name!r}".format(module=__name__, name=name))
+    module = importlib.import_module(_EXPORTS[name])
+    value = module if module.__name__.endswith("." + name) else getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
 
-    @property
-    def tickets(self):
-        return Tickets(self)
 
-    @property
-    def replies(self):
-        return Replies(self)
+# Resource accessor: the endpoint module is imported and the resource built on first access, then stored on the
+# client so later accesses are plain attribute lookups
+class _resource:
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+        self.attribute = None
+        self.factory = None
 
-    @property
-    def comments(self):
-        return Comments(self)
+    def __set_name__(self, owner, attribute):
+        self.attribute = attribute
+        owner._resources = vars(owner).get("_resources", ()) + (attribute,)
 
-    @property
-    def teams(self):
-        return Teams(self)
+    def __get__(self, api, owner=None):
+        if api is None:
+            return self
+        if self.factory is None:
+            self.factory = getattr(importlib.import_module(self.module), self.name)
+        resource = api.__dict__[self.attribute] = self.factory(api)
+        return resource
 
-    @property
-    def users(self):
-        return Users(self)
 
-    @property
-    def customers_groups(self):
-        return CustomerGroups(self)
+# Cached resources point back to their client: dropping them on close lets the client be freed without the cyclic GC
+def _release_resources(api):
+    for attribute in api._resources:
+        api.__dict__.pop(attribute, None)
 
-    @property
-    def attachments(self):
-        return Attachments(self)
 
-    @property
-    def labels(self):
-        return Labels(self)
+class SupportBee:
+    def __init__(self,
+                 token:        str,
+                 company_url:  str,
+                 transport:    Transport     = None,
+                 pool_size:    int           = 10,
+                 keep_alive:   bool          = True,
+                 timeout:      tuple         = DEFAULT_TIMEOUT,
+                 rate_limiter: RateLimiter   = None,
+                 retry_policy: RetryPolicy   = None,
+                 cache:        ResponseCache = None,
+                 models:       bool          = False,   # Return Ticket, Reply, User, ... instead of dicts
+                 hooks:        list          = None,    # e.g. [MetricsCollector()], see endpoints.instrumentation
+                 coalesce:     bool          = True):   # Identical concurrent GETs share one request, copied per caller
+        self.BASE_URL = company_url + "{url}?auth_token=" + token
+        self.urls = UrlBuilder(company_url, token)
+        if transport is None:
+            from endpoints.transport import SessionTransport  # requests is only loaded when it is used
+            transport = SessionTransport(pool_connections=pool_size,
+                                         pool_maxsize=pool_size,
+                                         keep_alive=keep_alive,
+                                         timeout=timeout,
+                                         rate_limiter=rate_limiter,
+                                         retry_policy=retry_policy)
+        self.transport = transport
+        self.cache = cache
+        self.models = models
+        self.hooks = Hooks(hooks or ())
+        self.flights = SingleFlight() if coalesce else None  # flights.collapsed counts the shared calls
+
+    def close(self):
+        self.transport.close()
+        _release_resources(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    tickets          = _resource("endpoints.tickets", "Tickets")
+    replies          = _resource("endpoints.replies", "Replies")
+    comments         = _resource("endpoints.comments", "Comments")
+    teams            = _resource("endpoints.teams", "Teams")
+    users            = _resource("endpoints.users", "Users")
+    customers_groups = _resource("endpoints.customer_groups", "CustomerGroups")
+    attachments      = _resource("endpoints.attachments", "Attachments")
+    labels           = _resource("endpoints.labels", "Labels")
+    emails           = _resource("endpoints.emails", "Emails")
+    filters          = _resource("endpoints.filters", "Filters")
+    snippets         = _resource("endpoints.snippets", "Snippets")
+    reports          = _resource("endpoints.reports", "Reports")
+
+
+class AsyncSupportBee:
+    def __init__(self,
+                 token:           str,
+                 company_url:     str,
+                 transport:       AsyncTransport = None,
+                 pool_size:       int            = 10,
+                 max_concurrency: int            = None,  # Default = pool_size
+                 keep_alive:      bool           = True,
+                 timeout:         tuple          = DEFAULT_TIMEOUT,
+                 rate_limiter:    RateLimiter    = None,
+                 retry_policy:    RetryPolicy    = None,
+                 cache:           ResponseCache  = None,
+                 models:          bool           = False,
+                 hooks:           list           = None,
+                 coalesce:        bool           = True):
+        self.BASE_URL = company_url + "{url}?auth_token=" + token
+        self.urls = UrlBuilder(company_url, token)
+        if transport is None:
+            from endpoints.aio_transport import HttpxTransport
+            transport = HttpxTransport(max_connections=pool_size,
+                                       max_concurrency=max_concurrency,
+                                       keep_alive=keep_alive,
+                                       timeout=timeout,
+                                       rate_limiter=rate_limiter,
+                                       retry_policy=retry_policy)
+        self.transport = transport
+        self.cache = cache
+        self.models = models
+        self.hooks = Hooks(hooks or ())
+        self.flights = AsyncSingleFlight() if coalesce else None
 
-    @property
-    def emails(self):
-        return Emails(self)
+    async def close(self):
+        await self.transport.close()
+        _release_resources(self)
 
-    @property
-    def filters(self):
-        return Filters(self)
+    async def __aenter__(self):
+        return self
 
-    @property
-    def snippets(self):
-        return Snippets(self)
+    async def __aexit__(self, *exc_info):
+        await self.close()
 
-    @property
-    def reports(self):
-        return Reports(self)
+    tickets          = _resource("endpoints.aio", "AsyncTickets")
+    replies          = _resource("endpoints.aio", "AsyncReplies")
+    comments         = _resource("endpoints.aio", "AsyncComments")
+    teams            = _resource("endpoints.aio", "AsyncTeams")
+    users            = _resource("endpoints.aio", "AsyncUsers")
+    customers_groups = _resource("endpoints.aio", "AsyncCustomerGroups")
+    attachments      = _resource("endpoints.aio", "AsyncAttachments")
+    labels           = _resource("endpoints.aio", "AsyncLabels")
+    emails           = _resource("endpoints.aio", "AsyncEmails")
+    filters          = _resource("endpoints.aio", "AsyncFilters")
+    snippets         = _resource("endpoints.aio", "AsyncSnippets")
+    reports          = _resource("endpoints.aio", "AsyncReports")
@@ -0,0 +1,259 @@
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+def make_ticket(ticket_id):
+    return {
+        "id": ticket_id,
+        "subject": "Ticket {id} about an invoice".format(id=ticket_id),
+        "summary": "Hello, I have a question about my last invoice",
+        "replies_count": ticket_id % 5,
+        "comments_count": ticket_id % 3,
+        "created_at": "2024-01-01T10:{minute:02d}:00Z".format(minute=ticket_id % 60),
+        "last_activity_at": "2024-02-01T10:{minute:02d}:00Z".format(minute=ticket_id % 60),
+        "starred": False, "unanswered": True, "archived": False, "spam": False, "trash": False,
+        "cc": [], "bcc": [],
+        "requester": {"id": ticket_id % 50, "email": "customer{n}@example.com".format(n=ticket_id % 50),
+                      "name": "Customer {n}".format(n=ticket_id % 50), "agent": False, "role": "customer"},
+        "labels": [{"id": 1, "name": "billing", "color": "#ff0000", "label_type": "custom"}],
+        "current_user_assignee": {"user": {"id": 7, "name": "Agent", "email": "agent@example.com"}},
+        "current_team_assignee": None,
+        "content": {"text": "Lorem ipsum dolor sit amet " * 20, "html": "<p>Lorem ipsum</p>", "attachments": []},
+    }
+
+
+REFERENCE_DATA = {
+    "/labels":   {"labels": [{"id": n, "name": "label {n}".format(n=n)} for n in range(30)]},
+    "/users":    {"users": [{"id": n, "email": "agent{n}@example.com".format(n=n), "role": "agent"}
+                            for n in range(40)]},
+    "/teams":    {"teams": [{"id": n, "name": "team {n}".format(n=n), "users": []} for n in range(10)]},
+    "/snippets": {"snippets": [{"id": n, "name": "snippet {n}".format(n=n), "tags": [],
+                                "content": {"text": "Thanks for reaching out"}} for n in range(50)] + [
+                     {"id": 50, "name": "greeting", "tags": [],
+                      "content": {"text": "Hi {{ requester.first_name | there }},\n\nabout \"{{ ticket.subject }}\": "
+                                          "{{ agent.name }} will follow up.",
+                                  "html": "<p>Hi {{ requester.first_name | there }},</p><p>about "
+                                          "<b>{{ ticket.subject }}</b>: {{ agent.name }} will follow up.</p>"}}]},
+    "/emails":   {"forwarding_addresses": []},
+    "/filters":  {"filters": []},
+}
+
+_TICKET_PATH = re.compile(r"^/tickets/(\d+)(?:/(\w+))?")
+_DOWNLOAD_PATH = re.compile(r"^/attachments/(\d+)/download$")
+
+
+# Attachment body of `size` bytes, produced chunk by chunk
+def file_chunks(size, chunk_size=64 * 1024):
+    chunk = b"x" * chunk_size
+    while size > 0:
+        yield chunk[:size]
+        size -= chunk_size
+
+
+# =======================================================
+# FakeSupportBee - Local stand-in for the SupportBee API
+# =======================================================
+# latency:    seconds added to every response
+# tickets:    number of tickets served by GET /tickets
+# error_rate: share of requests answered with a 500
+# rate_limit: requests per second before answering 429 with Retry-After
+class FakeSupportBee:
+    def __init__(self,
+                 latency:    float = 0.0,
+                 tickets:    int   = 1000,
+                 error_rate: float = 0.0,
+                 rate_limit: float = None,
+                 seed:       int   = 0,
+                 host:       str   = "127.0.0.1",
+                 port:       int   = 0):
+        self.latency = latency
+        self.tickets = tickets
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self.requests = 0
+        self.connections = 0  # TCP connections accepted, to check keep-alive reuse
+        self.not_modified = 0  # 304 answers to conditional GETs
+        self.downloads = []    # Query of each attachment download
+        self._versions = {}    # Reference collection -> version, bumped by writes, sent as the ETag
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return "http://{host}:{port}".format(host=host, port=port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _throttled(self):
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit is None:
+                return None
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            if self._window_count > self.rate_limit:
+                return max(0.0, 1.0 - (now - self._window_start))
+            return None
+
+    def _failed(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    # Returns (status, headers, payload); uploads are reduced to their size
+    def respond(self, method, path, query, body_size, request_headers=None):
+        retry_after = self._throttled()
+        if retry_after is not None:
+            return 429, {"Retry-After": "{:.3f}".format(retry_after)}, {"error": "Rate limited"}
+        if self._failed():
+            return 500, {}, {"error": "Internal error"}
+
+        if method == "GET" and path == "/tickets":
+            per_page, page = int(query.get("per_page", 100)), int(query.get("page", 1))
+            total_pages = -(-self.tickets // per_page)
+            payload = {"total": self.tickets, "total_pages": total_pages, "current_page": page, "per_page": per_page}
+            if query.get("total_only", "").lower() != "true":
+                first = (page - 1) * per_page + 1
+                payload["tickets"] = [make_ticket(n) for n in range(first, min(first + per_page, self.tickets + 1))]
+            return 200, {}, payload
+        collection = "/" + path.strip("/").split("/", 1)[0]
+        if collection in REFERENCE_DATA:
+            with self._lock:
+                if method != "GET":
+                    self._versions[collection] = self._versions.get(collection, 1) + 1
+                etag = '"v{version}"'.format(version=self._versions.get(collection, 1))
+            if method == "GET" and path == collection:
+                if (request_headers or {}).get("If-None-Match") == etag:
+                    with self._lock:
+                        self.not_modified += 1
+                    return 304, {"ETag": etag}, None
+                return 200, {"ETag": etag}, REFERENCE_DATA[path]
+        if method == "POST" and path == "/attachments":
+            return 200, {}, {"attachment": {"id": self.requests, "size": body_size}}
+        if method == "GET" and _DOWNLOAD_PATH.match(path):
+            self.downloads.append(query)
+            size = int(query.get("size", 1 << 20))
+            return 200, {"Content-Type": "application/octet-stream", "Content-Length": str(size)}, file_chunks(size)
+
+        match = _TICKET_PATH.match(path)
+        if match and method == "GET":
+            ticket_id, child = int(match.group(1)), match.group(2)
+            if child is None:
+                return 200, {}, {"ticket": make_ticket(ticket_id)}
+            if child in ("replies", "comments"):
+                return 200, {}, {child: [{"id": n, "created_at": "2024-02-01T11:00:00Z",
+                                          "content": {"text": "Thanks!"}} for n in range(3)]}
+        if method in ("POST", "PUT", "DELETE"):
+            return 200, {}, {}
+        return 404, {}, {"error": "Not found"}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            wbufsize = -1  # Headers and body leave in one write, flushed after each request
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def _read_body(self):
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    size = 0
+                    while True:
+                        chunk_size = int(self.rfile.readline().split(b";")[0], 16)
+                        if not chunk_size:
+                            self.rfile.readline()
+                            return size
+                        size += chunk_size
+                        while chunk_size:  # Drained, not kept: uploads are only counted
+                            chunk_size -= len(self.rfile.read(min(chunk_size, 1 << 16)))
+                        self.rfile.readline()
+                length = int(self.headers.get("Content-Length") or 0)
+                remaining = length
+                while remaining:
+                    remaining -= len(self.rfile.read(min(remaining, 1 << 16)))
+                return length
+
+            def _respond(self):
+                size = self._read_body()
+                url = urlsplit(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if fake.latency:
+                    time.sleep(fake.latency)
+                status, headers, payload = fake.respond(self.command, url.path, query, size, self.headers)
+                if isinstance(payload, (dict, list)) or payload is None:
+                    data = json.dumps(payload).encode() if payload is not None else b""
+                    chunks = [data]
+                    headers.setdefault("Content-Length", str(len(data)))
+                else:
+                    chunks = payload  # File body, sent as produced; the headers carry its Content-Length
+                self.send_response(status)
+                headers.setdefault("Content-Type", "application/json")
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                if self.headers.get("Connection", "").lower() == "close":
+                    self.send_header("Connection", "close")
+                self.end_headers()
+                for chunk in chunks:
+                    self.wfile.write(chunk)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the SupportBee API")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    fake = FakeSupportBee(latency=args.latency, tickets=args.tickets, error_rate=args.error_rate,
+                          rate_limit=args.rate_limit, port=args.port).start()
+    print(fake.url, flush=True)
+    try:
+        fake._thread.join()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
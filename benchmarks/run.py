@@ -0,0 +1,460 @@
+import argparse
+import gc
+import html
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SupportBee import SupportBee, ResponseCache, BasicOptions, SortByOptions  # noqa: E402
+from endpoints.labels import TICKET_LABEL  # noqa: E402
+from endpoints.models import wrap_response  # noqa: E402
+from endpoints.streaming import loads  # noqa: E402
+from endpoints.templates import PLACEHOLDER  # noqa: E402
+from benchmarks.fake_server import make_ticket  # noqa: E402
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+# =======================================================
+# Recorder - Latency samples, fed by the instrumentation hooks or timed by hand
+# =======================================================
+class Recorder:
+    def __init__(self):
+        self.request_latencies = []
+        self.op_latencies = []
+        self.retained_memory = None
+
+    def after_response(self, event):
+        if event.cache != "hit":
+            self.request_latencies.append(event.latency)
+
+    def on_error(self, event):
+        if event.status is None:
+            self.request_latencies.append(event.latency)
+
+    @contextmanager
+    def op(self):
+        started = time.perf_counter()
+        yield
+        self.op_latencies.append(time.perf_counter() - started)
+
+    # Memory still allocated while the benchmark holds its results (only in the memory run)
+    def measure_retained(self):
+        if tracemalloc.is_tracing():
+            gc.collect()
+            self.retained_memory = tracemalloc.get_traced_memory()[0]
+
+    # Timed operations when the benchmark has some, HTTP requests otherwise
+    def latencies(self):
+        return self.op_latencies or self.request_latencies
+
+
+class Context:
+    def __init__(self, url, args, recorder):
+        self.url = url
+        self.args = args
+        self.recorder = recorder
+
+    def client(self, **kwargs):
+        return SupportBee("benchmark-token", self.url, hooks=[self.recorder], **kwargs)
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+# =======================================================
+# Benchmarks - Each one returns the number of operations it performed
+# =======================================================
+@benchmark("client_construction")
+def client_construction(ctx):
+    count = 2000
+    for _ in range(count):
+        with ctx.recorder.op():
+            api = SupportBee("benchmark-token", ctx.url)
+            api.tickets
+            api.close()
+    return count
+
+
+# Fresh interpreter per run: measures what `import SupportBee` costs a short-lived script
+@benchmark("import_time")
+def import_time(ctx):
+    count = 10
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = "import time; started = time.perf_counter(); import SupportBee; print(time.perf_counter() - started)"
+    for _ in range(count):
+        output = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True).stdout
+        ctx.recorder.op_latencies.append(float(output))
+    return count
+
+
+# Per-call overhead left once the client exists: accessor lookup and request header preparation
+@benchmark("accessor_overhead")
+def accessor_overhead(ctx):
+    count = 100000
+    api = SupportBee("benchmark-token", ctx.url)
+    started = time.perf_counter()
+    for _ in range(count):
+        api.tickets._prepare_headers()
+    ctx.recorder.op_latencies.append((time.perf_counter() - started) / count)
+    api.close()
+    return count
+
+
+_URL_PARAMS = {"per_page": 100, "page": 3, "archived": BasicOptions.FALSE, "spam": False, "trash": None,
+               "sort_by": SortByOptions.LAST_ACTIVITY, "requester_emails": "customer+1@example.com"}
+
+
+def _concat_url(base_url, endpoint, params):  # What _prepare_url did before the url builder, without encoding
+    url = base_url.format(url=endpoint)
+    for key, value in params.items():
+        if value is not None:
+            url += "&" + key + "=" + str(value)
+    return url
+
+
+def _url_building(ctx, prepare):
+    count = 100000
+    api = SupportBee("benchmark-token", ctx.url)
+    started = time.perf_counter()
+    for ticket_id in range(count):
+        prepare(api, TICKET_LABEL.format(ticket_id=ticket_id, label_name="to do"))
+    ctx.recorder.op_latencies.append((time.perf_counter() - started) / count)
+    api.close()
+    return count
+
+
+# Per-call cost of the url of a filtered GET, against the plain concatenation it replaced
+@benchmark("url_building")
+def url_building(ctx):
+    return _url_building(ctx, lambda api, endpoint: api.tickets._prepare_url(endpoint, **_URL_PARAMS))
+
+
+@benchmark("url_building_concat")
+def url_building_concat(ctx):
+    return _url_building(ctx, lambda api, endpoint: _concat_url(api.BASE_URL, endpoint, _URL_PARAMS))
+
+
+def _single_gets(ctx, keep_alive):
+    count = ctx.args.requests
+    with ctx.client(keep_alive=keep_alive) as api:
+        for ticket_id in range(1, count + 1):
+            api.tickets.get(ticket_id)
+    return count
+
+
+@benchmark("transport_pooled")
+def transport_pooled(ctx):
+    return _single_gets(ctx, keep_alive=True)
+
+
+@benchmark("transport_unpooled")
+def transport_unpooled(ctx):
+    return _single_gets(ctx, keep_alive=False)
+
+
+@benchmark("pagination_sequential")
+def pagination_sequential(ctx):
+    with ctx.client() as api:
+        return sum(1 for _ in api.tickets.iter_fetch(per_page=ctx.args.per_page))
+
+
+@benchmark("pagination_prefetch")
+def pagination_prefetch(ctx):
+    with ctx.client() as api:
+        return sum(1 for _ in api.tickets.iter_fetch(per_page=ctx.args.per_page, prefetch=True))
+
+
+@benchmark("pagination_stream")
+def pagination_stream(ctx):
+    with ctx.client() as api:
+        return sum(1 for _ in api.tickets.iter_fetch(per_page=ctx.args.per_page, stream=True))
+
+
+@benchmark("pagination_export")
+def pagination_export(ctx):
+    with ctx.client() as api:
+        return sum(len(tickets) for _, tickets in api.tickets.export(per_page=ctx.args.per_page, max_workers=8))
+
+
+@benchmark("bulk_writes")
+def bulk_writes(ctx):
+    ticket_ids = list(range(1, ctx.args.requests + 1))
+    with ctx.client() as api:
+        report = api.tickets.bulk(max_workers=8).archive(ticket_ids).addLabel(ticket_ids, "benchmark").run()
+    return len(report)
+
+
+@benchmark("attachment_upload")
+def attachment_upload(ctx):
+    count, size = 5, 4 * 1024 * 1024
+    chunks = [b"\0" * 65536] * (size // 65536)
+    with ctx.client() as api:
+        for n in range(count):
+            with ctx.recorder.op():
+                api.attachments.create("upload-{n}.bin".format(n=n), iter(chunks))
+    return count
+
+
+# Worker threads all reading the same few tickets and labels at the same moment
+def _burst_gets(ctx, coalesce):
+    count, workers = ctx.args.requests, 32
+    with ctx.client(coalesce=coalesce, pool_size=workers) as api:
+        def read(n):
+            return api.labels.fetch() if n % 4 == 0 else api.tickets.get(n % 5 + 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(read, range(count)))
+    return count
+
+
+@benchmark("burst_gets")
+def burst_gets(ctx):
+    return _burst_gets(ctx, coalesce=True)
+
+
+@benchmark("burst_gets_uncoalesced")
+def burst_gets_uncoalesced(ctx):
+    return _burst_gets(ctx, coalesce=False)
+
+
+def _reference_data(ctx, cache):
+    rounds = ctx.args.requests // 4
+    with ctx.client(cache=cache) as api:
+        for _ in range(rounds):
+            with ctx.recorder.op():
+                api.labels.fetch()
+                api.users.fetch()
+                api.teams.fetch()
+                api.snippets.fetch()
+    return rounds * 4
+
+
+@benchmark("reference_data")
+def reference_data(ctx):
+    return _reference_data(ctx, cache=None)
+
+
+@benchmark("reference_data_cached")
+def reference_data_cached(ctx):
+    return _reference_data(ctx, cache=ResponseCache())
+
+
+_AGENT = {"id": 7, "name": "Agent <Smith>", "email": "agent@example.com"}
+
+
+def _snippet_render(ctx, render):
+    count = 20000
+    tickets = wrap_response({"tickets": [make_ticket(n) for n in range(1, 201)]})["tickets"]
+    with ctx.client() as api:
+        snippet = [item for item in api.snippets.fetch()["snippets"] if item.get("name") == "greeting"][0]
+        render = render(api, snippet)
+        started = time.perf_counter()
+        for n in range(count):
+            render(tickets[n % len(tickets)])
+        ctx.recorder.op_latencies.append((time.perf_counter() - started) / count)
+    return count
+
+
+# Per-reply cost of filling the HTML variant of a snippet, precompiled against a regex pass per reply
+@benchmark("snippet_render")
+def snippet_render(ctx):
+    def prepare(api, snippet):
+        renderer = api.snippets.renderer(agent=_AGENT)
+        return lambda ticket: renderer.render("greeting", ticket, html=True)
+    return _snippet_render(ctx, prepare)
+
+
+@benchmark("snippet_render_regex")
+def snippet_render_regex(ctx):
+    def prepare(api, snippet):
+        def render(ticket):
+            context = {"ticket": ticket, "requester": ticket.requester, "agent": _AGENT}
+
+            def fill(match):
+                value = context
+                for key in match.group(1).split("."):
+                    value = value.get(key) if value is not None else None
+                return html.escape(str(value)) if value else (match.group(2) or "")
+            return PLACEHOLDER.sub(fill, snippet["content"]["html"])
+        return render
+    return _snippet_render(ctx, prepare)
+
+
+def _decode_tickets(ctx, models):
+    payload = json.dumps({"tickets": [make_ticket(n) for n in range(1, ctx.args.tickets + 1)]}).encode()
+    gc.collect()
+    with ctx.recorder.op():
+        tickets = loads(payload)["tickets"]
+        if models:
+            tickets = wrap_response({"tickets": tickets})["tickets"]
+            for ticket in tickets:  # Decode nested objects the way a consumer would
+                ticket.requester.email
+                ticket.labels
+        else:
+            for ticket in tickets:
+                ticket["requester"]["email"]
+                ticket["labels"]
+    del payload
+    ctx.recorder.measure_retained()
+    return len(tickets)
+
+
+@benchmark("model_memory_dicts")
+def model_memory_dicts(ctx):
+    return _decode_tickets(ctx, models=False)
+
+
+@benchmark("model_memory_models")
+def model_memory_models(ctx):
+    return _decode_tickets(ctx, models=True)
+
+
+# =======================================================
+# Runner
+# =======================================================
+def run_benchmark(name, url, args):
+    timings = []
+    for _ in range(args.repeat):
+        recorder = Recorder()
+        gc.collect()
+        started = time.perf_counter()
+        ops = BENCHMARKS[name](Context(url, args, recorder))
+        timings.append((time.perf_counter() - started, ops, recorder))
+    seconds, ops, recorder = sorted(timings, key=lambda timing: timing[0])[len(timings) // 2]  # Median run
+    latencies = recorder.latencies()
+
+    peak_memory = retained_memory = None
+    if args.memory:  # Separate run: tracing allocations slows the code down
+        gc.collect()
+        memory_recorder = Recorder()
+        tracemalloc.start()
+        BENCHMARKS[name](Context(url, args, memory_recorder))
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        retained_memory = memory_recorder.retained_memory
+
+    return {
+        "benchmark":   name,
+        "ops":         ops,
+        "seconds":     round(seconds, 4),
+        "throughput":  round(ops / seconds, 1) if seconds else None,
+        "requests":    len(recorder.request_latencies),
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p99": percentile(latencies, 0.99),
+        "latency_avg": statistics.mean(latencies) if latencies else None,
+        "peak_memory": peak_memory,
+        "retained_memory": retained_memory,
+    }
+
+
+@contextmanager
+def fake_server(args):
+    command = [sys.executable, "-m", "benchmarks.fake_server",
+               "--latency", str(args.latency),
+               "--tickets", str(args.tickets),
+               "--error-rate", str(args.error_rate)]
+    if args.rate_limit is not None:
+        command += ["--rate-limit", str(args.rate_limit)]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(command, cwd=root, stdout=subprocess.PIPE, text=True)  # Own process: own GIL
+    try:
+        yield process.stdout.readline().strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _format(value, scale=1.0, digits=1):
+    return "-" if value is None else "{value:.{digits}f}".format(value=value * scale, digits=digits)
+
+
+def print_results(results, baseline=None):
+    baseline = {result["benchmark"]: result for result in (baseline or {}).get("results", ())}
+    print("{:<24} {:>8} {:>10} {:>9} {:>9} {:>10} {:>12} {:>8}".format(
+        "benchmark", "ops", "ops/s", "p50 ms", "p99 ms", "peak KiB", "retained KiB", "vs base"))
+    for result in results:
+        previous = baseline.get(result["benchmark"])
+        change = "-"
+        if previous and previous.get("throughput") and result["throughput"]:
+            change = "{:+.1f}%".format((result["throughput"] / previous["throughput"] - 1) * 100)
+        print("{:<24} {:>8} {:>10} {:>9} {:>9} {:>10} {:>12} {:>8}".format(
+            result["benchmark"], result["ops"], _format(result["throughput"]),
+            _format(result["latency_p50"], 1000, 2), _format(result["latency_p99"], 1000, 2),
+            _format(result["peak_memory"], 1 / 1024, 0), _format(result["retained_memory"], 1 / 1024, 0), change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SupportBee wrapper benchmarks against a local fake server")
+    parser.add_argument("benchmarks", nargs="*", help="Names to run (default: all): " + ", ".join(BENCHMARKS))
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each response")
+    parser.add_argument("--tickets", type=int, default=2000, help="Tickets served by the fake server")
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=400, help="Requests of the single request benchmarks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500 responses")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests/s before 429 responses")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark, the median is kept")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip the peak memory run")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare throughput with")
+    args = parser.parse_args(argv)
+
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error("unknown benchmarks: " + ", ".join(sorted(unknown)))
+
+    with fake_server(args) as url:
+        results = [run_benchmark(name, url, args) for name in names]
+
+    report = {
+        "meta": {
+            "commit":    git_commit(),
+            "python":    platform.python_version(),
+            "platform":  platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "server":    {"latency": args.latency, "tickets": args.tickets, "error_rate": args.error_rate,
+                          "rate_limit": args.rate_limit},
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
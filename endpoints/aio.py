@@ -0,0 +1,303 @@
+import asyncio
+import functools
+import inspect
+import time
+
+from .base import Resource, SupportBeeError, SortByOptions
+from .cache import MISS
+from .urls import template_of
+from .streaming import AsyncItemStream
+from .pagination import aiter_pages, aiter_stream_pages, afan_out_pages
+from .bulk import AsyncBulkOperations
+from .threads import THREAD_PARTS
+from .report_engine import AsyncReportsEngine
+from .loader import AsyncBatchLoader
+from .templates import AsyncSnippetRenderer
+from .tickets import Tickets, unseen_tickets
+from .replies import Replies
+from .comments import Comments
+from .teams import Teams
+from .users import Users
+from .customer_groups import CustomerGroups
+from .attachments import Attachments, attachment_ids
+from .multipart import CHUNK_SIZE
+from .labels import Labels
+from .emails import Emails
+from .filters import Filters
+from .snippets import Snippets
+from .reports import Reports
+
+
+def _awaitable(method):
+    # Endpoint methods return whatever _get/_post/... return, which is a coroutine here.
+    # Wrapping them keeps early exits (e.g. `return` with nothing to update) awaitable too.
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+    return wrapper
+
+
+# =======================================================
+# AsyncResource - Same requests as Resource, sent from a coroutine
+# =======================================================
+class AsyncResource(Resource):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for base in cls.__mro__[1:]:
+            if not issubclass(base, Resource) or base in (Resource, AsyncResource):
+                continue
+            for name, member in vars(base).items():
+                if name.startswith("_") or name in vars(cls) or not inspect.isfunction(member):
+                    continue
+                if inspect.isgeneratorfunction(member) or inspect.iscoroutinefunction(member):
+                    continue
+                setattr(cls, name, _awaitable(member))
+
+    async def _request(self, method, endpoint, data=None, files=None, body=None, idempotent=None,
+                       extra_headers=None, stream=False, cache_status=None, params=None, template=None, **kwargs):
+        url = self._prepare_url(endpoint, params, **kwargs)
+        headers = self._prepare_headers(files, extra_headers)
+        hooks = self.api.hooks
+        event = hooks.start(method, template or template_of(endpoint), cache_status) if hooks else None
+        started = time.perf_counter()
+        try:
+            response = await self.api.transport.request(method, url, headers=headers, json=data, files=files,
+                                                        body=body, idempotent=idempotent, stream=stream, event=event)
+        except Exception as error:
+            if event is not None:
+                hooks.finish(event, started, error=error)
+            raise
+        if stream and response.status_code >= 400:
+            await response.aread()  # Error bodies are small, read them before checking
+        if event is not None:
+            hooks.finish(event, started, response, stream=stream)
+        self._invalidate(method, endpoint)
+        self._check(response)
+        return response
+
+    async def _get(self, endpoint, stream=None, **kwargs):
+        if stream is not None:
+            return await self._stream(endpoint, stream, **kwargs)
+        flights = self.api.flights
+        if flights is None:
+            return self._wrap(await self._get_json(endpoint, **kwargs))
+        return self._wrap(await flights.do(self._flight_key(endpoint, kwargs),
+                                           lambda: self._get_json(endpoint, **kwargs)))
+
+    async def _stream(self, endpoint, key, **kwargs):
+        response = await self._request("GET", endpoint, stream=True, **kwargs)
+        return self._stream_response(response, key, AsyncItemStream)
+
+    async def _get_json(self, endpoint, **kwargs):
+        key = self._cache_key(endpoint, kwargs)
+        if key is None:
+            return self._json(await self._request("GET", endpoint, **kwargs))
+
+        value, validators = self.api.cache.lookup(key)
+        if value is MISS:
+            response = await self._request("GET", endpoint, extra_headers=validators, cache_status="miss", **kwargs)
+            value = self._cache_store(endpoint, key, response)
+            if value is MISS:
+                response = await self._request("GET", endpoint, cache_status="miss", **kwargs)
+                value = self._cache_store(endpoint, key, response)
+        elif self.api.hooks:
+            self.api.hooks.cache_hit("GET", template_of(endpoint))
+        return value
+
+    async def _post(self, endpoint, data=None, files=None, idempotent=False, **kwargs):
+        return self._wrap(self._json_or_text(await self._request("POST", endpoint, data=data, files=files,
+                                                                 idempotent=idempotent, **kwargs)))
+
+    async def _put(self, endpoint, data=None, **kwargs):
+        return self._wrap(self._json_or_text(await self._request("PUT", endpoint, data=data, **kwargs)))
+
+    async def _delete(self, endpoint, **kwargs):
+        return self._json_or_text(await self._request("DELETE", endpoint, **kwargs))
+
+
+# =======================================================
+# Async endpoints
+# =======================================================
+class AsyncTickets(AsyncResource, Tickets):
+    def iter_fetch(self,
+                   per_page: int  = 100,
+                   page:     int  = 1,
+                   prefetch: bool = False,
+                   stream:   bool = False,
+                   **kwargs):
+        if stream:
+            return aiter_stream_pages(lambda p: self.fetch(per_page=per_page, page=p, stream=True, **kwargs),
+                                      page=page, per_page=per_page)
+        return aiter_pages(lambda p: self.fetch(per_page=per_page, page=p, **kwargs),
+                           "tickets", page=page, per_page=per_page, prefetch=prefetch)
+
+    def iter_search(self,
+                    query:    str,
+                    per_page: int  = 100,
+                    page:     int  = 1,
+                    spam:     bool = False,
+                    trash:    bool = False,
+                    prefetch: bool = False,
+                    stream:   bool = False):
+        if stream:
+            return aiter_stream_pages(lambda p: self.search(query, per_page=per_page, page=p, spam=spam, trash=trash,
+                                                            stream=True),
+                                      page=page, per_page=per_page)
+        return aiter_pages(lambda p: self.search(query, per_page=per_page, page=p, spam=spam, trash=trash),
+                           "tickets", page=page, per_page=per_page, prefetch=prefetch)
+
+    async def export(self,
+                     per_page:    int  = 100,
+                     max_workers: int  = 8,
+                     ordered:     bool = True,
+                     **kwargs):
+        kwargs.setdefault("sort_by", SortByOptions.CREATION_TIME)
+        total = (await self.fetch(total_only=True, **kwargs))["total"]
+        pages = range(1, -(-total // per_page) + 1)
+        seen = set()
+        full = True  # Whether the last page came back full: tickets created meanwhile spill past it
+        async for page, result in afan_out_pages(lambda p: self.fetch(per_page=per_page, page=p, **kwargs),
+                                                 pages, max_workers=max_workers, ordered=ordered):
+            tickets = result.get("tickets") or []
+            if page == pages.stop - 1:
+                full = len(tickets) >= per_page
+            yield page, unseen_tickets(tickets, seen)
+        page = pages.stop
+        while full:
+            tickets = (await self.fetch(per_page=per_page, page=page, **kwargs)).get("tickets") or []
+            full = len(tickets) >= per_page
+            if tickets:
+                yield page, unseen_tickets(tickets, seen)
+            page += 1
+
+    async def get_thread(self,
+                         ticket_id: int):
+        return (await self.get_threads([ticket_id], max_workers=len(THREAD_PARTS)))[0]
+
+    async def get_threads(self,
+                          ticket_ids:  list,
+                          max_workers: int = 8):
+        results = {}
+        async for thread_part, result in afan_out_pages(self._fetch_thread_part, self._thread_parts(ticket_ids),
+                                                        max_workers=max_workers, ordered=False):
+            results[thread_part] = result
+        return self._build_threads(ticket_ids, results)
+
+    def bulk(self,
+             max_workers: int = 8):
+        return AsyncBulkOperations(AsyncTickets(self.api, raise_errors=True),
+                                   AsyncLabels(self.api, raise_errors=True),
+                                   max_workers=max_workers)
+
+    def loader(self,
+               max_workers: int   = 8,
+               window:      float = 0.0):  # 0 = ids requested during one event loop iteration
+        return AsyncBatchLoader(self.get, max_workers=max_workers, window=window)
+
+
+class AsyncReplies(AsyncResource, Replies):
+    pass
+
+
+class AsyncComments(AsyncResource, Comments):
+    pass
+
+
+class AsyncTeams(AsyncResource, Teams):
+    pass
+
+
+class AsyncUsers(AsyncResource, Users):
+    def loader(self,
+               max_tickets: False or int = 5,
+               max_workers: int          = 8,
+               window:      float        = 0.0):  # 0 = ids requested during one event loop iteration
+        return AsyncBatchLoader(lambda user_id: self.get(user_id, max_tickets=max_tickets),
+                                max_workers=max_workers, window=window)
+
+
+class AsyncCustomerGroups(AsyncResource, CustomerGroups):
+    pass
+
+
+class AsyncAttachments(AsyncResource, Attachments):
+    async def createMany(self,
+                         files,
+                         max_workers: int = 4):
+        items = files.items() if isinstance(files, dict) else files
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def upload(filename, file):
+            async with semaphore:
+                return await self.create(filename, file)
+
+        responses = await asyncio.gather(*(upload(*item) for item in items))
+        return [attachment_id for response in responses for attachment_id in attachment_ids(response)]
+
+    # Returns the number of bytes written, or an async iterator of chunks when no destination is given
+    async def download(self,
+                       url:         str,
+                       destination=None,
+                       chunk_size:  int = CHUNK_SIZE):
+        request = self._download_request(url)
+        if request is not None:
+            response = await self._request(**request)
+        else:
+            response = await self.api.transport.request("GET", url, stream=True)
+            if response.status_code >= 400:
+                await response.aread()
+        if response.status_code >= 400:
+            raise SupportBeeError(response)
+
+        chunks = self._aiter_chunks(response, chunk_size)
+        if destination is None:
+            return chunks
+        if hasattr(destination, "write"):
+            return await self._write_chunks(chunks, destination)
+        with open(destination, "wb") as f:
+            return await self._write_chunks(chunks, f)
+
+    @staticmethod
+    async def _aiter_chunks(response, chunk_size):
+        try:
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+        finally:
+            await response.aclose()
+
+    @staticmethod
+    async def _write_chunks(chunks, f):
+        written = 0
+        async for chunk in chunks:
+            written += f.write(chunk)
+        return written
+
+
+class AsyncLabels(AsyncResource, Labels):
+    pass
+
+
+class AsyncEmails(AsyncResource, Emails):
+    pass
+
+
+class AsyncFilters(AsyncResource, Filters):
+    pass
+
+
+class AsyncSnippets(AsyncResource, Snippets):
+    def renderer(self,
+                 agent=None,
+                 max_age: float = None):  # Seconds before a render refreshes the snippets in the background
+        return AsyncSnippetRenderer(self, agent=agent, max_age=max_age)
+
+
+class AsyncReports(AsyncResource, Reports):
+    def engine(self,
+               backend=None,
+               max_workers: int = 8):
+        return AsyncReportsEngine(AsyncReports(self.api, raise_errors=True), backend=backend,
+                                  max_workers=max_workers)
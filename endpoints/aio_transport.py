@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+from .ratelimit import RateLimiter, REJECTED_STATUSES
+from .retry import RetryPolicy, DEFAULT_TIMEOUT, cap_timeout
+
+try:
+    import httpx
+except ImportError:  # Optional, only needed by AsyncSupportBee
+    httpx = None
+
+
+# =======================================================
+# AsyncTransport - Sends prepared requests from a coroutine
+# =======================================================
+class AsyncTransport:
+    retry_exceptions = ()
+
+    def __init__(self, rate_limiter: RateLimiter = None, retry_policy: RetryPolicy = None):
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+
+    async def send(self, method, url, headers=None, json=None, files=None, body=None, stream=False, timeout=None):
+        raise NotImplementedError
+
+    async def request(self, method, url, headers=None, json=None, files=None, body=None, idempotent=None,
+                      stream=False, event=None):
+        policy = self.retry_policy
+        retryable = policy.allows(method, idempotent)
+        started = time.monotonic()
+        attempt = 0    # Resends after errors, bounded by the retry policy
+        throttles = 0  # Resends after 429/503, bounded by the rate limiter
+        options = dict(headers=headers, json=json, files=files, body=body, stream=stream)
+        while True:
+            await self.rate_limiter.acquire_async()
+            if event is not None:
+                event.retries = attempt + throttles
+            if policy.deadline is not None:
+                options["timeout"] = policy.remaining(started)  # An attempt never outlives the call's budget
+            try:
+                response = await self.send(method, url, **options)
+            except self.retry_exceptions:
+                delay = policy.next_delay(attempt, started) if retryable else None
+                if delay is None:
+                    raise
+            else:
+                throttled = self.rate_limiter.on_response(response.status_code, response.headers, throttles)
+                if throttled and (retryable or response.status_code in REJECTED_STATUSES):
+                    if policy.expired(started, self.rate_limiter.pending_wait()):
+                        return response
+                    await response.aclose()
+                    throttles += 1
+                    continue
+                if not retryable or response.status_code not in policy.retry_statuses:
+                    return response
+                delay = policy.next_delay(attempt, started)
+                if delay is None:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+# =======================================================
+# HttpxTransport - Pooled async connections with bounded concurrency
+# =======================================================
+class HttpxTransport(AsyncTransport):
+    retry_exceptions = (httpx.TransportError,) if httpx is not None else ()
+
+    def __init__(self,
+                 max_connections: int   = 10,
+                 max_concurrency: int   = None,  # Default = max_connections
+                 keep_alive:      bool  = True,
+                 timeout:         tuple = DEFAULT_TIMEOUT,
+                 client=None,
+                 rate_limiter:    RateLimiter = None,
+                 retry_policy:    RetryPolicy = None):
+        super().__init__(rate_limiter, retry_policy)
+        if client is None:
+            if httpx is None:
+                raise ImportError("HttpxTransport requires httpx: pip install httpx")
+            connect_timeout, read_timeout = timeout
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections if keep_alive else 0),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+        self.client = client
+        self.max_concurrency = max_concurrency or max_connections
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def send(self, method, url, headers=None, json=None, files=None, body=None, stream=False, timeout=None):
+        async with self.semaphore:
+            if hasattr(body, "__aiter__"):
+                body = body.__aiter__()  # httpx would pick the blocking iterator of dual sync/async bodies
+            options = {}
+            if timeout is not None:  # Seconds left of the call's deadline
+                options["timeout"] = httpx.Timeout(**{phase: cap_timeout(value, timeout)
+                                                      for phase, value in self.client.timeout.as_dict().items()})
+            request = self.client.build_request(method, url, headers=headers, json=json, files=files, content=body,
+                                                **options)
+            return await self.client.send(request, stream=stream)
+
+    async def close(self):
+        await self.client.aclose()
@@ -1,4 +1,28 @@
-from .base import Resource
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from .base import Resource, SupportBeeError
+from .multipart import MultipartStream, CHUNK_SIZE
+
+
+_NUMBERS = re.compile(r"/\d+(?=/|$)")
+
+
+def attachment_ids(response):
+    if isinstance(response, dict):
+        if "attachments" in response:
+            return [str(attachment["id"]) for attachment in response["attachments"]]
+        if "attachment" in response:
+            return [str(response["attachment"]["id"])]
+    raise ValueError("Unexpected attachment upload response: {response!r}".format(response=response))
+
+
+def write_chunks(chunks, destination):
+    if hasattr(destination, "write"):
+        return sum(destination.write(chunk) for chunk in chunks)
+    with open(destination, "wb") as f:
+        return sum(f.write(chunk) for chunk in chunks)
 
 
 # =======================================================
@@ -6,9 +30,54 @@ from .base import Resource
 # =======================================================
 class Attachments(Resource):
     def create(self,
-               filename: str,
-               file: bytes):
-        files = {
-            "files[]": (filename, file, "multipart/form-data")
-        }
-        return self._post("/attachments", files=files)
+               filename:     str,
+               file,                     # bytes, path, binary file object or iterable of bytes chunks
+               content_type: str = None):  # Default = guessed from filename
+        body = MultipartStream("files[]", filename, file, content_type)
+        return self._post("/attachments", body=body, extra_headers=body.headers)
+
+    # Returns the ids of the uploaded files, in order, ready for attachment_ids of the create methods
+    def createMany(self,
+                   files,                # {filename: file} or [(filename, file), ...]
+                   max_workers: int = 4):
+        items = files.items() if isinstance(files, dict) else files
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(lambda item: self.create(*item), items))
+        return [attachment_id for response in responses for attachment_id in attachment_ids(response)]
+
+    def _download_request(self, url):
+        company_url = self.api.BASE_URL.split("{url}", 1)[0]
+        if url.startswith(company_url):
+            url = url[len(company_url):]
+        if url.startswith("/"):
+            endpoint, _, query = url.partition("?")
+            return dict(method="GET", endpoint=endpoint, stream=True, extra_headers={"Accept": "*/*"},
+                        params=dict(parse_qsl(query, keep_blank_values=True)),
+                        template=_NUMBERS.sub("/{id}", endpoint))  # Hooks group downloads by route
+        return None  # Hosted elsewhere (e.g. signed storage url): the auth token must not be sent there
+
+    # Streams the file to `destination` (path or binary file object) and returns the number of bytes written,
+    # or returns an iterator of chunks when no destination is given
+    def download(self,
+                 url:         str,
+                 destination=None,
+                 chunk_size:  int = CHUNK_SIZE):
+        request = self._download_request(url)
+        if request is not None:
+            response = self._request(**request)
+        else:
+            response = self.api.transport.request("GET", url, stream=True)
+        if response.status_code >= 400:
+            raise SupportBeeError(response)
+
+        chunks = self._iter_chunks(response, chunk_size)
+        if destination is None:
+            return chunks
+        return write_chunks(chunks, destination)
+
+    @staticmethod
+    def _iter_chunks(response, chunk_size):
+        try:
+            yield from response.iter_content(chunk_size)
+        finally:
+            response.close()
@@ -1,6 +1,11 @@
 import json
-import requests
+import time
 from enum import Enum
+from types import MappingProxyType
+
+from .models import wrap_response, RESPONSE_MODELS
+from .streaming import loads, ItemStream
+from .urls import encode_query, template_of
 
 
 # =======================================================
@@ -41,43 +46,157 @@ class DataPointType(Enum):
     REPLIES_COUNT = "replies_count"
 
 
+# =======================================================
+# Errors
+# =======================================================
+class SupportBeeError(Exception):
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        super().__init__("SupportBee API returned HTTP {status}: {body}".format(
+            status=response.status_code, body=response.text[:200]))
+
+
 # =======================================================
 # Resource - Base class with default requests
 # =======================================================
+# Shared by every resource and never mutated: _prepare_headers copies it when a request needs more headers
+DEFAULT_HEADERS = MappingProxyType({
+    "Content-Type": "application/json",
+    "Accept": "application/json"
+})
+
+
 class Resource:
-    def __init__(self, api):
+    default_headers = DEFAULT_HEADERS
+
+    def __init__(self, api, raise_errors: bool = False):  # raise_errors: raise SupportBeeError on HTTP >= 400
         self.api = api
-        self.default_headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-
-    def _prepare_url(self, endpoint, **kwargs):
-        url = self.api.BASE_URL.format(url=endpoint)
-        for key, value in kwargs.items():
-            if value is not None:
-                url += "&" + key + "=" + str(value)
-        return url
-
-    def _get(self, endpoint, **kwargs):
-        url = self._prepare_url(endpoint, **kwargs)
-        return requests.get(url, headers=self.default_headers).json()
-
-    def _post(self, endpoint, data=None, files=None, **kwargs):
-        url = self._prepare_url(endpoint, **kwargs)
-        headers = self.default_headers
+        self.raise_errors = raise_errors
+
+    # Query values are percent-encoded, see endpoints.urls.encode_value for enums, booleans and lists.
+    # `params` holds query values whose names could clash with keyword arguments (e.g. a signed url's query).
+    def _prepare_url(self, endpoint, params=None, **kwargs):
+        return self.api.urls.build(endpoint, kwargs if params is None else dict(params, **kwargs))
+
+    def _prepare_headers(self, files=None, extra_headers=None):
+        if files is None and extra_headers is None:
+            return self.default_headers
+        headers = dict(self.default_headers, **(extra_headers or {}))
         if files is not None:
             headers.pop("Content-Type")
-        response = requests.post(url, headers=headers, json=data, files=files)
+        return headers
+
+    # cache_status ("miss" for cacheable GETs) and the route `template` (default: template_of(endpoint)) are
+    # reported to the instrumentation hooks
+    def _request(self, method, endpoint, data=None, files=None, body=None, idempotent=None, extra_headers=None,
+                 stream=False, cache_status=None, params=None, template=None, **kwargs):
+        url = self._prepare_url(endpoint, params, **kwargs)
+        headers = self._prepare_headers(files, extra_headers)
+        hooks = self.api.hooks
+        event = hooks.start(method, template or template_of(endpoint), cache_status) if hooks else None
+        started = time.perf_counter()
+        try:
+            response = self.api.transport.request(method, url, headers=headers, json=data, files=files, body=body,
+                                                  idempotent=idempotent, stream=stream, event=event)
+        except Exception as error:
+            if event is not None:
+                hooks.finish(event, started, error=error)
+            raise
+        if event is not None:
+            hooks.finish(event, started, response, stream=stream)
+        self._invalidate(method, endpoint)
+        self._check(response)
+        return response
+
+    def _check(self, response):
+        if self.raise_errors and response.status_code >= 400:
+            raise SupportBeeError(response)
+
+    # Writes drop every cached response of the same collection (e.g. PUT /snippets/1 -> GET /snippets)
+    def _invalidate(self, method, endpoint):
+        if method != "GET" and self.api.cache is not None:
+            self.api.cache.invalidate(endpoint)
+
+    def _cache_key(self, endpoint, params):
+        cache = self.api.cache
+        if cache is None or not cache.caches(endpoint):
+            return None
+        return cache.key(self.api.BASE_URL, endpoint, params)
+
+    # Returns MISS when a 304 arrives for an entry evicted in the meantime
+    def _cache_store(self, endpoint, key, response):
+        if response.status_code == 304:
+            return self.api.cache.revalidate(endpoint, key)
+        started = time.perf_counter()
+        value = self._json(response)
+        if 200 <= response.status_code < 300:
+            self.api.cache.set(endpoint, key, value,
+                               headers=response.headers,
+                               size=len(response.content),
+                               parse_time=time.perf_counter() - started)
+        return value
+
+    # Decodes with orjson when it is installed
+    @staticmethod
+    def _json(response):
+        return loads(response.content)
+
+    @staticmethod
+    def _json_or_text(response):
         try:
-            return response.json()
+            return loads(response.content)
         except json.decoder.JSONDecodeError:
             return response.text
 
+    # Converts tickets, replies, users, ... of a payload to models when the client asks for them
+    def _wrap(self, value):
+        return wrap_response(value) if self.api.models else value
+
+    # Identical GETs in flight at the same time share one request (see endpoints.singleflight)
+    def _flight_key(self, endpoint, params):
+        return self.raise_errors, endpoint, encode_query(sorted(params.items()))
+
+    # stream="tickets" returns an ItemStream decoding the "tickets" array item by item, bypassing the cache
+    def _get(self, endpoint, stream=None, **kwargs):
+        if stream is not None:
+            return self._stream(endpoint, stream, **kwargs)
+        flights = self.api.flights
+        if flights is None:
+            return self._wrap(self._get_json(endpoint, **kwargs))
+        return self._wrap(flights.do(self._flight_key(endpoint, kwargs), lambda: self._get_json(endpoint, **kwargs)))
+
+    def _stream_response(self, response, key, stream_class=ItemStream):
+        if response.status_code >= 400:
+            raise SupportBeeError(response)
+        return stream_class(response, key, wrap=RESPONSE_MODELS.get(key) if self.api.models else None)
+
+    def _stream(self, endpoint, key, **kwargs):
+        return self._stream_response(self._request("GET", endpoint, stream=True, **kwargs), key)
+
+    def _get_json(self, endpoint, **kwargs):
+        key = self._cache_key(endpoint, kwargs)
+        if key is None:
+            return self._json(self._request("GET", endpoint, **kwargs))
+
+        from .cache import MISS  # Only reached with a ResponseCache, which already loaded the module
+        value, validators = self.api.cache.lookup(key)
+        if value is MISS:
+            response = self._request("GET", endpoint, extra_headers=validators, cache_status="miss", **kwargs)
+            value = self._cache_store(endpoint, key, response)
+            if value is MISS:
+                value = self._cache_store(endpoint, key, self._request("GET", endpoint, cache_status="miss", **kwargs))
+        elif self.api.hooks:
+            self.api.hooks.cache_hit("GET", template_of(endpoint))
+        return value
+
+    # POSTs are only retried when flagged idempotent (state toggles) or when the caller opts in
+    def _post(self, endpoint, data=None, files=None, idempotent=False, **kwargs):
+        return self._wrap(self._json_or_text(self._request("POST", endpoint, data=data, files=files,
+                                                           idempotent=idempotent, **kwargs)))
+
     def _put(self, endpoint, data=None, **kwargs):
-        url = self._prepare_url(endpoint, **kwargs)
-        return requests.put(url, headers=self.default_headers, json=data).json()
+        return self._wrap(self._json_or_text(self._request("PUT", endpoint, data=data, **kwargs)))
 
     def _delete(self, endpoint, **kwargs):
-        url = self._prepare_url(endpoint, **kwargs)
-        return requests.delete(url, headers=self.default_headers).json()
+        return self._json_or_text(self._request("DELETE", endpoint, **kwargs))
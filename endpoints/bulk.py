@@ -0,0 +1,211 @@
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Operations writing the same piece of ticket state: only the last one queued for a ticket is sent
+SLOTS = {
+    "archive":          "archive",
+    "unarchive":        "archive",
+    "markAsAnswered":   "answered",
+    "markAsUnanswered": "answered",
+    "assignUser":       "user_assignment",
+    "unassignUser":     "user_assignment",
+    "assignTeam":       "team_assignment",
+    "unassignTeam":     "team_assignment",
+    "star":             "star",
+    "unstar":           "star",
+    "markAsSpam":       "spam",
+    "unspam":           "spam",
+    "markAsTrash":      "trash",
+    "untrash":          "trash",
+    "delete":           "delete",
+    "addLabel":         "label",
+    "removeLabel":      "label",
+}
+
+LABEL_OPERATIONS = ("addLabel", "removeLabel")
+
+
+# Operations of one ticket run one after another in the order they were queued, so a delete never overtakes an
+# earlier archive or label change. Different tickets run concurrently.
+def ticket_queues(operations):
+    queues = collections.OrderedDict()
+    for index, operation in enumerate(operations):
+        queues.setdefault(operation[1], []).append((index, operation))
+    return list(queues.values())
+
+
+# =======================================================
+# Bulk results
+# =======================================================
+class BulkResult:
+    def __init__(self, operation, ticket_id, args, response=None, error=None):
+        self.operation = operation
+        self.ticket_id = ticket_id
+        self.args = args
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return "<BulkResult {operation}({ticket_id}) {status}>".format(
+            operation=self.operation, ticket_id=self.ticket_id, status="ok" if self.ok else repr(self.error))
+
+
+class BulkReport:
+    def __init__(self, results, deduplicated=0):
+        self.results = results
+        self.deduplicated = deduplicated
+
+    @property
+    def succeeded(self):
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self):
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def ok(self):
+        return all(result.ok for result in self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __repr__(self):
+        return "<BulkReport {ok} ok, {failed} failed, {dedup} deduplicated>".format(
+            ok=len(self.succeeded), failed=len(self.failed), dedup=self.deduplicated)
+
+
+# =======================================================
+# BulkOperations - Queue ticket operations, then run them concurrently
+# =======================================================
+class BulkOperations:
+    def __init__(self, tickets, labels, max_workers: int = 8):
+        self.tickets = tickets
+        self.labels = labels
+        self.max_workers = max_workers
+        self._operations = collections.OrderedDict()  # (slot, ticket_id) -> (operation, ticket_id, args)
+        self._deduplicated = 0
+
+    def _queue(self, operation, ticket_ids, *args):
+        for ticket_id in ticket_ids:
+            slot = (SLOTS[operation], args[0]) if operation in LABEL_OPERATIONS else SLOTS[operation]
+            key = (slot, ticket_id)
+            if key in self._operations:
+                self._deduplicated += 1
+                del self._operations[key]
+            self._operations[key] = (operation, ticket_id, args)
+        return self
+
+    def archive(self, ticket_ids):
+        return self._queue("archive", ticket_ids)
+
+    def unarchive(self, ticket_ids):
+        return self._queue("unarchive", ticket_ids)
+
+    def markAsAnswered(self, ticket_ids):
+        return self._queue("markAsAnswered", ticket_ids)
+
+    def markAsUnanswered(self, ticket_ids):
+        return self._queue("markAsUnanswered", ticket_ids)
+
+    def assignUser(self, ticket_ids, user_id: int):
+        return self._queue("assignUser", ticket_ids, user_id)
+
+    def unassignUser(self, ticket_ids):
+        return self._queue("unassignUser", ticket_ids)
+
+    def assignTeam(self, ticket_ids, team_id: int):
+        return self._queue("assignTeam", ticket_ids, team_id)
+
+    def unassignTeam(self, ticket_ids):
+        return self._queue("unassignTeam", ticket_ids)
+
+    def star(self, ticket_ids):
+        return self._queue("star", ticket_ids)
+
+    def unstar(self, ticket_ids):
+        return self._queue("unstar", ticket_ids)
+
+    def markAsSpam(self, ticket_ids):
+        return self._queue("markAsSpam", ticket_ids)
+
+    def unspam(self, ticket_ids):
+        return self._queue("unspam", ticket_ids)
+
+    def markAsTrash(self, ticket_ids):
+        return self._queue("markAsTrash", ticket_ids)
+
+    def untrash(self, ticket_ids):
+        return self._queue("untrash", ticket_ids)
+
+    def delete(self, ticket_ids):
+        return self._queue("delete", ticket_ids)
+
+    def addLabel(self, ticket_ids, label_name: str):
+        return self._queue("addLabel", ticket_ids, label_name)
+
+    def removeLabel(self, ticket_ids, label_name: str):
+        return self._queue("removeLabel", ticket_ids, label_name)
+
+    def __len__(self):
+        return len(self._operations)
+
+    def _method(self, operation):
+        resource = self.labels if operation in LABEL_OPERATIONS else self.tickets
+        return getattr(resource, operation)
+
+    def _call(self, operation, ticket_id, args):
+        try:
+            return BulkResult(operation, ticket_id, args, response=self._method(operation)(ticket_id, *args))
+        except Exception as error:
+            return BulkResult(operation, ticket_id, args, error=error)
+
+    def _take(self):
+        operations, deduplicated = list(self._operations.values()), self._deduplicated
+        self._operations.clear()
+        self._deduplicated = 0
+        return operations, deduplicated
+
+    # Sends every queued operation, never stopping at the first failure. Results are in queue order.
+    def run(self):
+        operations, deduplicated = self._take()
+        results = [None] * len(operations)
+
+        def run_queue(queue):
+            for index, operation in queue:
+                results[index] = self._call(*operation)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(run_queue, ticket_queues(operations)))
+        return BulkReport(results, deduplicated)
+
+
+class AsyncBulkOperations(BulkOperations):
+    async def _call(self, operation, ticket_id, args, semaphore):
+        async with semaphore:
+            try:
+                response = await self._method(operation)(ticket_id, *args)
+                return BulkResult(operation, ticket_id, args, response=response)
+            except Exception as error:
+                return BulkResult(operation, ticket_id, args, error=error)
+
+    async def run(self):
+        operations, deduplicated = self._take()
+        import asyncio  # Loaded by async callers only
+        semaphore = asyncio.Semaphore(self.max_workers)
+        results = [None] * len(operations)
+
+        async def run_queue(queue):
+            for index, operation in queue:
+                results[index] = await self._call(*operation, semaphore)
+
+        await asyncio.gather(*[run_queue(queue) for queue in ticket_queues(operations)])
+        return BulkReport(results, deduplicated)
@@ -0,0 +1,203 @@
+import collections
+import hashlib
+import json
+import threading
+import time
+
+from .urls import encode_query
+
+
+# Reference data that changes a few times a day: endpoint -> seconds
+REFERENCE_TTLS = {
+    "/labels":   300,
+    "/teams":    300,
+    "/users":    300,
+    "/snippets": 300,
+    "/emails":   300,
+}
+
+MISS = object()
+
+
+def collection_of(endpoint):
+    # "/snippets/12" -> "/snippets", writes invalidate everything cached under it
+    return "/" + endpoint.strip("/").split("/", 1)[0]
+
+
+# =======================================================
+# Backends - Store entries ({"value": ..., "expires": ..., "etag": ...}) by key
+# =======================================================
+class MemoryCacheBackend:
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()  # key -> (collection, entry)
+
+    def get(self, key):
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        self._entries.move_to_end(key)
+        return item[1]
+
+    def set(self, key, collection, entry):
+        self._entries[key] = (collection, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def delete_collection(self, collection):
+        for key in [key for key, item in self._entries.items() if item[0] == collection]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteCacheBackend:
+    def __init__(self, path: str, max_entries: int = 10000):
+        import sqlite3  # Only loaded when a sqlite backend is used
+        self.max_entries = max_entries
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries ("
+                         "key TEXT PRIMARY KEY, collection TEXT, entry TEXT, accessed REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_collection ON entries (collection)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def get(self, key):
+        row = self._db.execute("SELECT entry FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def set(self, key, collection, entry):
+        self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                         (key, collection, json.dumps(entry), time.time()))
+        self._db.execute("DELETE FROM entries WHERE key IN ("
+                         "SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def delete(self, key):
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def delete_collection(self, collection):
+        self._db.execute("DELETE FROM entries WHERE collection = ?", (collection,))
+
+    def clear(self):
+        self._db.execute("DELETE FROM entries")
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+# =======================================================
+# ResponseCache - TTL + LRU cache of parsed GET responses
+# =======================================================
+# Cached values are shared between callers: treat them as read-only.
+# With `conditional`, responses carrying an ETag or Last-Modified are kept even for endpoints without a TTL,
+# and stale entries are revalidated (If-None-Match / If-Modified-Since) instead of downloaded again.
+class ResponseCache:
+    def __init__(self,
+                 ttls:        dict = None,  # Default = REFERENCE_TTLS
+                 max_entries: int  = 1024,
+                 conditional: bool = True,
+                 backend=None):             # Default = MemoryCacheBackend(max_entries)
+        self.ttls = dict(REFERENCE_TTLS if ttls is None else ttls)
+        self.conditional = conditional
+        self.backend = backend if backend is not None else MemoryCacheBackend(max_entries)
+        self._ttl_collections = {collection_of(endpoint) for endpoint in self.ttls}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.revalidated = 0
+        self.bytes_saved = 0
+        self.parse_time_saved = 0.0
+
+    def caches(self, endpoint):
+        return self.conditional or endpoint in self.ttls
+
+    @staticmethod
+    def key(namespace, endpoint, params):
+        # The namespace (client base url, auth token included) is hashed so it is never stored
+        digest = hashlib.sha1(namespace.encode()).hexdigest()[:12]
+        return digest + ":" + endpoint + "?" + encode_query(sorted(params.items()))[1:]
+
+    # Returns (value, conditional request headers): value is MISS unless the entry is fresh
+    def lookup(self, key):
+        with self._lock:
+            entry = self.backend.get(key)
+            if entry is not None and entry["expires"] >= time.time():
+                self.hits += 1
+                return entry["value"], None
+            self.misses += 1
+            if entry is None:
+                return MISS, None
+            validators = {}
+            if entry.get("etag"):
+                validators["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                validators["If-Modified-Since"] = entry["last_modified"]
+            return MISS, validators or None
+
+    def set(self, endpoint, key, value, headers=None, size=0, parse_time=0.0):
+        headers = headers or {}
+        entry = {
+            "value": value,
+            "expires": time.time() + self.ttls.get(endpoint, 0),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "size": size,
+            "parse_time": parse_time,
+        }
+        if endpoint not in self.ttls and not (entry["etag"] or entry["last_modified"]):
+            return  # Nothing to serve it again with
+        with self._lock:
+            self.backend.set(key, collection_of(endpoint), entry)
+
+    # The server answered 304 Not Modified: serve the stored value and start a new TTL period
+    def revalidate(self, endpoint, key):
+        with self._lock:
+            entry = self.backend.get(key)
+            if entry is None:
+                return MISS
+            entry["expires"] = time.time() + self.ttls.get(endpoint, 0)
+            self.backend.set(key, collection_of(endpoint), entry)
+            self.revalidated += 1
+            self.bytes_saved += entry.get("size", 0)
+            self.parse_time_saved += entry.get("parse_time", 0.0)
+            return entry["value"]
+
+    def invalidate(self, endpoint):
+        # Entries without a TTL are revalidated on every read, only TTL'd ones can serve stale data
+        collection = collection_of(endpoint)
+        if collection not in self._ttl_collections:
+            return
+        with self._lock:
+            self.invalidations += 1
+            self.backend.delete_collection(collection)
+
+    def clear(self):
+        with self._lock:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "revalidated": self.revalidated,
+                "bytes_saved": self.bytes_saved,
+                "parse_time_saved": self.parse_time_saved,
+                "entries": len(self.backend),
+            }
@@ -1,4 +1,8 @@
 from .base import Resource
+from .urls import Endpoint
+
+
+TICKET_COMMENTS = Endpoint("/tickets/{ticket_id}/comments")
 
 
 # =======================================================
@@ -6,14 +10,17 @@ from .base import Resource
 # =======================================================
 class Comments(Resource):
     def fetch(self,
-              ticket_id: int):
-        return self._get("/tickets/{ticket_id}/comments".format(ticket_id=ticket_id))
+              ticket_id: int,
+              stream:    bool = False):  # Iterate comments as they are decoded
+        return self._get(TICKET_COMMENTS.format(ticket_id=ticket_id),
+                         stream="comments" if stream else None)
 
     def create(self,
                ticket_id:       str,
                content:         str,
                attachment_ids:  list = None,
-               content_as_html: bool = False):
+               content_as_html: bool = False,
+               retry:           bool = False):  # Resend on transient errors, may create duplicates
         comment = {
             "content": {
                 "html" if content_as_html else "text": content,
@@ -21,6 +28,7 @@ class Comments(Resource):
         }
 
         if attachment_ids is not None:
-            comment["attachment_ids"] = ",".join(attachment_ids)
+            comment["attachment_ids"] = ",".join(map(str, attachment_ids))
 
-        self._post("/tickets/{ticket_id}/comments".format(ticket_id=ticket_id), data={"comment": comment})
+        return self._post(TICKET_COMMENTS.format(ticket_id=ticket_id), data={"comment": comment},
+                          idempotent=retry)
@@ -1,4 +1,9 @@
 from .base import Resource, UserRoles
+from .urls import Endpoint
+
+
+USER = Endpoint("/users/{user_id}")
+GROUP_MEMBERS = Endpoint("/users/{group_id}/members")
 
 
 # =======================================================
@@ -8,8 +13,7 @@ class CustomerGroups(Resource):
     def fetch(self,
               with_invited: bool = False,
               with_roles:   list = (UserRoles.ADMIN, UserRoles.AGENT, UserRoles.COLLABORATOR)):
-        roles = ",".join([role.value[0] for role in with_roles])
-        return self._get("/users", with_invited=with_invited, with_roles=roles, type="customer_group")
+        return self._get("/users", with_invited=with_invited, with_roles=with_roles, type="customer_group")
 
     def create(self,
                name:                             str,
@@ -59,11 +63,11 @@ class CustomerGroups(Resource):
         if len(customer_group.keys()) == 1:
             return  # No update called
 
-        return self._post("/users/{user_id}".format(user_id=group_id), data={"user": customer_group})
+        return self._post(USER.format(user_id=group_id), data={"user": customer_group})
 
     def fetchMembers(self,
                      group_id: int):
-        return self._get("/users/{group_id}/members".format(group_id=group_id))
+        return self._get(GROUP_MEMBERS.format(group_id=group_id))
 
     def addMember(self,
                   group_id: int,
@@ -71,4 +75,4 @@ class CustomerGroups(Resource):
         member = {
             "id": member_id
         }
-        return self._post("/users/{group_id}/members".format(group_id=group_id), data={"member": member})
+        return self._post(GROUP_MEMBERS.format(group_id=group_id), data={"member": member})
@@ -0,0 +1,257 @@
+import bisect
+import re
+import threading
+import time
+
+
+_TOKEN = re.compile(r"(auth_token=)[^&\s'\"]+")
+
+
+def redact(text):
+    return _TOKEN.sub(r"\1***", text)
+
+
+# =======================================================
+# RequestEvent - What the hooks receive
+# =======================================================
+# Never holds the request url or headers, so the auth token cannot leak into hook data.
+class RequestEvent:
+    __slots__ = ("method", "endpoint", "status", "latency", "bytes", "retries", "cache", "error")
+
+    def __init__(self, method: str, endpoint: str, cache: str = None):
+        self.method = method
+        self.endpoint = endpoint  # Template, e.g. /tickets/{ticket_id}/replies
+        self.status = None
+        self.latency = None       # Seconds, retries and throttling included
+        self.bytes = None         # Response body size, None when streamed without Content-Length
+        self.retries = 0
+        self.cache = cache        # None (not cacheable), "hit", "miss" or "revalidated"
+        self.error = None         # "<ExceptionType>: <message>" with the token redacted
+
+    def __repr__(self):
+        return "<RequestEvent {method} {endpoint} {status} {latency}>".format(
+            method=self.method, endpoint=self.endpoint, status=self.status, latency=self.latency)
+
+
+# =======================================================
+# Hooks - Dispatches events to the hook objects given to the client
+# =======================================================
+# A hook is any object with some of before_request(event), after_response(event) and on_error(event).
+# on_error is called for exceptions and for HTTP statuses >= 400.
+# An exception raised by a hook is logged (logger "SupportBee.hooks") and counted in `errors`, it never reaches
+# the API call nor stops the other hooks.
+# `endpoint` is the route template given by the resource (see endpoints.urls.template_of).
+class Hooks:
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self.errors = 0
+
+    def add(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def __bool__(self):
+        return bool(self.hooks)
+
+    def _dispatch(self, name, event):
+        for hook in self.hooks:
+            callback = getattr(hook, name, None)
+            if callback is None:
+                continue
+            try:
+                callback(event)
+            except Exception:
+                self.errors += 1
+                import logging  # Only loaded when a hook fails
+                logging.getLogger("SupportBee.hooks").exception("%s.%s failed for %r",
+                                                                type(hook).__name__, name, event)
+
+    def start(self, method, endpoint, cache=None):
+        event = RequestEvent(method, endpoint, cache)
+        self._dispatch("before_request", event)
+        return event
+
+    def finish(self, event, started, response=None, error=None, stream=False):
+        event.latency = time.perf_counter() - started
+        if error is not None:
+            event.error = redact("{type}: {error}".format(type=type(error).__name__, error=error))
+            self._dispatch("on_error", event)
+            return
+        event.status = response.status_code
+        if event.status == 304 and event.cache == "miss":
+            event.cache = "revalidated"
+        if not stream:
+            event.bytes = len(response.content)
+        elif response.headers.get("Content-Length") is not None:
+            event.bytes = int(response.headers["Content-Length"])
+        self._dispatch("after_response", event)
+        if event.status >= 400:
+            self._dispatch("on_error", event)
+
+    # Answered from the response cache, without any request
+    def cache_hit(self, method, endpoint):
+        event = RequestEvent(method, endpoint, "hit")
+        event.latency = 0.0
+        self._dispatch("after_response", event)
+
+
+# =======================================================
+# MetricsCollector - In-process counters and latency histograms per endpoint
+# =======================================================
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.statuses = {}
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # Last bucket: above the highest bound
+
+    # Upper bound of the bucket holding the q-th quantile (None above the highest bound)
+    def quantile(self, q):
+        rank = q * sum(self.latency_buckets)
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (None,), self.latency_buckets):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return None
+
+    def to_dict(self):
+        return {
+            "requests":     self.requests,
+            "errors":       self.errors,
+            "retries":      self.retries,
+            "bytes":        self.bytes,
+            "cache_hits":   self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "statuses":     dict(self.statuses),
+            "latency_avg":  self.latency_sum / self.requests if self.requests else None,
+            "latency_p50":  self.quantile(0.5),
+            "latency_p95":  self.quantile(0.95),
+            "latency_p99":  self.quantile(0.99),
+            "latency_buckets": dict(zip(LATENCY_BUCKETS + (float("inf"),), self.latency_buckets)),
+        }
+
+
+class MetricsCollector:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _metrics(self, event):
+        key = event.method + " " + event.endpoint
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            metrics = self._endpoints[key] = EndpointMetrics()
+        return metrics
+
+    def after_response(self, event):
+        with self._lock:
+            metrics = self._metrics(event)
+            if event.cache == "hit":
+                metrics.cache_hits += 1
+                return
+            if event.cache is not None:
+                metrics.cache_misses += 1
+            self._record(metrics, event)
+            metrics.statuses[event.status] = metrics.statuses.get(event.status, 0) + 1
+            metrics.bytes += event.bytes or 0
+
+    def on_error(self, event):
+        with self._lock:
+            metrics = self._metrics(event)
+            metrics.errors += 1
+            if event.status is None:
+                self._record(metrics, event)  # Failed without a response
+
+    @staticmethod
+    def _record(metrics, event):
+        metrics.requests += 1
+        metrics.retries += event.retries
+        metrics.latency_sum += event.latency
+        metrics.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, event.latency)] += 1
+
+    # {"GET /tickets/{ticket_id}": {"requests": ..., "latency_p95": ..., ...}, ...}
+    def stats(self):
+        with self._lock:
+            return {key: metrics.to_dict() for key, metrics in self._endpoints.items()}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+# =======================================================
+# Exporters - Same events, recorded into Prometheus or OpenTelemetry
+# =======================================================
+class PrometheusHooks:
+    def __init__(self, registry=None, prefix: str = "supportbee"):
+        try:
+            import prometheus_client  # Optional, imported here to keep it out of the client's startup
+        except ImportError:
+            raise ImportError("PrometheusHooks needs the prometheus_client package") from None
+        kwargs = {"registry": registry} if registry is not None else {}
+        labels = ("method", "endpoint")
+        self.requests = prometheus_client.Counter(prefix + "_requests_total", "Requests sent",
+                                                  labels + ("status",), **kwargs)
+        self.errors = prometheus_client.Counter(prefix + "_errors_total", "Failed requests", labels, **kwargs)
+        self.retries = prometheus_client.Counter(prefix + "_retries_total", "Retried attempts", labels, **kwargs)
+        self.bytes = prometheus_client.Counter(prefix + "_response_bytes_total", "Response bytes", labels, **kwargs)
+        self.cache = prometheus_client.Counter(prefix + "_cache_total", "Cache lookups", labels + ("result",),
+                                               **kwargs)
+        self.latency = prometheus_client.Histogram(prefix + "_request_seconds", "Request latency", labels,
+                                                   buckets=LATENCY_BUCKETS, **kwargs)
+
+    def after_response(self, event):
+        if event.cache is not None:
+            self.cache.labels(event.method, event.endpoint, event.cache).inc()
+        if event.cache == "hit":
+            return
+        self.requests.labels(event.method, event.endpoint, str(event.status)).inc()
+        self.retries.labels(event.method, event.endpoint).inc(event.retries)
+        self.bytes.labels(event.method, event.endpoint).inc(event.bytes or 0)
+        self.latency.labels(event.method, event.endpoint).observe(event.latency)
+
+    def on_error(self, event):
+        self.errors.labels(event.method, event.endpoint).inc()
+        if event.status is None:
+            self.latency.labels(event.method, event.endpoint).observe(event.latency)
+
+
+class OpenTelemetryHooks:
+    def __init__(self, meter=None, prefix: str = "supportbee"):
+        try:
+            from opentelemetry import metrics as otel_metrics
+        except ImportError:
+            raise ImportError("OpenTelemetryHooks needs the opentelemetry-api package") from None
+        meter = meter if meter is not None else otel_metrics.get_meter("supportbee")
+        self.requests = meter.create_counter(prefix + ".requests", description="Requests sent")
+        self.errors = meter.create_counter(prefix + ".errors", description="Failed requests")
+        self.retries = meter.create_counter(prefix + ".retries", description="Retried attempts")
+        self.bytes = meter.create_counter(prefix + ".response_bytes", unit="By", description="Response bytes")
+        self.cache = meter.create_counter(prefix + ".cache", description="Cache lookups")
+        self.latency = meter.create_histogram(prefix + ".request_duration", unit="s", description="Request latency")
+
+    def after_response(self, event):
+        attributes = {"method": event.method, "endpoint": event.endpoint}
+        if event.cache is not None:
+            self.cache.add(1, dict(attributes, result=event.cache))
+        if event.cache == "hit":
+            return
+        self.requests.add(1, dict(attributes, status=event.status))
+        self.retries.add(event.retries, attributes)
+        self.bytes.add(event.bytes or 0, attributes)
+        self.latency.record(event.latency, attributes)
+
+    def on_error(self, event):
+        attributes = {"method": event.method, "endpoint": event.endpoint}
+        self.errors.add(1, attributes)
+        if event.status is None:
+            self.latency.record(event.latency, attributes)
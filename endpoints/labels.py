@@ -1,4 +1,8 @@
 from .base import Resource
+from .urls import Endpoint
+
+
+TICKET_LABEL = Endpoint("/tickets/{ticket_id}/labels/{label_name}")
 
 
 # =======================================================
@@ -20,10 +24,9 @@ class Labels(Resource):
     def addLabel(self,
                  ticket_id: str,
                  label_name: str):
-        return self._post("/tickets/{ticket_id}/labels/{label_name}".format(ticket_id=ticket_id, label_name=label_name))
+        return self._post(TICKET_LABEL.format(ticket_id=ticket_id, label_name=label_name), idempotent=True)
 
     def removeLabel(self,
                     ticket_id: str,
                     label_name: str):
-        return self._delete("/tickets/{ticket_id}/labels/{label_name}".format(ticket_id=ticket_id,
-                                                                              label_name=label_name))
+        return self._delete(TICKET_LABEL.format(ticket_id=ticket_id, label_name=label_name))
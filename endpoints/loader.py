@@ -0,0 +1,217 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+# A memoized future can be handed out again unless it was cancelled or failed
+def _usable(future):
+    return future is not None and not (future.done() and (future.cancelled() or future.exception() is not None))
+
+
+# =======================================================
+# BatchLoader - Collects scattered lookups by id and runs them together
+# =======================================================
+# loader.load(id) returns a Future right away. Ids requested within `window` seconds are gathered into one
+# batch (dispatched early once `max_batch` are pending), deduplicated, and fetched with `load_one` on up to
+# `max_workers` threads. The loader memoizes its results: create one per unit of work (a job, a request) and
+# drop it afterwards, or call clear(). Failed lookups, and futures cancelled by their caller, are forgotten so a
+# later load() tries again.
+# SupportBee has no multi-id endpoints: a batch is a concurrent fan-out of the single-id `get` calls.
+class BatchLoader:
+    def __init__(self,
+                 load_one,
+                 max_workers: int   = 8,
+                 window:      float = 0.005,  # Seconds to wait for more ids before sending a batch
+                 max_batch:   int   = 100):
+        self.load_one = load_one
+        self.max_workers = max_workers
+        self.window = window
+        self.max_batch = max_batch
+        self.requested = 0     # load() calls
+        self.deduplicated = 0  # load() calls answered from the memo or a pending lookup
+        self.batches = 0
+        self._futures = {}     # id -> Future
+        self._pending = []     # (id, Future) waiting for their batch
+        self._timer = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        with self._lock:
+            self.requested += 1
+            future = self._futures.get(key)
+            if _usable(future):
+                self.deduplicated += 1
+                return future
+            future = self._memoize(key, Future())
+            self._pending.append((key, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self.dispatch)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            self._run(batch)
+        return future
+
+    def load_many(self, keys):
+        return [self.load(key) for key in keys]
+
+    # Blocking helpers: loader.get(12) / loader.get_many([12, 13])
+    def get(self, key):
+        return self.load(key).result()
+
+    def get_many(self, keys):
+        return [future.result() for future in self.load_many(keys)]
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    # Sends the pending ids now instead of waiting for the window to end
+    def dispatch(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._run(batch)
+
+    def _run(self, batch):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            self.batches += 1
+        for key, future in batch:
+            self._executor.submit(self._resolve, key, future)
+
+    def _resolve(self, key, future):
+        if not future.set_running_or_notify_cancel():
+            return  # Cancelled while waiting for its batch
+        try:
+            value = self.load_one(key)
+        except Exception as error:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def _memoize(self, key, future):
+        self._futures[key] = future
+        future.add_done_callback(lambda future: self._forget(key, future))
+        return future
+
+    # Done callback: a failed or cancelled lookup leaves the memo
+    def _forget(self, key, future):
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+
+    def clear(self, key=None):
+        with self._lock:
+            if key is None:
+                self._futures = {key: future for key, future in self._futures.items() if not future.done()}
+            elif self._futures.get(key) is not None and self._futures[key].done():
+                del self._futures[key]
+
+    def prime(self, key, value):  # Seeds the memo, e.g. with tickets already fetched by a listing
+        with self._lock:
+            if key not in self._futures:
+                future = self._futures[key] = Future()
+                future.set_result(value)
+
+    def close(self):
+        self.dispatch()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Same for coroutines: load() returns an asyncio future, and the ids requested during one event loop
+# iteration form a batch. `load_one` returns an awaitable.
+class AsyncBatchLoader(BatchLoader):
+    def __init__(self, load_one, max_workers: int = 8, window: float = 0.0, max_batch: int = 100):
+        super().__init__(load_one, max_workers=max_workers, window=window, max_batch=max_batch)
+        self._semaphore = None
+        self._tasks = set()  # The loop only keeps weak references to tasks
+
+    def load(self, key):
+        import asyncio
+        self.requested += 1
+        future = self._futures.get(key)
+        if _usable(future):
+            self.deduplicated += 1
+            return future
+        loop = asyncio.get_running_loop()
+        future = self._memoize(key, loop.create_future())
+        self._pending.append((key, future))
+        if len(self._pending) >= self.max_batch:
+            self.dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.dispatch) if self.window else \
+                loop.call_soon(self.dispatch)
+        return future
+
+    async def get(self, key):
+        return await self.load(key)
+
+    async def get_many(self, keys):
+        import asyncio
+        return list(await asyncio.gather(*self.load_many(keys)))
+
+    def dispatch(self):
+        import asyncio
+        batch = self._take()
+        if not batch:
+            return
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        self.batches += 1
+        for key, future in batch:
+            task = asyncio.ensure_future(self._resolve(key, future))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, key, future):
+        import asyncio
+        async with self._semaphore:
+            if future.cancelled():
+                return  # Given up by its caller while waiting for a slot
+            try:
+                value = await self.load_one(key)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+                return
+        if not future.done():
+            future.set_result(value)
+
+    def prime(self, key, value):
+        import asyncio
+        if key not in self._futures:
+            future = self._futures[key] = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+
+    async def close(self):
+        import asyncio
+        self.dispatch()
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,205 @@
+import sys
+
+
+def _raw(value):
+    if isinstance(value, Model):
+        return value.to_dict()
+    if type(value) is tuple:
+        return [_raw(item) for item in value]
+    return value
+
+
+def _nested_property(key, model):
+    slot = "_" + key
+
+    # Nested payloads are kept as received and only decoded the first time they are read
+    def getter(self):
+        value = getattr(self, slot)
+        if type(value) is dict:
+            value = model(value)
+            setattr(self, slot, value)
+        elif type(value) is list:
+            value = tuple(model(item) if type(item) is dict else item for item in value)
+            setattr(self, slot, value)
+        return value
+    return property(getter)
+
+
+# =======================================================
+# Model - Compact, read-only view of an API object
+# =======================================================
+# Subclasses list their scalar `fields`, the `nested` objects decoded on first access and the
+# `interned` fields whose strings repeat across objects (emails, label names, ...).
+# Keys the model does not know about are kept in `_extra`, so no data is lost.
+# Dict style access (ticket["subject"], .get(), .items(), .to_dict(), `in`, len()) returns the raw API
+# representation and behaves like the decoded dict did: keys sent as null are present, keys not sent are not.
+class Model:
+    __slots__ = ("_extra", "_absent")
+    fields = ()
+    nested = {}
+    interned = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.fields)
+        cls._interned_set = frozenset(cls.interned)
+        cls._declared = cls.fields + tuple(cls.nested)
+        cls._declared_set = frozenset(cls._declared)
+        cls._absent_shapes = {}
+        for key, model in cls.nested.items():
+            setattr(cls, key, _nested_property(key, model))
+
+    def __init__(self, data: dict):
+        for key in self.fields:
+            setattr(self, key, None)
+        for key in self.nested:
+            setattr(self, "_" + key, None)
+        extra = None
+        for key, value in data.items():
+            if key in self._field_set:
+                if key in self._interned_set and type(value) is str:
+                    value = sys.intern(value)
+                elif type(value) is list and not value:
+                    value = ()  # Shared empty tuple instead of one empty list per object (cc, bcc, ...)
+                setattr(self, key, value)
+            elif key in self.nested:
+                setattr(self, "_" + key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._extra = extra
+        # Declared keys the payload did not have: None when it had them all, otherwise one frozenset shared by
+        # every payload of the same shape
+        if len(data) - (len(extra) if extra is not None else 0) == len(self._declared):
+            self._absent = None
+        else:
+            absent = self._declared_set.difference(data)
+            self._absent = self._absent_shapes.setdefault(absent, absent)
+
+    def keys(self):
+        absent = self._absent or ()
+        keys = [key for key in self._declared if key not in absent]
+        if self._extra is not None:
+            keys += list(self._extra)
+        return keys
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._declared) - len(self._absent or ()) + len(self._extra or ())
+
+    def __getitem__(self, key):
+        if key in self._field_set and (self._absent is None or key not in self._absent):
+            return _raw(getattr(self, key))
+        if key in self.nested and (self._absent is None or key not in self._absent):
+            return _raw(getattr(self, "_" + key))
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def to_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self):
+        return "<{name} {id}>".format(name=type(self).__name__, id=getattr(self, "id", None))
+
+
+# =======================================================
+# Models
+# =======================================================
+class Content(Model):
+    fields = ("text", "html", "attachments")
+    __slots__ = fields
+
+
+class User(Model):
+    fields = ("id", "email", "name", "first_name", "last_name", "role", "type", "agent", "picture")
+    interned = ("email", "name", "first_name", "last_name", "role", "type")
+    __slots__ = fields
+
+
+class Label(Model):
+    fields = ("id", "name", "color", "label_type", "ticket_count")
+    interned = ("name", "color", "label_type")
+    __slots__ = fields
+
+
+class Team(Model):
+    fields = ("id", "name", "description")
+    nested = {"users": User}
+    interned = ("name",)
+    __slots__ = fields + tuple("_" + key for key in nested)
+
+
+class Snippet(Model):
+    fields = ("id", "name", "tags")
+    nested = {"content": Content}
+    interned = ("name",)
+    __slots__ = fields + tuple("_" + key for key in nested)
+
+
+class Reply(Model):
+    fields = ("id", "created_at", "summary")
+    nested = {"replier": User, "content": Content}
+    __slots__ = fields + tuple("_" + key for key in nested)
+
+
+class Comment(Model):
+    fields = ("id", "created_at")
+    nested = {"commenter": User, "content": Content}
+    __slots__ = fields + tuple("_" + key for key in nested)
+
+
+class Ticket(Model):
+    fields = ("id", "subject", "summary", "replies_count", "comments_count", "created_at", "last_activity_at",
+              "starred", "unanswered", "archived", "spam", "trash", "cc", "bcc",
+              "current_user_assignee", "current_team_assignee")
+    nested = {"requester": User, "labels": Label, "content": Content, "replies": Reply, "comments": Comment}
+    __slots__ = fields + tuple("_" + key for key in nested)
+
+
+# Response keys converted by wrap_response
+RESPONSE_MODELS = {
+    "ticket":   Ticket,  "tickets":  Ticket,
+    "reply":    Reply,   "replies":  Reply,
+    "comment":  Comment, "comments": Comment,
+    "user":     User,    "users":    User,
+    "label":    Label,   "labels":   Label,
+    "team":     Team,    "teams":    Team,
+    "snippet":  Snippet, "snippets": Snippet,
+}
+
+
+def wrap_response(payload):
+    if type(payload) is not dict:
+        return payload
+    wrapped = {}
+    for key, value in payload.items():
+        model = RESPONSE_MODELS.get(key)
+        if model is not None and type(value) is dict:
+            value = model(value)
+        elif model is not None and type(value) is list:
+            value = [model(item) for item in value]
+        wrapped[key] = value
+    return wrapped
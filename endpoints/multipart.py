@@ -0,0 +1,90 @@
+import io
+import mimetypes
+import os
+import uuid
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+# =======================================================
+# MultipartStream - multipart/form-data body produced chunk by chunk
+# =======================================================
+# `source` may be bytes, a path, a binary file object or an iterable of bytes chunks. Only one chunk is held
+# in memory at a time. Paths, bytes and seekable files can be sent again (throttled or retried requests),
+# plain iterators only once.
+class MultipartStream:
+    def __init__(self,
+                 field:        str,
+                 filename:     str,
+                 source,
+                 content_type: str = None,
+                 chunk_size:   int = CHUNK_SIZE):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        self._head = ('--{boundary}\r\n'
+                      'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                      'Content-Type: {content_type}\r\n\r\n').format(boundary=self.boundary,
+                                                                     field=field,
+                                                                     filename=filename.replace('"', "%22"),
+                                                                     content_type=content_type).encode()
+        self._tail = "\r\n--{boundary}--\r\n".format(boundary=self.boundary).encode()
+
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        self._source = source
+        self._start = None
+        self._sent = False
+
+        size = self._source_size()
+        self.len = None if size is None else len(self._head) + size + len(self._tail)
+
+    def _source_size(self):
+        source = self._source
+        if isinstance(source, (str, os.PathLike)):
+            return os.path.getsize(source)
+        if hasattr(source, "seek") and hasattr(source, "tell") and getattr(source, "seekable", lambda: True)():
+            self._start = source.tell()
+            size = source.seek(0, io.SEEK_END) - self._start
+            source.seek(self._start)
+            return size
+        return None
+
+    @property
+    def headers(self):
+        headers = {"Content-Type": "multipart/form-data; boundary=" + self.boundary}
+        if self.len is not None:
+            headers["Content-Length"] = str(self.len)
+        return headers
+
+    def _chunks(self):
+        source = self._source
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                yield from iter(lambda: f.read(self.chunk_size), b"")
+        elif hasattr(source, "read"):
+            if self._start is not None:
+                source.seek(self._start)
+            elif self._sent:
+                raise ValueError("The upload source cannot be rewound to send it again")
+            yield from iter(lambda: source.read(self.chunk_size), b"")
+        else:
+            if self._sent:
+                raise ValueError("The upload source cannot be rewound to send it again")
+            yield from source
+
+    def __iter__(self):
+        yield self._head
+        for chunk in self._chunks():
+            self._sent = True
+            yield chunk
+        self._sent = True
+        yield self._tail
+
+    async def _aiter(self):
+        for chunk in self:
+            yield chunk
+
+    def __aiter__(self):
+        return self._aiter()
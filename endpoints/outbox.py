@@ -0,0 +1,306 @@
+import datetime
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from .base import SupportBeeError
+from .comments import Comments
+from .models import Model
+from .ratelimit import RateLimiter
+from .replies import Replies
+from .retry import RetryPolicy
+
+
+QUEUED, SENDING, DELIVERED, FAILED = "queued", "sending", "delivered", "failed"
+STATES = (QUEUED, SENDING, DELIVERED, FAILED)
+
+KINDS = ("reply", "comment")
+
+VERIFY_SKEW = 120  # Seconds of clock difference tolerated when looking for a message sent before a crash
+
+
+def _plain(value):
+    return value.to_dict() if isinstance(value, Model) else value
+
+
+def _timestamp(value):
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+# 4xx answers will not change on a resend, everything else (5xx, timeouts, dropped connections) may
+def _permanent(error):
+    return isinstance(error, SupportBeeError) and 400 <= error.status_code < 500
+
+
+# =======================================================
+# DeliveryStatus - Where one queued message stands
+# =======================================================
+class DeliveryStatus:
+    __slots__ = ("key", "kind", "ticket_id", "state", "attempts", "error", "message_id", "created_at", "updated_at")
+
+    def __init__(self, key, kind, ticket_id, state, attempts, error, message_id, created_at, updated_at):
+        self.key = key
+        self.kind = kind
+        self.ticket_id = ticket_id
+        self.state = state            # queued, sending, delivered or failed
+        self.attempts = attempts
+        self.error = error            # Last error, kept while the message is retried
+        self.message_id = message_id  # Id of the created reply/comment once delivered
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @property
+    def done(self):
+        return self.state in (DELIVERED, FAILED)
+
+    def __repr__(self):
+        return "<DeliveryStatus {key} {kind} ticket={ticket_id} {state} attempts={attempts}>".format(
+            key=self.key, kind=self.kind, ticket_id=self.ticket_id, state=self.state, attempts=self.attempts)
+
+
+# =======================================================
+# Outbox - Durable queue of replies and comments to send
+# =======================================================
+# Messages are written to a sqlite spool before reply()/comment() return, and sent by background workers
+# (with a rate limit of their own on top of the client's). Messages of one ticket go out in the order they
+# were queued. Queued messages survive restarts: a new Outbox on the same spool file picks them up. The spool
+# has no default location; ":memory:" is accepted for tests but is not durable, its messages die with the process.
+#
+# Every message has an idempotency key (generated, or given by the caller, e.g. "welcome-mail:<ticket id>").
+# Queueing a key again returns the existing message instead of adding one, and a delivered message is never
+# sent again. SupportBee has no idempotency header, so when a send ends without a clear answer (timeout, 5xx,
+# process killed mid-request) the ticket's replies/comments are checked for the message before it is resent.
+#
+# When `max_pending` messages are waiting, reply()/comment() block until workers catch up (backpressure),
+# or raise queue.Full after `timeout` seconds.
+class Outbox:
+    def __init__(self,
+                 api,
+                 path:         str,                 # Spool file, e.g. "outbox.db"; ":memory:" is not durable
+                 max_workers:  int   = 4,
+                 max_pending:  int   = 1000,
+                 rate:         float = None,        # Messages per second, None = only the client's limits
+                 max_attempts: int   = 5,
+                 backoff:      float = 2.0,         # First delay between attempts, doubled on every attempt
+                 on_done=None):                     # Called with the DeliveryStatus of delivered/failed messages
+        self.api = api
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.rate_limiter = RateLimiter(rate=rate) if rate is not None else None
+        self.retry_policy = RetryPolicy(max_attempts=max_attempts, backoff=backoff, max_backoff=300.0)
+        self.on_done = on_done
+        self._resources = {"reply": Replies(api, raise_errors=True), "comment": Comments(api, raise_errors=True)}
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # Signalled on new messages and freed slots
+        self._workers = []
+        self._stopping = False  # Workers exit once nothing is pending
+        self._abandon = False   # Workers exit after their current message
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS outbox ("
+                             "seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE, kind TEXT, ticket_id INTEGER, "
+                             "arguments TEXT, state TEXT, attempts INTEGER, next_attempt REAL, uncertain INTEGER, "
+                             "error TEXT, message_id INTEGER, created_at REAL, updated_at REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, next_attempt)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS outbox_ticket ON outbox (ticket_id, state)")
+            # Sends cut short by the previous process may or may not have reached SupportBee
+            self._db.execute("UPDATE outbox SET state = ?, uncertain = 1 WHERE state = ?", (QUEUED, SENDING))
+
+    # =======================================================
+    # Queueing
+    # =======================================================
+    # Same arguments as Replies.create, returns the idempotency key
+    def reply(self, ticket_id: int, content: str, key: str = None, timeout: float = None, **kwargs):
+        return self.enqueue("reply", ticket_id, content, key=key, timeout=timeout, **kwargs)
+
+    # Same arguments as Comments.create, returns the idempotency key
+    def comment(self, ticket_id: int, content: str, key: str = None, timeout: float = None, **kwargs):
+        return self.enqueue("comment", ticket_id, content, key=key, timeout=timeout, **kwargs)
+
+    def enqueue(self, kind, ticket_id, content, key=None, timeout=None, **kwargs):
+        if kind not in KINDS:
+            raise ValueError("kind must be one of " + ", ".join(KINDS))
+        kwargs.pop("retry", None)  # Resends are the outbox's job
+        key = key or uuid.uuid4().hex
+        arguments = json.dumps(dict(kwargs, content=content))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            if self._exists(key):
+                return key
+            while self._pending() >= self.max_pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Full("Outbox has {count} messages waiting".format(count=self.max_pending))
+                self._changed.wait(remaining)
+            now = time.time()
+            with self._db:
+                self._db.execute("INSERT INTO outbox (key, kind, ticket_id, arguments, state, attempts, next_attempt, "
+                                 "uncertain, created_at, updated_at) VALUES (?, ?, ?, ?, ?, 0, 0, 0, ?, ?)",
+                                 (key, kind, ticket_id, arguments, QUEUED, now, now))
+            self._changed.notify_all()
+        return key
+
+    def _exists(self, key):
+        return self._db.execute("SELECT 1 FROM outbox WHERE key = ?", (key,)).fetchone() is not None
+
+    def _pending(self):
+        return self._db.execute("SELECT COUNT(*) FROM outbox WHERE state IN (?, ?)", (QUEUED, SENDING)).fetchone()[0]
+
+    # =======================================================
+    # Status
+    # =======================================================
+    _COLUMNS = "key, kind, ticket_id, state, attempts, error, message_id, created_at, updated_at"
+
+    def status(self, key: str):
+        with self._lock:
+            row = self._db.execute("SELECT " + self._COLUMNS + " FROM outbox WHERE key = ?", (key,)).fetchone()
+        return DeliveryStatus(*row) if row is not None else None
+
+    def statuses(self, state: str = None):
+        query, params = "SELECT " + self._COLUMNS + " FROM outbox", ()
+        if state is not None:
+            query, params = query + " WHERE state = ?", (state,)
+        with self._lock:
+            return [DeliveryStatus(*row) for row in self._db.execute(query + " ORDER BY seq", params).fetchall()]
+
+    def counts(self):
+        with self._lock:
+            counts = dict(self._db.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall())
+        return {state: counts.get(state, 0) for state in STATES}
+
+    # Removes delivered and failed messages older than `age` seconds; their keys can be queued again afterwards
+    def purge(self, age: float = 7 * 24 * 3600):
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM outbox WHERE state IN (?, ?) AND updated_at < ?",
+                                    (DELIVERED, FAILED, time.time() - age)).rowcount
+
+    # =======================================================
+    # Workers
+    # =======================================================
+    def start(self):
+        with self._lock:
+            if self._workers:
+                return self
+            self._stopping = self._abandon = False
+            for _ in range(self.max_workers):
+                worker = threading.Thread(target=self._work, daemon=True)
+                self._workers.append(worker)
+                worker.start()
+        return self
+
+    # Oldest due message whose ticket has no earlier message still waiting or being sent
+    def _claim(self):
+        row = self._db.execute(
+            "SELECT seq, key, kind, ticket_id, arguments, attempts, uncertain, created_at FROM outbox AS message "
+            "WHERE state = ? AND next_attempt <= ? AND NOT EXISTS (SELECT 1 FROM outbox AS earlier "
+            "WHERE earlier.ticket_id = message.ticket_id AND earlier.seq < message.seq AND earlier.state IN (?, ?)) "
+            "ORDER BY seq LIMIT 1", (QUEUED, time.time(), QUEUED, SENDING)).fetchone()
+        if row is not None:
+            with self._db:
+                self._db.execute("UPDATE outbox SET state = ?, attempts = attempts + 1, updated_at = ? WHERE seq = ?",
+                                 (SENDING, time.time(), row[0]))
+        return row
+
+    def _next_due(self):
+        row = self._db.execute("SELECT MIN(next_attempt) FROM outbox WHERE state = ?", (QUEUED,)).fetchone()
+        return row[0]
+
+    def _work(self):
+        while True:
+            with self._changed:
+                while True:
+                    if self._abandon:
+                        return
+                    message = self._claim()
+                    if message is not None:
+                        break
+                    if self._stopping and self._pending() == 0:
+                        return
+                    due = self._next_due()
+                    self._changed.wait(1.0 if due is None else min(1.0, max(0.01, due - time.time())))
+            self._deliver(*message)
+
+    def _deliver(self, seq, key, kind, ticket_id, arguments, attempts, uncertain, created_at):
+        message_id = error = None
+        try:
+            if uncertain:
+                message_id = self._find_sent(kind, ticket_id, json.loads(arguments)["content"], created_at)
+            if message_id is None:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                message_id = self._send(kind, ticket_id, json.loads(arguments))
+        except Exception as error_:
+            error = error_
+        self._finish(seq, key, attempts + 1, message_id, error)
+
+    def _send(self, kind, ticket_id, arguments):
+        response = _plain(self._resources[kind].create(ticket_id, **arguments))
+        message = (response or {}).get(kind) if isinstance(response, dict) else None
+        return _plain(message or {}).get("id", 0)  # 0 = delivered, id unknown
+
+    # Id of a message of the ticket with the same content, created after it was queued
+    def _find_sent(self, kind, ticket_id, content, created_at):
+        listing = _plain(self._resources[kind].fetch(ticket_id)) or {}
+        for message in listing.get(kind + "s") or ():
+            message = _plain(message)
+            message_content = message.get("content") or {}
+            created = _timestamp(message.get("created_at"))
+            if content in (message_content.get("text"), message_content.get("html")) and \
+                    (created is None or created >= created_at - VERIFY_SKEW):
+                return message.get("id", 0)
+        return None
+
+    def _finish(self, seq, key, attempts, message_id, error):
+        now = time.time()
+        with self._changed:
+            with self._db:
+                if error is None:
+                    self._db.execute("UPDATE outbox SET state = ?, message_id = ?, error = NULL, uncertain = 0, "
+                                     "updated_at = ? WHERE seq = ?", (DELIVERED, message_id, now, seq))
+                else:
+                    delay = None if _permanent(error) else self.retry_policy.next_delay(attempts - 1, time.monotonic())
+                    self._db.execute("UPDATE outbox SET state = ?, next_attempt = ?, uncertain = ?, error = ?, "
+                                     "updated_at = ? WHERE seq = ?",
+                                     (FAILED if delay is None else QUEUED, now + (delay or 0),
+                                      0 if _permanent(error) else 1, repr(error), now, seq))
+            self._changed.notify_all()
+        if self.on_done is not None:
+            status = self.status(key)
+            if status.done:
+                self.on_done(status)
+
+    # Blocks until every queued message is delivered or failed (or `timeout` seconds passed)
+    def join(self, timeout: float = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while self._pending():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._changed.wait(remaining if remaining is not None else 1.0)
+        return True
+
+    # drain=True sends what is queued first; otherwise workers stop after their current message and the rest
+    # stays in the spool for the next Outbox
+    def close(self, drain: bool = True):
+        with self._changed:
+            self._stopping = True
+            self._abandon = not drain
+            self._changed.notify_all()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        self._db.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
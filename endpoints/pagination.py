@@ -0,0 +1,163 @@
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def _has_next_page(result, count, page, per_page):
+    total_pages = result.get("total_pages")
+    if total_pages is not None:
+        return page < total_pages
+    return per_page is not None and count >= per_page
+
+
+# =======================================================
+# Streaming page iterators
+# =======================================================
+# Yields the items under `key` one page at a time. The next page is requested once the current one
+# is consumed, or while it is being consumed with `prefetch`, so at most two pages are held in memory.
+def iter_pages(fetch_page, key, page=1, per_page=None, prefetch=False):
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    pending = None
+    try:
+        result = fetch_page(page)
+        while True:
+            items = result.get(key) or []
+            has_next = bool(items) and _has_next_page(result, len(items), page, per_page)
+            result = None
+            if has_next and executor is not None:
+                pending = executor.submit(fetch_page, page + 1)
+
+            for item in items:
+                yield item
+            items = None
+
+            if not has_next:
+                return
+            page += 1
+            if pending is not None:
+                result, pending = pending.result(), None
+            else:
+                result = fetch_page(page)
+    finally:
+        if pending is not None:
+            pending.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+async def aiter_pages(fetch_page, key, page=1, per_page=None, prefetch=False):
+    import asyncio  # Loaded by async callers only, keeps it out of sync imports
+    pending = None
+    try:
+        result = await fetch_page(page)
+        while True:
+            items = result.get(key) or []
+            has_next = bool(items) and _has_next_page(result, len(items), page, per_page)
+            result = None
+            if has_next and prefetch:
+                pending = asyncio.ensure_future(fetch_page(page + 1))
+
+            for item in items:
+                yield item
+            items = None
+
+            if not has_next:
+                return
+            page += 1
+            if pending is not None:
+                result, pending = await pending, None
+            else:
+                result = await fetch_page(page)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+# Same as iter_pages for `stream_page(page)` returning an ItemStream: only one item is decoded at a time
+def iter_stream_pages(stream_page, page=1, per_page=None):
+    while True:
+        items = stream_page(page)
+        count = 0
+        for item in items:
+            count += 1
+            yield item
+        if not count or not _has_next_page(items.metadata, count, page, per_page):
+            return
+        page += 1
+
+
+async def aiter_stream_pages(stream_page, page=1, per_page=None):
+    while True:
+        items = await stream_page(page)
+        count = 0
+        async for item in items:
+            count += 1
+            yield item
+        if not count or not _has_next_page(items.metadata, count, page, per_page):
+            return
+        page += 1
+
+
+# =======================================================
+# Parallel page fan-out
+# =======================================================
+# Fetches every page of `pages` with up to `max_workers` requests in flight and yields (page, result).
+# With `ordered` the pages come out in the order of `pages`, otherwise as soon as they complete.
+# Only a window of 2 * max_workers pages is buffered at any time.
+def fan_out_pages(fetch_page, pages, max_workers=8, ordered=True):
+    pages = iter(pages)
+    window = max_workers * 2
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    in_flight = collections.OrderedDict()  # future -> page
+
+    def refill():
+        while len(in_flight) < window:
+            page = next(pages, None)
+            if page is None:
+                return
+            in_flight[executor.submit(fetch_page, page)] = page
+
+    try:
+        refill()
+        while in_flight:
+            if ordered:
+                done = [next(iter(in_flight))]
+            else:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = in_flight.pop(future)
+                yield page, future.result()
+            refill()
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+async def afan_out_pages(fetch_page, pages, max_workers=8, ordered=True):
+    import asyncio
+    pages = iter(pages)
+    window = max_workers * 2
+    in_flight = collections.OrderedDict()  # task -> page
+
+    def refill():
+        while len(in_flight) < window:
+            page = next(pages, None)
+            if page is None:
+                return
+            in_flight[asyncio.ensure_future(fetch_page(page))] = page
+
+    try:
+        refill()
+        while in_flight:
+            if ordered:
+                done = [next(iter(in_flight))]
+                await done[0]
+            else:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                page = in_flight.pop(task)
+                yield page, task.result()
+            refill()
+    finally:
+        for task in in_flight:
+            task.cancel()
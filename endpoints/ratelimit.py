@@ -0,0 +1,120 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+THROTTLE_STATUSES = (429, 503)
+# Refused before the request was processed, so even non-idempotent calls can be sent again. A 503 may come
+# from a gateway after the server acted on the request: only retryable calls are resent on it.
+REJECTED_STATUSES = (429,)
+
+
+def parse_retry_after(value):
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# =======================================================
+# RateLimiter - Token bucket shared by every request of a client
+# =======================================================
+class RateLimiter:
+    def __init__(self,
+                 rate:            float = None,  # Requests per second, None = unlimited
+                 burst:           int   = None,  # Default = max(1, rate)
+                 max_retries:     int   = 5,     # Resends of a throttled (429/503) request
+                 backoff:         float = 1.0,   # First wait when the server sends no Retry-After
+                 max_backoff:     float = 60.0,
+                 decrease_factor: float = 0.5,   # Rate multiplier applied on each throttled response
+                 min_rate:        float = 0.1):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate or 1))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.decrease_factor = decrease_factor
+        self.min_rate = min_rate
+
+        self._lock = threading.Lock()
+        self._current_rate = rate
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._consecutive_throttles = 0
+
+        self.requests = 0
+        self.throttled = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    # Reserves a slot and returns how long the caller has to wait before sending
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self.requests += 1
+            delay = max(0.0, self._blocked_until - now)
+            if self._current_rate is not None:
+                self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self._current_rate)
+                self._updated = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay = max(delay, -self._tokens / self._current_rate)
+            if delay > 0:
+                self.waits += 1
+                self.wait_time += delay
+            return delay
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        import asyncio  # Only async callers get here, sync clients never load it
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # Seconds the next request will wait for a Retry-After, before any token bucket delay
+    def pending_wait(self):
+        with self._lock:
+            return max(0.0, self._blocked_until - time.monotonic())
+
+    # Returns True when the response was throttled and the request should be sent again.
+    # `throttles` counts the earlier throttled resends of this request (error retries are counted apart).
+    def on_response(self, status, headers, throttles):
+        with self._lock:
+            if status not in THROTTLE_STATUSES:
+                self._consecutive_throttles = 0
+                if self._current_rate is not None and self._current_rate < self.rate:
+                    # Additive increase back towards the configured rate
+                    self._current_rate = min(self.rate, self._current_rate + self.rate * 0.05)
+                return False
+
+            self.throttled += 1
+            self._consecutive_throttles += 1
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = min(self.max_backoff, self.backoff * 2 ** (self._consecutive_throttles - 1))
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            if self._current_rate is not None:
+                self._current_rate = max(self.min_rate, self._current_rate * self.decrease_factor)
+                self._tokens = min(self._tokens, 0.0)
+            return throttles < self.max_retries
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "waits": self.waits,
+                "wait_time": self.wait_time,
+                "current_rate": self._current_rate,
+            }
@@ -1,4 +1,9 @@
 from .base import Resource
+from .urls import Endpoint
+
+
+TICKET_REPLIES = Endpoint("/tickets/{ticket_id}/replies")
+TICKET_REPLY = Endpoint("/tickets/{ticket_id}/replies/{reply_id}")
 
 
 # =======================================================
@@ -6,18 +11,21 @@ from .base import Resource
 # =======================================================
 class Replies(Resource):
     def fetch(self,
-              ticket_id: int):
-        return self._get("/tickets/{ticket_id}/replies".format(ticket_id=ticket_id))
+              ticket_id: int,
+              stream:    bool = False):  # Iterate replies as they are decoded
+        return self._get(TICKET_REPLIES.format(ticket_id=ticket_id),
+                         stream="replies" if stream else None)
 
     def create(self,
                ticket_id:          int,
                content:            str,
                cc:                 str  = None,
                bcc:                str  = None,
-               attachment_ids:     str  = None,
+               attachment_ids:     list = None,  # Or an already joined "id1,id2" string
                on_behalf_of_id:    str  = None,
                on_behalf_of_email: str  = None,
-               content_as_html:    bool = False):
+               content_as_html:    bool = False,
+               retry:              bool = False):  # Resend on transient errors, may create duplicates
         reply = {
             "content": {
                 "html" if content_as_html else "text": content,
@@ -29,6 +37,8 @@ class Replies(Resource):
         if bcc is not None:
             reply["bcc"] = bcc
         if attachment_ids is not None:
+            if not isinstance(attachment_ids, str):
+                attachment_ids = ",".join(map(str, attachment_ids))
             reply["content"]["attachment_ids"] = attachment_ids
 
         if on_behalf_of_id is not None:
@@ -36,9 +46,10 @@ class Replies(Resource):
         elif on_behalf_of_email is not None:
             reply["on_behalf_of"] = {"email": on_behalf_of_email}
 
-        return self._post("/tickets/{ticket_id}/replies".format(ticket_id=ticket_id), data={"reply": reply})
+        return self._post(TICKET_REPLIES.format(ticket_id=ticket_id), data={"reply": reply},
+                          idempotent=retry)
 
     def get(self,
             ticket_id: int,
             reply_id:  int):
-        return self._get("/tickets/{ticket_id}/replies/{reply_id}".format(ticket_id=ticket_id, reply_id=reply_id))
+        return self._get(TICKET_REPLY.format(ticket_id=ticket_id, reply_id=reply_id))
@@ -0,0 +1,233 @@
+import calendar
+import datetime
+import hashlib
+import importlib
+from enum import Enum
+
+from .cache import MemoryCacheBackend
+from .pagination import fan_out_pages, afan_out_pages
+
+
+# numpy and pandas are optional and slow to import: only loaded when a frame is converted
+def _optional(module):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        return None
+
+
+PERIODS = ("day", "week", "month")
+DIMENSIONS = ("user", "team", "label")
+
+
+def _date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value[:10])
+
+
+def _period_end(start, period):
+    if period == "day":
+        return start
+    if period == "week":
+        return start + datetime.timedelta(days=6 - start.weekday())  # Weeks end on Sunday
+    return start.replace(day=calendar.monthrange(start.year, start.month)[1])
+
+
+# Splits [since, until] into calendar periods; the first and last ones may be partial
+def split_range(since, until, period="week"):
+    if period not in PERIODS:
+        raise ValueError("period must be one of " + ", ".join(PERIODS))
+    start, until = _date(since), _date(until)
+    windows = []
+    while start <= until:
+        end = min(_period_end(start, period), until)
+        windows.append((start, end))
+        start = end + datetime.timedelta(days=1)
+    return windows
+
+
+# Accepts [[timestamp, value], ...] as well as [{"x"/"timestamp": ..., "y"/"value": ...}, ...]
+def data_points(payload):
+    for point in (payload or {}).get("data_points") or ():
+        if isinstance(point, dict):
+            yield point.get("x", point.get("timestamp")), point.get("y", point.get("value"))
+        else:
+            yield point[0], point[1]
+
+
+# =======================================================
+# ReportQuery - One cell of the matrix: a metric, for a dimension, over a window
+# =======================================================
+class ReportQuery:
+    __slots__ = ("data_points_type", "dimension", "dimension_id", "since", "until")
+
+    def __init__(self, data_points_type, dimension=None, dimension_id=None, since=None, until=None):
+        if dimension is not None and dimension not in DIMENSIONS:
+            raise ValueError("dimension must be one of " + ", ".join(DIMENSIONS))
+        self.data_points_type = data_points_type.value if isinstance(data_points_type, Enum) else data_points_type
+        self.dimension = dimension        # None = whole company
+        self.dimension_id = dimension_id
+        self.since = _date(since)
+        self.until = _date(until)
+
+    def params(self):
+        params = {"since": self.since.isoformat(), "until": self.until.isoformat()}
+        if self.dimension is not None:
+            params[self.dimension] = self.dimension_id
+        return params
+
+    def key(self, namespace):
+        return "{namespace}:/reports/{type}?{dimension}={id}&since={since}&until={until}".format(
+            namespace=namespace, type=self.data_points_type, dimension=self.dimension, id=self.dimension_id,
+            since=self.since.isoformat(), until=self.until.isoformat())
+
+    def __repr__(self):
+        return "<ReportQuery {type} {dimension}={id} {since}..{until}>".format(
+            type=self.data_points_type, dimension=self.dimension, id=self.dimension_id,
+            since=self.since, until=self.until)
+
+
+# =======================================================
+# ReportFrame - Columnar results, one row per data point
+# =======================================================
+class ReportFrame:
+    COLUMNS = ("data_points_type", "dimension", "dimension_id", "since", "until", "timestamp", "value")
+
+    def __init__(self, columns=None):
+        self.columns = columns if columns is not None else {name: [] for name in self.COLUMNS}
+
+    def append(self, query, payload):
+        points = list(data_points(payload)) or [(None, None)]  # Keep a row for windows without data
+        for timestamp, value in points:
+            self.columns["data_points_type"].append(query.data_points_type)
+            self.columns["dimension"].append(query.dimension)
+            self.columns["dimension_id"].append(query.dimension_id)
+            self.columns["since"].append(query.since.isoformat())
+            self.columns["until"].append(query.until.isoformat())
+            self.columns["timestamp"].append(timestamp)
+            self.columns["value"].append(value)
+
+    def __len__(self):
+        return len(self.columns["value"])
+
+    def rows(self):
+        return [dict(zip(self.COLUMNS, row)) for row in zip(*(self.columns[name] for name in self.COLUMNS))]
+
+    # Sums (or `function`s) the values grouped by the given columns: {(type, dimension_id): total, ...}
+    def aggregate(self, by=("data_points_type", "dimension", "dimension_id"), function=sum):
+        groups = {}
+        for row in zip(*(self.columns[name] for name in by), self.columns["value"]):
+            if row[-1] is not None:
+                groups.setdefault(row[:-1], []).append(row[-1])
+        return {group: function(values) for group, values in groups.items()}
+
+    def to_numpy(self):
+        numpy = _optional("numpy")
+        if numpy is None:
+            raise ImportError("ReportFrame.to_numpy needs numpy")
+        return {name: numpy.asarray(values) for name, values in self.columns.items()}
+
+    def to_pandas(self):
+        pandas = _optional("pandas")
+        if pandas is None:
+            raise ImportError("ReportFrame.to_pandas needs pandas")
+        return pandas.DataFrame(self.columns)
+
+    # A DataFrame when pandas is installed, NumPy arrays when only numpy is, the plain column lists otherwise
+    def to_native(self):
+        if _optional("pandas") is not None:
+            return self.to_pandas()
+        if _optional("numpy") is not None:
+            return self.to_numpy()
+        return self.columns
+
+
+# =======================================================
+# ReportsEngine - Fetches a matrix of reports concurrently
+# =======================================================
+# Windows that ended before today cannot change anymore: they are kept in `backend` without expiry
+# (use a SqliteCacheBackend to keep them across runs). Only the window containing today is fetched again.
+class ReportsEngine:
+    def __init__(self,
+                 reports,
+                 backend=None,          # Default = MemoryCacheBackend(100000)
+                 max_workers: int = 8):
+        self.reports = reports
+        self.backend = backend if backend is not None else MemoryCacheBackend(max_entries=100000)
+        self.max_workers = max_workers
+        self.namespace = hashlib.sha1(reports.api.BASE_URL.encode()).hexdigest()[:12]  # Never store the token
+        self.fetched = 0
+        self.cached = 0
+
+    @staticmethod
+    def matrix(data_points_types, since, until, period="week", users=(), teams=(), labels=()):
+        dimensions = [("user", user) for user in users] + [("team", team) for team in teams] + \
+                     [("label", label) for label in labels]
+        if not dimensions:
+            dimensions = [(None, None)]
+        return [ReportQuery(data_points_type, dimension, dimension_id, window_since, window_until)
+                for data_points_type in data_points_types
+                for dimension, dimension_id in dimensions
+                for window_since, window_until in split_range(since, until, period)]
+
+    # e.g. engine.fetch([DataPointType.TICKETS_COUNT], "2024-01-01", "2024-12-31", users=agent_ids)
+    def fetch(self,
+              data_points_types: list,
+              since,
+              until,
+              period: str  = "week",   # "day", "week" or "month"
+              users:  list = (),
+              teams:  list = (),
+              labels: list = ()):
+        return self.fetch_matrix(self.matrix(data_points_types, since, until, period, users, teams, labels))
+
+    def _plan(self, queries, today):
+        payloads, missing = {}, []
+        for index, query in enumerate(queries):
+            entry = self.backend.get(query.key(self.namespace)) if query.until < today else None
+            if entry is not None:
+                payloads[index] = entry["value"]
+            else:
+                missing.append(index)
+        self.cached += len(payloads)
+        self.fetched += len(missing)
+        return payloads, missing
+
+    def _store(self, query, payload, today):
+        if query.until < today:
+            self.backend.set(query.key(self.namespace), "/reports", {"value": payload})
+
+    def _fetch_query(self, query):
+        return self.reports.get(query.data_points_type, **query.params())
+
+    def _frame(self, queries, payloads):
+        frame = ReportFrame()
+        for index, query in enumerate(queries):
+            frame.append(query, payloads[index])
+        return frame
+
+    def fetch_matrix(self, queries):
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        payloads, missing = self._plan(queries, today)
+        for index, payload in fan_out_pages(lambda i: self._fetch_query(queries[i]), missing,
+                                            max_workers=self.max_workers, ordered=False):
+            self._store(queries[index], payload, today)
+            payloads[index] = payload
+        return self._frame(queries, payloads)
+
+
+class AsyncReportsEngine(ReportsEngine):
+    async def fetch(self, data_points_types, since, until, period="week", users=(), teams=(), labels=()):
+        return await self.fetch_matrix(self.matrix(data_points_types, since, until, period, users, teams, labels))
+
+    async def fetch_matrix(self, queries):
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        payloads, missing = self._plan(queries, today)
+        async for index, payload in afan_out_pages(lambda i: self._fetch_query(queries[i]), missing,
+                                                   max_workers=self.max_workers, ordered=False):
+            self._store(queries[index], payload, today)
+            payloads[index] = payload
+        return self._frame(queries, payloads)
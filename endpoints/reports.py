@@ -1,4 +1,9 @@
 from .base import Resource, DataPointType
+from .report_engine import ReportsEngine
+from .urls import Endpoint
+
+
+REPORT = Endpoint("/reports/{data_points_type}")
 
 
 # =======================================================
@@ -12,9 +17,15 @@ class Reports(Resource):
             label:            str           = None,
             since:            str           = None,
             until:            str           = None):
-        return self._get("/reports/{data_points_type}".format(data_points_type=data_points_type),
+        return self._get(REPORT.format(data_points_type=data_points_type),
                          user=user,
                          team=team,
                          label=label,
                          since=since,
                          until=until)
+
+    # Batched fetch of many (metric, user/team/label, period) reports, past periods cached permanently
+    def engine(self,
+               backend=None,          # e.g. SqliteCacheBackend("reports.db") to keep past periods across runs
+               max_workers: int = 8):
+        return ReportsEngine(Reports(self.api, raise_errors=True), backend=backend, max_workers=max_workers)
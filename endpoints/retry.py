@@ -0,0 +1,67 @@
+import random
+import time
+
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) in seconds, per attempt
+
+
+# Timeout of one attempt shortened to `budget`, the seconds left before the call's deadline.
+# `timeout` is a number, None (no limit) or a (connect, read) tuple, capped phase by phase.
+def cap_timeout(timeout, budget):
+    if budget is None:
+        return timeout
+    if isinstance(timeout, tuple):
+        return tuple(cap_timeout(part, budget) for part in timeout)
+    return budget if timeout is None else min(timeout, budget)
+
+
+# =======================================================
+# RetryPolicy - When and how long to wait before resending a request
+# =======================================================
+class RetryPolicy:
+    def __init__(self,
+                 max_attempts:   int   = 3,
+                 backoff:        float = 0.5,    # First delay, doubled on every attempt
+                 max_backoff:    float = 30.0,
+                 jitter:         bool  = True,   # "Full jitter": uniform in [0, delay]
+                 retry_statuses: tuple = (500, 502, 504),
+                 retry_methods:  tuple = IDEMPOTENT_METHODS,
+                 deadline:       float = None):  # Seconds budget for a call, retries included
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = retry_statuses
+        self.retry_methods = retry_methods
+        self.deadline = deadline
+
+    def allows(self, method, idempotent=None):
+        if idempotent is not None:
+            return idempotent
+        return method.upper() in self.retry_methods
+
+    def expired(self, started, delay=0.0):
+        return self.deadline is not None and time.monotonic() - started + delay > self.deadline
+
+    # Seconds left of the deadline for the next attempt, None without a deadline.
+    # Never 0, which HTTP clients reject or read as "no timeout".
+    def remaining(self, started):
+        if self.deadline is None:
+            return None
+        return max(0.001, self.deadline - (time.monotonic() - started))
+
+    # Returns the delay before the next attempt, or None when the call must not be retried
+    def next_delay(self, attempt, started):
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if self.expired(started, delay):
+            return None
+        return delay
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
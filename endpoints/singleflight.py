@@ -0,0 +1,105 @@
+import threading
+
+
+# =======================================================
+# SingleFlight - Identical concurrent GETs share one request
+# =======================================================
+# The first caller of a key (the leader) runs the request, callers arriving while it is in flight wait for
+# its result, or its exception, instead of sending their own. Payloads are mutable dicts, so when a request was
+# shared every caller gets its own deep copy, made from a result none of them holds. A call nobody joined
+# returns its result as is. Nothing is kept once the call returns: this deduplicates bursts, ResponseCache is
+# what keeps results across calls.
+class _Call:
+    __slots__ = ("done", "value", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.followers = 0
+
+
+def _deepcopy(value):
+    from copy import deepcopy  # Only loaded once a request is shared
+    return deepcopy(value)
+
+
+class SingleFlight:
+    def __init__(self,
+                 copy: bool = True):  # False = callers of a shared request get one object, to treat as read-only
+        self.copy = copy
+        self.collapsed = 0  # Calls served by another caller's request
+        self.requests = 0   # Calls that sent their own request
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.requests += 1
+            else:
+                call.followers += 1
+                self.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return _deepcopy(call.value) if self.copy else call.value
+
+        try:
+            call.value = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]  # No follower joins after this
+            call.done.set()
+        return _deepcopy(call.value) if self.copy and call.followers else call.value
+
+    @property
+    def in_flight(self):
+        return len(self._calls)
+
+
+# Same for coroutines: `function` returns an awaitable. The calls of one event loop are deduplicated.
+class AsyncSingleFlight(SingleFlight):
+    def __init__(self, copy: bool = True):
+        super().__init__(copy=copy)
+        self._followers = {}  # key -> callers waiting on the leader
+
+    async def do(self, key, function):
+        import asyncio
+        future = self._calls.get(key)
+        if future is not None:
+            self.collapsed += 1
+            self._followers[key] = self._followers.get(key, 0) + 1
+            try:
+                value = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # This caller was cancelled, not the leader
+                return await self.do(key, function)  # The leader was cancelled: take over
+            return _deepcopy(value) if self.copy else value
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self.requests += 1
+        try:
+            value = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            future.exception()  # Marked as retrieved when no caller was waiting
+            raise
+        else:
+            future.set_result(value)
+            return _deepcopy(value) if self.copy and self._followers.get(key) else value
+        finally:
+            del self._calls[key]
+            self._followers.pop(key, None)
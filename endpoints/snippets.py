@@ -1,4 +1,9 @@
 from .base import Resource
+from .templates import SnippetRenderer
+from .urls import Endpoint
+
+
+SNIPPET = Endpoint("/snippets/{snippet_id}")
 
 
 # =======================================================
@@ -8,6 +13,12 @@ class Snippets(Resource):
     def fetch(self):
         return self._get("/snippets")
 
+    # Compiled snippets filled with ticket data, fetched once: renderer.render("Greeting", ticket)
+    def renderer(self,
+                 agent=None,
+                 max_age: float = None):  # Seconds before the snippets are fetched again
+        return SnippetRenderer(self, agent=agent, max_age=max_age)
+
     def create(self,
                name:            str,
                content:         str  = None,
@@ -47,8 +58,8 @@ class Snippets(Resource):
         if len(snippet.keys()) == 0:
             return
 
-        return self._put("/snippets/{snippet_id}".format(snippet_id=snippet_id), data={"snippet": snippet})
+        return self._put(SNIPPET.format(snippet_id=snippet_id), data={"snippet": snippet})
 
     def delete(self,
                snippet_id: str):
-        return self._delete("/snippets/{snippet_id}".format(snippet_id=snippet_id))
+        return self._delete(SNIPPET.format(snippet_id=snippet_id))
@@ -0,0 +1,265 @@
+import json
+import sqlite3
+import threading
+from enum import Enum
+
+from .base import BasicOptions, AssignedUserOptions, AssignedTeamOptions, SortByOptions
+from .models import Model, wrap_response
+
+
+def _plain(ticket):
+    ticket = getattr(ticket, "ticket", ticket)  # SyncedTicket
+    return ticket.to_dict() if isinstance(ticket, Model) else ticket
+
+
+def _text(content):
+    return (content or {}).get("text") or ""
+
+
+def _assignee_id(ticket, key, kind):
+    return ((ticket.get(key) or {}).get(kind) or {}).get("id")
+
+
+def _enum_value(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+# Each whitespace separated term becomes an FTS5 string, so "don't", "invoice-2024", "C++" or "AND" are searched
+# as typed instead of being read as query syntax. All terms must match.
+def fts_query(query):
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+# =======================================================
+# TicketStore - Local sqlite copy of tickets, queried offline
+# =======================================================
+# Filled from any iterable of tickets (iter_fetch, export pages, IncrementalSync...), then queried with
+# the same parameters as Tickets.fetch / Tickets.search, returning the same payload shape.
+# Full-text search needs sqlite built with FTS5 (the default for CPython builds).
+# `user_id` and `team_ids` resolve AssignedUserOptions.ME and AssignedTeamOptions.MINE.
+class TicketStore:
+    def __init__(self,
+                 path:     str  = ":memory:",
+                 user_id:  int  = None,
+                 team_ids: list = (),
+                 models:   bool = False):  # Return slotted models instead of dicts
+        self.user_id = user_id
+        self.team_ids = tuple(team_ids)
+        self.models = models
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.RLock()  # One connection: readers and writers from several threads take turns
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS tickets ("
+                             "id INTEGER PRIMARY KEY, requester_email TEXT, assigned_user INTEGER, "
+                             "assigned_team INTEGER, created_at TEXT, last_activity_at TEXT, archived INTEGER, "
+                             "spam INTEGER, trash INTEGER, starred INTEGER, data TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS ticket_labels (ticket_id INTEGER, label TEXT)")
+            self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(subject, content)")
+            for column in ("requester_email", "assigned_user", "assigned_team", "created_at", "last_activity_at"):
+                self._db.execute("CREATE INDEX IF NOT EXISTS tickets_{column} ON tickets ({column})".format(
+                    column=column))
+            self._db.execute("CREATE INDEX IF NOT EXISTS ticket_labels_label ON ticket_labels (label, ticket_id)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS ticket_labels_ticket ON ticket_labels (ticket_id)")
+
+    # =======================================================
+    # Filling
+    # =======================================================
+    # Accepts ticket dicts, Ticket models or SyncedTicket objects (their replies feed the full-text index)
+    def add(self, tickets):
+        count = 0
+        with self._lock, self._db:
+            for ticket in tickets:
+                self._upsert(ticket)
+                count += 1
+        return count
+
+    # Stores the tickets while passing them through, e.g. store.fill(api.tickets.iter_fetch())
+    def fill(self, tickets, batch_size: int = 500):
+        batch = []
+        try:
+            for ticket in tickets:
+                batch.append(ticket)
+                if len(batch) >= batch_size:
+                    self.add(batch)
+                    batch = []
+                yield ticket
+        finally:
+            self.add(batch)
+
+    # `content` replaces the indexed text, by default the ticket's own text plus its replies and comments
+    def _upsert(self, item, content=None):
+        ticket = _plain(item)
+        ticket_id = ticket["id"]
+        if content is None:
+            content = [_text(ticket.get("content"))]
+            content += [_text(_plain(reply).get("content")) for reply in getattr(item, "replies", None) or ()]
+            content += [_text(_plain(comment).get("content")) for comment in getattr(item, "comments", None) or ()]
+
+        self._db.execute("INSERT OR REPLACE INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (ticket_id,
+                          (ticket.get("requester") or {}).get("email"),
+                          _assignee_id(ticket, "current_user_assignee", "user"),
+                          _assignee_id(ticket, "current_team_assignee", "team"),
+                          ticket.get("created_at"),
+                          ticket.get("last_activity_at"),
+                          ticket.get("archived"),
+                          ticket.get("spam"),
+                          ticket.get("trash"),
+                          ticket.get("starred"),
+                          json.dumps(ticket)))
+        self._db.execute("DELETE FROM ticket_labels WHERE ticket_id = ?", (ticket_id,))
+        self._db.executemany("INSERT INTO ticket_labels VALUES (?, ?)",
+                             [(ticket_id, label["name"]) for label in ticket.get("labels") or ()])
+        self._db.execute("DELETE FROM tickets_fts WHERE rowid = ?", (ticket_id,))
+        self._db.execute("INSERT INTO tickets_fts (rowid, subject, content) VALUES (?, ?, ?)",
+                         (ticket_id, ticket.get("subject") or "", "\n".join(filter(None, content))))
+
+    # Partial update (e.g. from a webhook event): `update(ticket)` edits the stored ticket dict in place and `text`
+    # is appended to its indexed content, so the reply and comment text indexed so far is kept.
+    # Returns False when the ticket is not in the store and `update` did not provide it in full.
+    def apply(self, ticket_id: int, update=None, text: str = None):
+        with self._lock, self._db:
+            row = self._db.execute("SELECT tickets.data, tickets_fts.content FROM tickets "
+                                   "LEFT JOIN tickets_fts ON tickets_fts.rowid = tickets.id WHERE tickets.id = ?",
+                                   (ticket_id,)).fetchone()
+            ticket = json.loads(row[0]) if row is not None else {}
+            if update is not None:
+                update(ticket)
+            if "id" not in ticket:
+                return False
+            content = [row[1]] if row is not None else [_text(ticket.get("content"))]
+            self._upsert(ticket, content=content + [text or ""])
+        return True
+
+    def delete(self, ticket_id: int):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM tickets WHERE id = ?", (ticket_id,))
+            self._db.execute("DELETE FROM ticket_labels WHERE ticket_id = ?", (ticket_id,))
+            self._db.execute("DELETE FROM tickets_fts WHERE rowid = ?", (ticket_id,))
+
+    def clear(self):
+        with self._lock, self._db:
+            for table in ("tickets", "ticket_labels", "tickets_fts"):
+                self._db.execute("DELETE FROM " + table)
+
+    # =======================================================
+    # Queries
+    # =======================================================
+    def get(self, ticket_id: int):
+        with self._lock:
+            row = self._db.execute("SELECT data FROM tickets WHERE id = ?", (ticket_id,)).fetchone()
+        if row is None:
+            return None
+        return self._payload({"ticket": json.loads(row[0])})
+
+    def fetch(self,
+              per_page:         int                        = 100,
+              page:             int                        = 1,
+              archived:         BasicOptions               = None,  # Default = BasicOptions.FALSE,
+              spam:             bool                       = None,  # Default = False,
+              trash:            bool                       = None,  # Default = False,
+              assigned_user:    int or AssignedUserOptions = None,
+              assigned_team:    int or AssignedTeamOptions = None,
+              starred:          bool                       = None,
+              label:            str                        = None,
+              since:            str                        = None,
+              until:            str                        = None,
+              sort_by:          SortByOptions              = None,  # Default = SortByOptions.LAST_ACTIVITY,
+              requester_emails: str                        = None,  # Comma separated
+              total_only:       bool                       = None):
+        where, params = self._filters(archived, spam, trash, starred)
+        self._assignee_filter(where, params, assigned_user, assigned_team)
+        if label is not None:
+            where.append("id IN (SELECT ticket_id FROM ticket_labels WHERE label = ?)")
+            params.append(label)
+        if since is not None:
+            where.append("last_activity_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("last_activity_at <= ?")
+            params.append(until)
+        if requester_emails is not None:
+            emails = [email.strip() for email in requester_emails.split(",")]
+            where.append("requester_email IN ({marks})".format(marks=", ".join("?" * len(emails))))
+            params += emails
+        order = "created_at" if _enum_value(sort_by) == SortByOptions.CREATION_TIME.value else "last_activity_at"
+        return self._query("FROM tickets", where, params, order + " DESC", per_page, page, total_only)
+
+    def search(self,
+               query:    str,
+               per_page: int  = 100,
+               page:     int  = 1,
+               spam:     bool = False,
+               trash:    bool = False,
+               raw:      bool = False):  # Pass `query` to FTS5 as is (AND/OR/NOT, "phrases", prefix*)
+        where, params = self._filters(BasicOptions.ANY, spam, trash, None)
+        if not raw:
+            query = fts_query(query)
+        if query:
+            where.append("tickets_fts MATCH ?")
+            params.append(query)
+        else:
+            where.append("0")  # Nothing to look for
+        return self._query("FROM tickets_fts JOIN tickets ON tickets.id = tickets_fts.rowid",
+                           where, params, "tickets_fts.rank", per_page, page)
+
+    def _filters(self, archived, spam, trash, starred):
+        where, params = [], []
+        for column, value, default in (("archived", archived, BasicOptions.FALSE),
+                                       ("spam", spam, False),
+                                       ("trash", trash, False),
+                                       ("starred", starred, None)):
+            value = _enum_value(default if value is None else value)
+            if value is None or value == BasicOptions.ANY.value:
+                continue
+            where.append("COALESCE({column}, 0) = ?".format(column=column))
+            params.append(1 if value in (True, BasicOptions.TRUE.value) else 0)
+        return where, params
+
+    def _assignee_filter(self, where, params, assigned_user, assigned_team):
+        assigned_user = _enum_value(assigned_user)
+        if assigned_user == AssignedUserOptions.ME.value:
+            if self.user_id is None:
+                raise ValueError("AssignedUserOptions.ME needs the store's user_id")
+            assigned_user = self.user_id
+        if assigned_user == AssignedUserOptions.ANY.value:
+            where.append("assigned_user IS NOT NULL")
+        elif assigned_user == AssignedUserOptions.NONE.value:
+            where.append("assigned_user IS NULL")
+        elif assigned_user is not None:
+            where.append("assigned_user = ?")
+            params.append(int(assigned_user))
+
+        assigned_team = _enum_value(assigned_team)
+        if assigned_team == AssignedTeamOptions.MINE.value:
+            where.append("assigned_team IN ({marks})".format(marks=", ".join("?" * len(self.team_ids))))
+            params += self.team_ids
+        elif assigned_team == AssignedTeamOptions.NONE.value:
+            where.append("assigned_team IS NULL")
+        elif assigned_team is not None:
+            where.append("assigned_team = ?")
+            params.append(int(assigned_team))
+
+    def _query(self, source, where, params, order, per_page, page, total_only=None):
+        condition = " WHERE " + " AND ".join(where) if where else ""
+        with self._lock:
+            total = self._db.execute("SELECT COUNT(*) " + source + condition, params).fetchone()[0]
+            result = {"total": total, "total_pages": -(-total // per_page) if per_page else 0}
+            if total_only:
+                return result
+            rows = self._db.execute("SELECT tickets.data " + source + condition + " ORDER BY " + order +
+                                    " LIMIT ? OFFSET ?", params + [per_page, (page - 1) * per_page]).fetchall()
+        result.update(current_page=page, per_page=per_page, tickets=[json.loads(row[0]) for row in rows])
+        return self._payload(result)
+
+    def _payload(self, payload):
+        return wrap_response(payload) if self.models else payload
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+
+    def close(self):
+        self._db.close()
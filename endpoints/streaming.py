@@ -0,0 +1,168 @@
+import json
+import re
+
+_decode = None  # orjson.loads when installed (faster), json.loads otherwise; resolved on the first decode
+
+
+def _decoder():
+    global _decode
+    try:
+        import orjson
+        _decode = orjson.loads
+    except ImportError:
+        _decode = json.loads
+    return _decode
+
+
+def loads(data):
+    return (_decode or _decoder())(data)
+
+
+_TOKENS = re.compile(rb'["{}\[\],:]')
+_STRING_TOKENS = re.compile(rb'["\\]')
+
+
+# =======================================================
+# ArrayItemParser - Incremental decoding of one top-level array
+# =======================================================
+# Fed with raw body chunks, returns the items (objects or arrays) of the `key` array of the top-level
+# object as soon as each one is complete. Only the item being decoded is buffered; everything outside
+# the array (total, total_pages, ...) is kept and decoded by close(), with the array itself left empty.
+# Scalar items (numbers, strings, null) are skipped: the list endpoints only return objects.
+class ArrayItemParser:
+    def __init__(self, key: str):
+        self.key = key.encode()
+        self._buffer = bytearray()
+        self._pos = 0           # Next byte to scan
+        self._keep = 0          # Bytes before this offset are no longer needed
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._last_string = None
+        self._current_key = None
+        self._in_array = False
+        self._array_done = False
+        self._item_start = None
+        self._outside = bytearray()
+
+    def feed(self, chunk):
+        buffer = self._buffer
+        buffer += chunk
+        items = []
+        pos = self._pos
+        while True:
+            if self._in_string:
+                match = _STRING_TOKENS.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if match.group() == b"\\":
+                    if match.end() >= len(buffer):
+                        pos = match.start()  # Escaped byte not received yet
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                self._in_string = False
+                if self._depth == 1:
+                    self._last_string = bytes(buffer[self._string_start:pos - 1])
+                continue
+
+            match = _TOKENS.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            token, pos = match.group(), match.end()
+            if token == b'"':
+                self._in_string = True
+                self._string_start = pos
+            elif token == b":":
+                if self._depth == 1:
+                    self._current_key = self._last_string
+            elif token == b",":
+                if self._depth == 1:
+                    self._current_key = None
+            elif token in (b"{", b"["):
+                self._depth += 1
+                if self._depth == 2 and token == b"[" and not self._array_done and self._current_key == self.key:
+                    self._flush_outside(pos)
+                    self._in_array = True
+                elif self._in_array and self._depth == 3:
+                    self._keep = self._item_start = match.start()
+            else:
+                self._depth -= 1
+                if self._in_array and self._depth == 2:
+                    items.append(loads(bytes(buffer[self._item_start:pos])))
+                    self._keep, self._item_start = pos, None
+                elif self._in_array and self._depth == 1:
+                    self._in_array, self._array_done = False, True
+                    self._outside += b"]"
+                    self._keep = pos
+
+        if not self._in_array:
+            # A key split across chunks stays buffered until its closing quote
+            self._flush_outside(self._string_start if self._in_string else pos)
+        elif self._item_start is None:
+            self._keep = pos
+        self._compact(pos)
+        return items
+
+    def _flush_outside(self, pos):
+        self._outside += self._buffer[self._keep:pos]
+        self._keep = pos
+
+    def _compact(self, pos):
+        keep = self._keep
+        if keep:
+            del self._buffer[:keep]
+            self._string_start -= keep
+            if self._item_start is not None:
+                self._item_start -= keep
+            self._keep = 0
+        self._pos = pos - keep
+
+    # Decodes what surrounded the array, e.g. {"total": 250, "total_pages": 3, "tickets": []}
+    def close(self):
+        if not self._outside.strip():
+            return {}
+        return loads(bytes(self._outside))
+
+
+# =======================================================
+# ItemStream - Iterates the items of a streamed list response
+# =======================================================
+class ItemStream:
+    def __init__(self, response, key: str, wrap=None, chunk_size: int = 64 * 1024):
+        self.response = response
+        self.key = key
+        self.wrap = wrap
+        self.chunk_size = chunk_size
+        self.metadata = None  # The rest of the payload, available once iterated
+
+    def __iter__(self):
+        parser = ArrayItemParser(self.key)
+        try:
+            for chunk in self.response.iter_content(self.chunk_size):
+                for item in parser.feed(chunk):
+                    yield self.wrap(item) if self.wrap is not None else item
+            self.metadata = parser.close()
+        finally:
+            self.response.close()
+
+
+class AsyncItemStream(ItemStream):
+    def __iter__(self):
+        raise TypeError("Use `async for` with an async client stream")
+
+    async def _items(self):
+        parser = ArrayItemParser(self.key)
+        try:
+            async for chunk in self.response.aiter_bytes(self.chunk_size):
+                for item in parser.feed(chunk):
+                    yield self.wrap(item) if self.wrap is not None else item
+            self.metadata = parser.close()
+        finally:
+            await self.response.aclose()
+
+    def __aiter__(self):
+        return self._items()
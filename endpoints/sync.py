@@ -0,0 +1,145 @@
+import json
+import os
+import sqlite3
+
+from .base import BasicOptions, SortByOptions
+from .pagination import fan_out_pages
+
+
+# =======================================================
+# Sync cursor and its storage
+# =======================================================
+class SyncCursor:
+    def __init__(self, since: str = None, boundary_ids=()):
+        self.since = since                     # Highest last_activity_at seen so far
+        self.boundary_ids = set(boundary_ids)  # Tickets already synced with last_activity_at == since
+
+    def __repr__(self):
+        return "<SyncCursor since={since} boundary={count}>".format(since=self.since, count=len(self.boundary_ids))
+
+
+class JsonFileSyncState:
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return SyncCursor()
+        with open(self.path) as f:
+            state = json.load(f)
+        return SyncCursor(state.get("since"), state.get("boundary_ids", ()))
+
+    def save(self, cursor):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"since": cursor.since, "boundary_ids": sorted(cursor.boundary_ids)}, f)
+        os.replace(tmp_path, self.path)
+
+
+class SqliteSyncState:
+    def __init__(self, path: str, name: str = "tickets"):
+        self.name = name
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, since TEXT, boundary_ids TEXT)")
+        self._db.commit()
+
+    def load(self):
+        row = self._db.execute("SELECT since, boundary_ids FROM sync_state WHERE name = ?", (self.name,)).fetchone()
+        if row is None:
+            return SyncCursor()
+        return SyncCursor(row[0], json.loads(row[1]))
+
+    def save(self, cursor):
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                             (self.name, cursor.since, json.dumps(sorted(cursor.boundary_ids))))
+
+    def close(self):
+        self._db.close()
+
+
+# =======================================================
+# IncrementalSync - Only fetch tickets changed since the last run
+# =======================================================
+class SyncedTicket:
+    def __init__(self, ticket, replies=None, comments=None):
+        self.ticket = ticket
+        self.replies = replies
+        self.comments = comments
+
+    def __repr__(self):
+        return "<SyncedTicket {id}>".format(id=self.ticket.get("id"))
+
+
+# Tickets are crawled newest activity first without an upper bound: activity during the crawl can only
+# push tickets to later pages (seen twice, deduplicated) and never skip one. The cursor is saved once the
+# run has been fully consumed, an interrupted run starts again from the previous cursor.
+class IncrementalSync:
+    def __init__(self,
+                 api,
+                 state,
+                 per_page:      int  = 100,
+                 with_replies:  bool = False,
+                 with_comments: bool = False,
+                 max_workers:   int  = 8,
+                 store=None,  # TicketStore kept up to date with the synced tickets
+                 **filters):  # Extra Tickets.fetch filters, default archived=ANY
+        self.api = api
+        self.state = state
+        self.store = store
+        self.per_page = per_page
+        self.with_replies = with_replies
+        self.with_comments = with_comments
+        self.max_workers = max_workers
+        self.filters = dict({"archived": BasicOptions.ANY}, **filters)
+
+    def _changed_tickets(self, cursor):
+        seen = set()
+        for ticket in self.api.tickets.iter_fetch(per_page=self.per_page,
+                                                  since=cursor.since,
+                                                  sort_by=SortByOptions.LAST_ACTIVITY,
+                                                  prefetch=True,
+                                                  **self.filters):
+            ticket_id = ticket["id"]
+            if ticket_id in seen:
+                continue
+            seen.add(ticket_id)
+            if ticket.get("last_activity_at") == cursor.since and ticket_id in cursor.boundary_ids:
+                continue  # Synced by the previous run
+            yield ticket
+
+    def _hydrate(self, ticket):
+        replies = comments = None
+        if self.with_replies:
+            replies = self.api.replies.fetch(ticket["id"]).get("replies", [])
+        if self.with_comments:
+            comments = self.api.comments.fetch(ticket["id"]).get("comments", [])
+        return SyncedTicket(ticket, replies, comments)
+
+    def _advance(self, cursor, ticket):
+        activity = ticket.get("last_activity_at")
+        if activity is None or (cursor.since is not None and activity < cursor.since):
+            return
+        if activity != cursor.since:
+            cursor.since = activity
+            cursor.boundary_ids = set()
+        cursor.boundary_ids.add(ticket["id"])
+
+    def run(self):
+        cursor = self.state.load()
+        next_cursor = SyncCursor(cursor.since, cursor.boundary_ids)
+        tickets = self._changed_tickets(cursor)
+
+        if self.with_replies or self.with_comments:
+            synced_tickets = (synced for _, synced in fan_out_pages(self._hydrate, tickets,
+                                                                    max_workers=self.max_workers))
+        else:
+            synced_tickets = (SyncedTicket(ticket) for ticket in tickets)
+
+        for synced in synced_tickets:
+            if self.store is not None:
+                self.store.add((synced,))  # Stored before the cursor can move past it
+            self._advance(next_cursor, synced.ticket)
+            yield synced
+
+        self.state.save(next_cursor)
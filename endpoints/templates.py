@@ -0,0 +1,225 @@
+import html as _html
+import re
+import threading
+import time
+from functools import lru_cache
+
+from .models import Model
+
+
+# {{ ticket.subject }}, {{ requester.first_name | there }}: a dotted path and an optional default
+PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][\w.]*)\s*(?:\|\s*(.*?)\s*)?\}\}")
+
+
+def _lookup(path):
+    keys = tuple(path.split("."))
+
+    def lookup(value):
+        for key in keys:
+            if value is None:
+                return None
+            if isinstance(value, Model):
+                value = getattr(value, key) if key in value._field_set or key in value.nested else value.get(key)
+            elif type(value) is dict:
+                value = value.get(key)
+            else:
+                value = getattr(value, key, None)
+        return value
+    return lookup
+
+
+# Text snippet shown as HTML: the text is escaped, placeholders are left for render() to fill
+def text_to_html(text):
+    return _html.escape(text, quote=False).replace("\r\n", "\n").replace("\n", "<br>")
+
+
+# =======================================================
+# Template - Snippet content parsed once, rendered many times
+# =======================================================
+# The source is turned into a str.format pattern with one positional field per placeholder, so a render is
+# the placeholder lookups plus one format call. Values are HTML-escaped in HTML templates, defaults are part
+# of the template source and are used as written. Missing or empty values render as their default ("").
+class Template:
+    __slots__ = ("source", "html", "fields", "_format", "_lookups", "_defaults")
+
+    def __init__(self,
+                 source: str,
+                 html:   bool = False):
+        self.source = source
+        self.html = html
+        parts, fields, lookups, defaults = [], [], [], []
+        position = 0
+        for match in PLACEHOLDER.finditer(source):
+            parts.append(source[position:match.start()].replace("{", "{{").replace("}", "}}"))
+            parts.append("{" + str(len(lookups)) + "}")
+            fields.append(match.group(1))
+            lookups.append(_lookup(match.group(1)))
+            defaults.append(match.group(2) or "")
+            position = match.end()
+        parts.append(source[position:].replace("{", "{{").replace("}", "}}"))
+        self.fields = tuple(fields)
+        self._format = "".join(parts).format
+        self._lookups = tuple(zip(lookups, defaults))
+
+    # `context` maps the first part of the paths ("ticket", "requester", ...) to dicts or models
+    def render(self, context: dict = None, **names):
+        if names:
+            context = dict(context or (), **names)
+        escape = _html.escape if self.html else str
+        values = []
+        for lookup, default in self._lookups:
+            value = lookup(context)
+            values.append(default if value is None or value == "" else escape(str(value)))
+        return self._format(*values)
+
+    def render_many(self, contexts):
+        return [self.render(context) for context in contexts]
+
+    def __repr__(self):
+        return "<Template {kind} fields={fields}>".format(kind="html" if self.html else "text", fields=self.fields)
+
+
+# Identical snippet contents share one compiled template
+@lru_cache(maxsize=1024)
+def compile_template(source: str, html: bool = False):
+    return Template(source, html=html)
+
+
+# =======================================================
+# SnippetRenderer - Fills snippets with ticket data for mass replies
+# =======================================================
+# The snippet list is fetched once (through the client's ResponseCache when it has one) and each snippet is
+# compiled the first time it is used. Snippets are looked up by id or name. Placeholders can use `ticket`,
+# `requester` (the ticket's), `agent` and any name passed as a keyword argument.
+# HTML renders use the snippet's HTML content, or its text content escaped with line breaks kept.
+class SnippetRenderer:
+    def __init__(self,
+                 snippets,
+                 agent=None,             # User or dict filling {{ agent.* }} when render() is not given one
+                 max_age: float = None):  # Seconds before the snippet list is fetched again, None = never
+        self.snippets = snippets
+        self.agent = agent
+        self.max_age = max_age
+        self._sources = None  # id and name -> (text, html)
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        self._index(self.snippets.fetch())
+        return self
+
+    def refresh(self):
+        return self.load()
+
+    def _index(self, payload):
+        sources = {}
+        for snippet in (payload or {}).get("snippets") or ():
+            content = snippet.get("content") or {}
+            source = (content.get("text"), content.get("html"))
+            sources[snippet.get("id")] = sources[snippet.get("name")] = source
+        self._sources = sources
+        self._loaded_at = time.monotonic()
+
+    def _source(self, snippet):
+        with self._lock:
+            if self._sources is None or \
+                    self.max_age is not None and time.monotonic() - self._loaded_at > self.max_age:
+                self.load()
+        try:
+            return self._sources[snippet]
+        except KeyError:
+            raise KeyError("No snippet named or numbered {snippet!r}".format(snippet=snippet)) from None
+
+    def has_html(self, snippet):
+        return self._source(snippet)[1] is not None
+
+    def template(self,
+                 snippet,              # Id or name
+                 html:    bool = False):
+        text, html_source = self._source(snippet)
+        if html:
+            if html_source is not None:
+                return compile_template(html_source, html=True)
+            return compile_template(text_to_html(text or ""), html=True)
+        if text is None and html_source is not None:
+            raise ValueError("Snippet {snippet!r} only has HTML content, render it with html=True".format(
+                snippet=snippet))
+        return compile_template(text or "")
+
+    def context(self, ticket=None, agent=None, **names):
+        if isinstance(ticket, Model):
+            requester = ticket.requester
+        else:
+            requester = ticket.get("requester") if ticket is not None else None
+        return dict(names, ticket=ticket, requester=requester, agent=agent if agent is not None else self.agent)
+
+    def render(self,
+               snippet,
+               ticket=None,
+               html:    bool = False,
+               agent=None,
+               **names):
+        return self.template(snippet, html=html).render(self.context(ticket, agent, **names))
+
+    def render_many(self,
+                    snippet,
+                    tickets,
+                    html:    bool = False,
+                    agent=None,
+                    **names):
+        template = self.template(snippet, html=html)
+        return [template.render(self.context(ticket, agent, **names)) for ticket in tickets]
+
+    # [(ticket id, keyword arguments)] for Replies.create or Outbox.reply, in the snippet's own format
+    # when `html` is None
+    def replies(self,
+                snippet,
+                tickets,
+                html:    bool = None,
+                agent=None,
+                **names):
+        tickets = list(tickets)
+        if html is None:
+            html = self.has_html(snippet)
+        contents = self.render_many(snippet, tickets, html=html, agent=agent, **names)
+        return [(ticket.get("id"), {"content": content, "content_as_html": html})
+                for ticket, content in zip(tickets, contents)]
+
+
+# Same with an async Snippets resource: `await renderer.load()` before rendering. Rendering itself does not wait
+# on anything and stays synchronous, so with `max_age` a render that finds the snippets older than that starts a
+# refresh in the background and uses the current ones meanwhile. A failed refresh is tried again on the next render.
+class AsyncSnippetRenderer(SnippetRenderer):
+    _refresh = None  # Background refresh task, while one runs
+
+    async def load(self):
+        self._index(await self.snippets.fetch())
+        return self
+
+    async def refresh(self):
+        return await self.load()
+
+    def _source(self, snippet):
+        if self._sources is None:
+            raise RuntimeError("Snippets are not loaded yet, await renderer.load() first")
+        if self.max_age is not None and self._refresh is None and \
+                time.monotonic() - self._loaded_at > self.max_age:
+            self._refresh_later()
+        try:
+            return self._sources[snippet]
+        except KeyError:
+            raise KeyError("No snippet named or numbered {snippet!r}".format(snippet=snippet)) from None
+
+    def _refresh_later(self):
+        import asyncio
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Rendered outside the event loop: the snippets are kept until the next load()
+        self._refresh = loop.create_task(self.load())
+        self._refresh.add_done_callback(self._refreshed)
+
+    def _refreshed(self, task):
+        self._refresh = None
+        if not task.cancelled():
+            task.exception()  # Retrieved so asyncio does not log it, the next render retries
@@ -0,0 +1,30 @@
+# Parts fetched to build a thread, each one is a separate request
+THREAD_PARTS = ("ticket", "replies", "comments")
+
+
+# =======================================================
+# Thread - A ticket with its replies and comments
+# =======================================================
+class Thread:
+    def __init__(self, ticket, replies=(), comments=()):
+        self.ticket = ticket
+        self.replies = replies
+        self.comments = comments
+
+    @classmethod
+    def from_responses(cls, ticket, replies, comments):
+        return cls(ticket.get("ticket"), replies.get("replies") or [], comments.get("comments") or [])
+
+    # The ticket itself, its replies and its comments as (kind, item) pairs ordered by created_at
+    @property
+    def messages(self):
+        messages = [("ticket", self.ticket)] if self.ticket is not None else []
+        messages += [("reply", reply) for reply in self.replies]
+        messages += [("comment", comment) for comment in self.comments]
+        messages.sort(key=lambda message: message[1].get("created_at") or "")
+        return messages
+
+    def __repr__(self):
+        ticket_id = self.ticket.get("id") if self.ticket is not None else None
+        return "<Thread {id} replies={replies} comments={comments}>".format(
+            id=ticket_id, replies=len(self.replies), comments=len(self.comments))
@@ -1,4 +1,31 @@
 from .base import Resource, BasicOptions, AssignedUserOptions, AssignedTeamOptions, SortByOptions
+from .labels import Labels
+from .pagination import iter_pages, iter_stream_pages, fan_out_pages
+from .bulk import BulkOperations
+from .threads import Thread, THREAD_PARTS
+from .loader import BatchLoader
+from .urls import Endpoint
+
+
+TICKET = Endpoint("/tickets/{ticket_id}")
+TICKET_ARCHIVE = Endpoint("/tickets/{ticket_id}/archive")
+TICKET_ANSWERED = Endpoint("/tickets/{ticket_id}/answered")
+TICKET_USER_ASSIGNMENT = Endpoint("/tickets/{ticket_id}/user_assignment")
+TICKET_TEAM_ASSIGNMENT = Endpoint("/tickets/{ticket_id}/team_assignment")
+TICKET_STAR = Endpoint("/tickets/{ticket_id}/star")
+TICKET_SPAM = Endpoint("/tickets/{ticket_id}/spam")
+TICKET_TRASH = Endpoint("/tickets/{ticket_id}/trash")
+
+
+# Drops tickets already exported, remembering the ids of the others
+def unseen_tickets(tickets, seen):
+    fresh = []
+    for ticket in tickets:
+        ticket_id = ticket.get("id")
+        if ticket_id not in seen:
+            seen.add(ticket_id)
+            fresh.append(ticket)
+    return fresh
 
 
 # =======================================================
@@ -21,9 +48,11 @@ class Tickets(Resource):
               until:            str                        = None,
               sort_by:          SortByOptions              = None,  # Default = SortByOptions.LAST_ACTIVITY,
               requester_emails: str                        = None,
-              total_only:       bool                       = None   # Default = False
+              total_only:       bool                       = None,  # Default = False
+              stream:           bool                       = False  # Iterate tickets as they are decoded
               ):
         return self._get("/tickets",
+                         stream="tickets" if stream else None,
                          per_page=per_page,
                          page=page,
                          archived=archived,
@@ -46,14 +75,111 @@ class Tickets(Resource):
                per_page: int  = 100,
                page:     int  = 1,
                spam:     bool = False,
-               trash:    bool = False):
+               trash:    bool = False,
+               stream:   bool = False):
         return self._get("/tickets/search",
+                         stream="tickets" if stream else None,
                          query=query,
                          per_page=per_page,
                          page=page,
                          spam=spam,
                          trash=trash)
 
+    # stream=True decodes pages item by item instead of prefetching them
+    def iter_fetch(self,
+                   per_page: int  = 100,
+                   page:     int  = 1,
+                   prefetch: bool = False,
+                   stream:   bool = False,
+                   **kwargs):  # Same filters as fetch()
+        if stream:
+            return iter_stream_pages(lambda p: self.fetch(per_page=per_page, page=p, stream=True, **kwargs),
+                                     page=page, per_page=per_page)
+        return iter_pages(lambda p: self.fetch(per_page=per_page, page=p, **kwargs),
+                          "tickets", page=page, per_page=per_page, prefetch=prefetch)
+
+    def iter_search(self,
+                    query:    str,
+                    per_page: int  = 100,
+                    page:     int  = 1,
+                    spam:     bool = False,
+                    trash:    bool = False,
+                    prefetch: bool = False,
+                    stream:   bool = False):
+        if stream:
+            return iter_stream_pages(lambda p: self.search(query, per_page=per_page, page=p, spam=spam, trash=trash,
+                                                           stream=True),
+                                     page=page, per_page=per_page)
+        return iter_pages(lambda p: self.search(query, per_page=per_page, page=p, spam=spam, trash=trash),
+                          "tickets", page=page, per_page=per_page, prefetch=prefetch)
+
+    # Sizes the crawl with a total_only request, then fetches all pages concurrently.
+    # Yields (page, tickets) in page order, or as pages complete when ordered=False.
+    # Pages are offsets: with the default LAST_ACTIVITY sort, tickets updated during the export would move between
+    # pages and be skipped or repeated. Exports sort by CREATION_TIME unless told otherwise. Each ticket created
+    # meanwhile shifts later pages by one: repeated tickets are yielded only once, and pages past the sized ones
+    # are fetched until one comes back short, so the oldest tickets pushed off the end are not lost.
+    def export(self,
+               per_page:    int  = 100,
+               max_workers: int  = 8,
+               ordered:     bool = True,
+               **kwargs):  # Same filters as fetch()
+        kwargs.setdefault("sort_by", SortByOptions.CREATION_TIME)
+        total = self.fetch(total_only=True, **kwargs)["total"]
+        pages = range(1, -(-total // per_page) + 1)
+        seen = set()
+        full = True  # Whether the last page came back full: tickets created meanwhile spill past it
+        for page, result in fan_out_pages(lambda p: self.fetch(per_page=per_page, page=p, **kwargs),
+                                          pages, max_workers=max_workers, ordered=ordered):
+            tickets = result.get("tickets") or []
+            if page == pages.stop - 1:
+                full = len(tickets) >= per_page
+            yield page, unseen_tickets(tickets, seen)
+        page = pages.stop
+        while full:
+            tickets = self.fetch(per_page=per_page, page=page, **kwargs).get("tickets") or []
+            full = len(tickets) >= per_page
+            if tickets:
+                yield page, unseen_tickets(tickets, seen)
+            page += 1
+
+    # Ticket, replies and comments requested concurrently; pieces already in the response cache are reused
+    def get_thread(self,
+                   ticket_id: int):
+        return self.get_threads([ticket_id], max_workers=len(THREAD_PARTS))[0]
+
+    # Returns one Thread per id, in order. max_workers bounds the requests in flight across all tickets.
+    def get_threads(self,
+                    ticket_ids:  list,
+                    max_workers: int = 8):
+        results = dict(fan_out_pages(self._fetch_thread_part, self._thread_parts(ticket_ids),
+                                     max_workers=max_workers, ordered=False))
+        return self._build_threads(ticket_ids, results)
+
+    @staticmethod
+    def _thread_parts(ticket_ids):
+        return [(ticket_id, part) for ticket_id in ticket_ids for part in THREAD_PARTS]
+
+    def _fetch_thread_part(self, thread_part):
+        ticket_id, part = thread_part
+        if part == "ticket":
+            return self.get(ticket_id)
+        if part == "replies":
+            return self.api.replies.fetch(ticket_id)
+        return self.api.comments.fetch(ticket_id)
+
+    @staticmethod
+    def _build_threads(ticket_ids, results):
+        return [Thread.from_responses(*(results[ticket_id, part] for part in THREAD_PARTS))
+                for ticket_id in ticket_ids]
+
+    # Chain operations (e.g. .archive(ids).addLabel(ids, "spam")) then .run() them concurrently
+    def bulk(self,
+             max_workers: int = 8):
+        return BulkOperations(Tickets(self.api, raise_errors=True),
+                              Labels(self.api, raise_errors=True),
+                              max_workers=max_workers)
+
     def create(self,
                subject:          str,
                requester_name:   str,
@@ -63,7 +189,8 @@ class Tickets(Resource):
                bcc:              str  = None,
                notify_requester: bool = False,
                attachment_ids:   list = None,
-               content_as_html:  bool = False):
+               content_as_html:  bool = False,
+               retry:            bool = False):  # Resend on transient errors, may create duplicates
         ticket = {
             "subject": subject,
             "requester_name": requester_name,
@@ -79,33 +206,39 @@ class Tickets(Resource):
         if bcc is not None:
             ticket["bcc"] = bcc
         if attachment_ids is not None:
-            ticket["content"]["attachment_ids"] = ",".join(attachment_ids)
+            ticket["content"]["attachment_ids"] = ",".join(map(str, attachment_ids))
 
-        return self._post("/tickets", data={"ticket": ticket})
+        return self._post("/tickets", data={"ticket": ticket}, idempotent=retry)
 
     def get(self,
             ticket_id: int):
-        return self._get("/tickets/{ticket_id}".format(ticket_id=ticket_id))
+        return self._get(TICKET.format(ticket_id=ticket_id))
+
+    # Collects get() calls from anywhere in a unit of work: loader.load(ticket_id) returns a Future, see BatchLoader
+    def loader(self,
+               max_workers: int   = 8,
+               window:      float = 0.005):
+        return BatchLoader(self.get, max_workers=max_workers, window=window)
 
     def delete(self,
                ticket_id: int):
-        return self._delete("/tickets/{ticket_id}".format(ticket_id=ticket_id))
+        return self._delete(TICKET.format(ticket_id=ticket_id))
 
     def archive(self,
                 ticket_id: int):
-        return self._post("/tickets/{ticket_id}/archive".format(ticket_id=ticket_id))
+        return self._post(TICKET_ARCHIVE.format(ticket_id=ticket_id), idempotent=True)
 
     def unarchive(self,
                   ticket_id: int):
-        return self._delete("/tickets/{ticket_id}/archive".format(ticket_id=ticket_id))
+        return self._delete(TICKET_ARCHIVE.format(ticket_id=ticket_id))
 
     def markAsAnswered(self,
                        ticket_id: int):
-        return self._post("/tickets/{ticket_id}/answered".format(ticket_id=ticket_id))
+        return self._post(TICKET_ANSWERED.format(ticket_id=ticket_id), idempotent=True)
 
     def markAsUnanswered(self,
                          ticket_id: int):
-        return self._delete("/tickets/{ticket_id}/answered".format(ticket_id=ticket_id))
+        return self._delete(TICKET_ANSWERED.format(ticket_id=ticket_id))
 
     def assignUser(self,
                    ticket_id: int,
@@ -113,12 +246,12 @@ class Tickets(Resource):
         user_assignment = {
             "user_id": user_id
         }
-        return self._post("/tickets/{ticket_id}/user_assignment".format(ticket_id=ticket_id),
-                          data={"user_assignment": user_assignment})
+        return self._post(TICKET_USER_ASSIGNMENT.format(ticket_id=ticket_id),
+                          data={"user_assignment": user_assignment}, idempotent=True)
 
     def unassignUser(self,
                      ticket_id: int):
-        return self._delete("/tickets/{ticket_id}/user_assignment".format(ticket_id=ticket_id))
+        return self._delete(TICKET_USER_ASSIGNMENT.format(ticket_id=ticket_id))
 
     def assignTeam(self,
                    ticket_id: int,
@@ -126,33 +259,33 @@ class Tickets(Resource):
         team_assignment = {
             "team_id": team_id
         }
-        return self._post("/tickets/{ticket_id}/team_assignment".format(ticket_id=ticket_id),
-                          data={"team_assignment": team_assignment})
+        return self._post(TICKET_TEAM_ASSIGNMENT.format(ticket_id=ticket_id),
+                          data={"team_assignment": team_assignment}, idempotent=True)
 
     def unassignTeam(self,
                      ticket_id: int):
-        return self._delete("/tickets/{ticket_id}/team_assignment".format(ticket_id=ticket_id))
+        return self._delete(TICKET_TEAM_ASSIGNMENT.format(ticket_id=ticket_id))
 
     def star(self,
              ticket_id: int):
-        return self._post("/tickets/{ticket_id}/star".format(ticket_id=ticket_id))
+        return self._post(TICKET_STAR.format(ticket_id=ticket_id), idempotent=True)
 
     def unstar(self,
                ticket_id: int):
-        return self._delete("/tickets/{ticket_id}/star".format(ticket_id=ticket_id))
+        return self._delete(TICKET_STAR.format(ticket_id=ticket_id))
 
     def markAsSpam(self,
                    ticket_id: int):
-        return self._post("/tickets/{ticket_id}/spam".format(ticket_id=ticket_id))
+        return self._post(TICKET_SPAM.format(ticket_id=ticket_id), idempotent=True)
 
     def unspam(self,
                ticket_id: int):
-        return self._delete("/tickets/{ticket_id}/spam".format(ticket_id=ticket_id))
+        return self._delete(TICKET_SPAM.format(ticket_id=ticket_id))
 
     def markAsTrash(self,
                     ticket_id: int):
-        return self._post("/tickets/{ticket_id}/trash".format(ticket_id=ticket_id))
+        return self._post(TICKET_TRASH.format(ticket_id=ticket_id), idempotent=True)
 
     def untrash(self,
                 ticket_id: int):
-        return self._delete("/tickets/{ticket_id}/trash".format(ticket_id=ticket_id))
+        return self._delete(TICKET_TRASH.format(ticket_id=ticket_id))
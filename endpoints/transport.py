@@ -0,0 +1,112 @@
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+from .ratelimit import RateLimiter, REJECTED_STATUSES
+from .retry import RetryPolicy, DEFAULT_TIMEOUT, cap_timeout
+
+
+# =======================================================
+# Transport - Sends prepared requests over HTTP
+# =======================================================
+class Transport:
+    retry_exceptions = ()  # Connection level errors worth retrying, set by each backend
+
+    def __init__(self, rate_limiter: RateLimiter = None, retry_policy: RetryPolicy = None):
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+
+    # `body` is raw request content (bytes or an iterable of chunks).
+    # With stream=True the response body is read by the caller, who closes the response.
+    # `timeout`, given when the retry policy has a deadline, is the seconds left of it: it caps the transport's own.
+    def send(self, method, url, headers=None, json=None, files=None, body=None, stream=False, timeout=None):
+        raise NotImplementedError
+
+    # idempotent=None lets the retry policy decide from the HTTP method.
+    # `event` (a RequestEvent) is updated with the number of retries.
+    def request(self, method, url, headers=None, json=None, files=None, body=None, idempotent=None, stream=False,
+                event=None):
+        policy = self.retry_policy
+        retryable = policy.allows(method, idempotent)
+        started = time.monotonic()
+        attempt = 0    # Resends after errors, bounded by the retry policy
+        throttles = 0  # Resends after 429/503, bounded by the rate limiter
+        options = dict(headers=headers, json=json, files=files, body=body, stream=stream)
+        while True:
+            self.rate_limiter.acquire()
+            if event is not None:
+                event.retries = attempt + throttles
+            if policy.deadline is not None:
+                options["timeout"] = policy.remaining(started)  # An attempt never outlives the call's budget
+            try:
+                response = self.send(method, url, **options)
+            except self.retry_exceptions:
+                delay = policy.next_delay(attempt, started) if retryable else None
+                if delay is None:
+                    raise
+            else:
+                throttled = self.rate_limiter.on_response(response.status_code, response.headers, throttles)
+                if throttled and (retryable or response.status_code in REJECTED_STATUSES):
+                    if policy.expired(started, self.rate_limiter.pending_wait()):
+                        return response
+                    response.close()
+                    throttles += 1
+                    continue
+                if not retryable or response.status_code not in policy.retry_statuses:
+                    return response
+                delay = policy.next_delay(attempt, started)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# =======================================================
+# SessionTransport - Pooled keep-alive connections
+# =======================================================
+class SessionTransport(Transport):
+    retry_exceptions = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+    def __init__(self,
+                 pool_connections: int   = 10,
+                 pool_maxsize:     int   = 10,
+                 pool_block:       bool  = False,
+                 keep_alive:       bool  = True,
+                 timeout:          tuple = DEFAULT_TIMEOUT,
+                 session:          requests.Session = None,
+                 rate_limiter:     RateLimiter      = None,
+                 retry_policy:     RetryPolicy      = None):
+        super().__init__(rate_limiter, retry_policy)
+        self.timeout = timeout
+        self.session = session if session is not None else requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    def send(self, method, url, headers=None, json=None, files=None, body=None, stream=False, timeout=None):
+        return self.session.request(method, url,
+                                    headers=headers,
+                                    json=json,
+                                    files=files,
+                                    data=body,
+                                    timeout=cap_timeout(self.timeout, timeout),
+                                    stream=stream)
+
+    def close(self):
+        self.session.close()
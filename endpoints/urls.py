@@ -0,0 +1,90 @@
+import datetime
+import functools
+from enum import Enum
+from string import Formatter
+from urllib.parse import quote
+
+
+_ENUM_VALUES = {}  # id(member) -> encoded value
+
+
+# Labels, emails, filters... the same few strings come back on every call
+@functools.lru_cache(maxsize=4096)
+def _quote(value):
+    return quote(value, safe="")
+
+
+# =======================================================
+# Values - How parameters are written in a url
+# =======================================================
+# bool -> true/false, Enum -> its value (UserRoles -> its name), date -> ISO 8601, list -> comma separated.
+# Everything else goes through str(). The result is percent-encoded, "/" included, so it fits a path segment too.
+def encode_value(value):
+    kind = type(value)
+    if kind is int:
+        return str(value)
+    if kind is bool:
+        return "true" if value else "false"
+    if kind is str:
+        return _quote(value)
+    if isinstance(value, Enum):
+        encoded = _ENUM_VALUES.get(id(value))  # Members are singletons, and id() is cheaper than Enum.__hash__
+        if encoded is None:
+            member = value.value
+            encoded = _ENUM_VALUES[id(value)] = encode_value(member[0] if isinstance(member, tuple) else member)
+        return encoded
+    if isinstance(value, (list, tuple)):
+        return ",".join(encode_value(item) for item in value)
+    if isinstance(value, datetime.date):
+        return quote(value.isoformat(), safe="")
+    return quote(str(value), safe="")
+
+
+# Route of an endpoint: the template of a formatted Endpoint, plain paths ("/tickets") are their own
+def template_of(endpoint):
+    return getattr(endpoint, "template", endpoint)
+
+
+# "&key=value" for each parameter that is not None, in the given order
+def encode_query(params):
+    return "".join(["&" + key + "=" + encode_value(value) for key, value in params if value is not None])
+
+
+# =======================================================
+# Endpoint - A path template parsed once, at import time
+# =======================================================
+# TICKET_LABEL = Endpoint("/tickets/{ticket_id}/labels/{label_name}")
+# TICKET_LABEL.format(ticket_id=12, label_name="to do") -> "/tickets/12/labels/to%20do"
+# The formatted path is a str that remembers its template (path.template), reported to the instrumentation hooks
+# so metrics are grouped per route rather than per ticket.
+class Endpoint:
+    __slots__ = ("template", "fields", "_format", "_path")
+
+    def __init__(self, template: str):
+        parsed = list(Formatter().parse(template))
+        self.template = template
+        self.fields = tuple(field for _, field, _, _ in parsed if field is not None)
+        # Positional fields: formatting skips the keyword lookups
+        self._format = "".join(literal.replace("{", "{{").replace("}", "}}") + ("{}" if field is not None else "")
+                               for literal, field, _, _ in parsed).format
+        self._path = type("EndpointPath", (str,), {"__slots__": (), "template": template})
+
+    def format(self, **params):
+        return self._path(self._format(*[encode_value(params[field]) for field in self.fields]))
+
+    def __repr__(self):
+        return "<Endpoint {template}>".format(template=self.template)
+
+
+# =======================================================
+# UrlBuilder - Company url and token joined once per client
+# =======================================================
+class UrlBuilder:
+    __slots__ = ("prefix", "suffix")
+
+    def __init__(self, company_url: str, token: str):
+        self.prefix = company_url
+        self.suffix = "?auth_token=" + quote(token, safe="")
+
+    def build(self, endpoint, params):
+        return self.prefix + endpoint + self.suffix + encode_query(params.items())
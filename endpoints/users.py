@@ -1,4 +1,9 @@
 from .base import Resource, UserRoles
+from .urls import Endpoint
+from .loader import BatchLoader
+
+
+USER = Endpoint("/users/{user_id}")
 
 
 # =======================================================
@@ -7,15 +12,24 @@ from .base import Resource, UserRoles
 class Users(Resource):
     def fetch(self,
               with_invited: bool = False,
-              with_roles:   list = (UserRoles.ADMIN, UserRoles.AGENT, UserRoles.COLLABORATOR)):
-        roles = ",".join([role.value[0] for role in with_roles])
-        return self._get("/users", with_invited=with_invited, with_roles=roles, type="user")
+              with_roles:   list = (UserRoles.ADMIN, UserRoles.AGENT, UserRoles.COLLABORATOR),
+              stream:       bool = False):  # Iterate users as they are decoded
+        return self._get("/users", stream="users" if stream else None,
+                         with_invited=with_invited, with_roles=with_roles, type="user")
 
     def get(self,
             user_id:     bool,
             max_tickets: False or int = 5  # False = all tickets
             ):
-        return self._get("/users/{user_id}".format(user_id=user_id), max_tickets=max_tickets)
+        return self._get(USER.format(user_id=user_id), max_tickets=max_tickets)
+
+    # Batched, memoized get(): loader.load(user_id) returns a Future, see BatchLoader
+    def loader(self,
+               max_tickets: False or int = 5,
+               max_workers: int          = 8,
+               window:      float        = 0.005):
+        return BatchLoader(lambda user_id: self.get(user_id, max_tickets=max_tickets),
+                           max_workers=max_workers, window=window)
 
     def create(self,
                email:    str,
@@ -58,4 +72,4 @@ class Users(Resource):
         if len(user.keys()) == 1:
             return  # No update called
 
-        return self._post("/users/{user_id}".format(user_id=user_id), data={"user": user})
+        return self._post(USER.format(user_id=user_id), data={"user": user})
@@ -0,0 +1,388 @@
+import collections
+import hmac
+import io
+import json
+import queue
+import threading
+import time
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+
+from .models import Model
+
+
+# Events SupportBee sends to webhooks. Reply events come as agent_reply/customer_reply, dispatched as reply.created
+EVENT_TYPES = (
+    "ticket.created",
+    "ticket.updated",
+    "ticket.archived",
+    "ticket.unarchived",
+    "ticket.assigned_to_user",
+    "ticket.assigned_to_team",
+    "ticket.unassigned",
+    "ticket.labeled",
+    "ticket.unlabeled",
+    "ticket.trashed",
+    "ticket.spammed",
+    "reply.created",
+    "comment.created",
+)
+
+EVENT_ALIASES = {
+    "agent_reply.created":    "reply.created",
+    "customer_reply.created": "reply.created",
+}
+
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class WebhookError(ValueError):
+    pass
+
+
+def _plain(item):
+    return item.to_dict() if isinstance(item, Model) else item
+
+
+# =======================================================
+# WebhookEvent - One parsed webhook delivery
+# =======================================================
+class WebhookEvent:
+    __slots__ = ("type", "ticket", "reply", "comment", "label", "ticket_id", "payload", "received_at")
+
+    def __init__(self, type, ticket=None, reply=None, comment=None, label=None, ticket_id=None, payload=None):
+        self.type = type
+        self.ticket = ticket        # Full ticket dict when the delivery has one
+        self.reply = reply
+        self.comment = comment
+        self.label = label
+        self.ticket_id = ticket_id
+        self.payload = payload      # The decoded body, as received
+        self.received_at = time.time()
+
+    def __repr__(self):
+        return "<WebhookEvent {type} ticket={ticket_id}>".format(type=self.type, ticket_id=self.ticket_id)
+
+
+def _ticket_id(data, ticket, message):
+    if ticket and ticket.get("id") is not None:
+        return ticket["id"]
+    for source in (message or {}, data):
+        if source.get("ticket_id") is not None:
+            return source["ticket_id"]
+        if isinstance(source.get("ticket"), dict) and source["ticket"].get("id") is not None:
+            return source["ticket"]["id"]
+    return None
+
+
+# Accepts {"action": "ticket.created", "payload": {"ticket": {...}}} and the same with "event"/"type" for the
+# action and "data" or the top level for the objects. `event_type` (e.g. from a header) is used when the body has none.
+def parse_event(body, event_type: str = None):
+    try:
+        payload = json.loads(body) if isinstance(body, (bytes, str)) else body
+    except ValueError as error:
+        raise WebhookError("Webhook body is not JSON: {error}".format(error=error)) from None
+    if not isinstance(payload, dict):
+        raise WebhookError("Webhook body must be a JSON object")
+
+    event_type = payload.get("action") or payload.get("event") or payload.get("type") or event_type
+    if not event_type:
+        raise WebhookError("Webhook body has no event type")
+    data = payload.get("payload") or payload.get("data") or payload
+    ticket = data.get("ticket") if isinstance(data.get("ticket"), dict) else None
+    reply = data.get("reply") or data.get("agent_reply") or data.get("customer_reply")
+    comment = data.get("comment")
+    ticket_id = _ticket_id(data, ticket, reply or comment)
+    if ticket_id is None:
+        raise WebhookError("Webhook {type} does not reference a ticket".format(type=event_type))
+    return WebhookEvent(EVENT_ALIASES.get(event_type, event_type), ticket=ticket, reply=reply, comment=comment,
+                        label=data.get("label"), ticket_id=ticket_id, payload=payload)
+
+
+# =======================================================
+# WebhookDispatcher - Runs the handlers of each event on a worker pool
+# =======================================================
+# Events of one ticket always go to the same worker, so they are handled in the order they arrived while
+# different tickets are handled in parallel. A failing handler never stops the others: its error is kept
+# in `errors` (the last 1000) and passed to `on_error(event, error)` when given.
+class WebhookDispatcher:
+    def __init__(self,
+                 max_workers: int = 4,
+                 queue_size:  int = 10000,  # Per worker; dispatch() blocks when full
+                 on_error=None):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.on_error = on_error
+        self.handlers = collections.defaultdict(list)  # event type or "*" -> [handler, ...]
+        self.errors = collections.deque(maxlen=1000)
+        self.handled = 0
+        self._queues = []
+        self._workers = []
+        self._lock = threading.Lock()
+
+    # dispatcher.on("reply.created", handler), or as a decorator: @dispatcher.on("ticket.created")
+    def on(self, event_type: str, handler=None):
+        if handler is None:
+            return lambda function: self.on(event_type, function)
+        self.handlers[event_type].append(handler)
+        return handler
+
+    def start(self):
+        with self._lock:
+            if self._workers:
+                return self
+            for _ in range(self.max_workers):
+                events = queue.Queue(maxsize=self.queue_size)
+                worker = threading.Thread(target=self._work, args=(events,), daemon=True)
+                self._queues.append(events)
+                self._workers.append(worker)
+                worker.start()
+        return self
+
+    def dispatch(self, event):
+        if not self._workers:
+            self.start()
+        self._queues[hash(event.ticket_id) % self.max_workers].put(event)
+
+    def handle(self, event):  # Runs the handlers in the calling thread
+        for handler in self.handlers.get(event.type, []) + self.handlers.get("*", []):
+            try:
+                handler(event)
+            except Exception as error:
+                self.errors.append((event, error))
+                if self.on_error is not None:
+                    self.on_error(event, error)
+        with self._lock:
+            self.handled += 1
+
+    def _work(self, events):
+        while True:
+            event = events.get()
+            try:
+                if event is None:
+                    return
+                self.handle(event)
+            finally:
+                events.task_done()
+
+    # Blocks until every event dispatched so far has been handled
+    def join(self):
+        for events in self._queues:
+            events.join()
+
+    def close(self):
+        for events in self._queues:
+            events.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._queues, self._workers = [], []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# =======================================================
+# StoreUpdater - Applies events to a TicketStore
+# =======================================================
+# Deliveries carrying the ticket replace it. Replies and comments add their text to the search index and, when
+# the delivery has no ticket, bump the ticket's counters and activity (a delivered ticket already counts them).
+# A ticket the store does not know yet is fetched with `api` when given, otherwise it is left to the next
+# reconciliation pass (see Reconciler) and counted in `missed`.
+class StoreUpdater:
+    def __init__(self, store, api=None):
+        self.store = store
+        self.api = api
+        self.missed = 0
+
+    def __call__(self, event):
+        applied = False
+        if event.ticket is not None:
+            applied = self.store.apply(event.ticket_id, lambda ticket: ticket.update(event.ticket))
+        if event.reply is not None or event.comment is not None:
+            applied = self._message(event)
+        elif event.ticket is None and event.label is not None and event.type in ("ticket.labeled",
+                                                                                 "ticket.unlabeled"):
+            applied = self.store.apply(event.ticket_id, lambda ticket: self._label(ticket, event))
+        if not applied:
+            self._fetch(event.ticket_id)
+
+    def _message(self, event):
+        message, counter = (event.reply, "replies_count") if event.reply is not None else \
+                           (event.comment, "comments_count")
+
+        def update(ticket):
+            if not ticket or event.ticket is not None:
+                return
+            ticket[counter] = (ticket.get(counter) or 0) + 1
+            activity = message.get("created_at")
+            if activity and activity > (ticket.get("last_activity_at") or ""):
+                ticket["last_activity_at"] = activity
+            replier = message.get("replier")
+            if event.reply is not None and replier is not None:
+                ticket["unanswered"] = not replier.get("agent", False)
+
+        return self.store.apply(event.ticket_id, update, text=((message.get("content") or {}).get("text")))
+
+    @staticmethod
+    def _label(ticket, event):
+        if not ticket:
+            return
+        name = event.label.get("name") if isinstance(event.label, dict) else event.label
+        labels = [label for label in ticket.get("labels") or () if label.get("name") != name]
+        if event.type == "ticket.labeled":
+            labels.append(event.label if isinstance(event.label, dict) else {"name": name})
+        ticket["labels"] = labels
+
+    def _fetch(self, ticket_id):
+        if self.api is None:
+            self.missed += 1
+            return
+        ticket = _plain((self.api.tickets.get(ticket_id) or {}).get("ticket"))
+        if ticket:
+            self.store.add((ticket,))
+        else:
+            self.missed += 1
+
+
+# =======================================================
+# Reconciler - Periodic polling pass behind the webhooks
+# =======================================================
+# Runs an IncrementalSync (with store=...) every `interval` seconds in a background thread to pick up what
+# webhooks missed (receiver downtime, dropped deliveries). Errors are kept in `errors`, the next pass retries.
+class Reconciler:
+    def __init__(self, sync, interval: float = 900):
+        self.sync = sync
+        self.interval = interval
+        self.errors = collections.deque(maxlen=100)
+        self.passes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        count = sum(1 for _ in self.sync.run())
+        self.passes += 1
+        return count
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as error:
+                self.errors.append(error)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+# =======================================================
+# WebhookReceiver - WSGI app turning POSTed deliveries into dispatched events
+# =======================================================
+# Mount it in any WSGI server, or run receiver.serve(port=8000) for the standard library one.
+# With `secret`, deliveries must carry it as ?secret=... in the webhook url (set in SupportBee's admin)
+# or in an X-Webhook-Secret header. Answers 202 as soon as the event is queued.
+class WebhookReceiver:
+    def __init__(self,
+                 dispatcher: WebhookDispatcher,
+                 secret:     str = None,
+                 path:       str = None):  # Default = any path
+        self.dispatcher = dispatcher
+        self.secret = secret
+        self.path = path
+        self.received = 0
+        self.rejected = 0
+
+    def _authorized(self, environ):
+        if self.secret is None:
+            return True
+        given = environ.get("HTTP_X_WEBHOOK_SECRET") or \
+            (parse_qs(environ.get("QUERY_STRING", "")).get("secret") or [""])[0]
+        return hmac.compare_digest(given.encode(), self.secret.encode())
+
+    def _read_body(self, environ):
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length > MAX_BODY_SIZE:
+            raise WebhookError("too large")
+        return environ["wsgi.input"].read(length) if length else b""
+
+    def __call__(self, environ, start_response):
+        status, message = self._receive(environ)
+        body = json.dumps({"status": message}).encode()
+        start_response(status, [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    def _receive(self, environ):
+        if self.path is not None and environ.get("PATH_INFO") != self.path:
+            return "404 Not Found", "not found"
+        if environ.get("REQUEST_METHOD") != "POST":
+            return "405 Method Not Allowed", "POST only"
+        if not self._authorized(environ):
+            self.rejected += 1
+            return "403 Forbidden", "bad secret"
+        try:
+            body = self._read_body(environ)
+        except WebhookError:
+            self.rejected += 1
+            return "413 Payload Too Large", "too large"
+        try:
+            event = parse_event(body, environ.get("HTTP_X_SUPPORTBEE_EVENT"))
+        except WebhookError as error:
+            self.rejected += 1
+            return "400 Bad Request", str(error)
+        self.dispatcher.dispatch(event)
+        self.received += 1
+        return "202 Accepted", "queued"
+
+    # Standard library server, one thread per delivery; returns the server, call serve_forever() on it
+    def server(self, host: str = "127.0.0.1", port: int = 8000):
+        class Server(ThreadingMixIn, WSGIServer):
+            daemon_threads = True
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        return make_server(host, port, self, server_class=Server, handler_class=QuietHandler)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8000):
+        with self.dispatcher, self.server(host, port) as server:
+            server.serve_forever()
+
+    # Feeds recorded deliveries (dicts, raw bytes bodies or paths of JSON files) through the app, in process.
+    # Returns the HTTP status of each one, e.g. to replay captured payloads in a test.
+    def replay(self, deliveries, event_type: str = None):
+        statuses = []
+        for delivery in deliveries:
+            if isinstance(delivery, dict):
+                body = json.dumps(delivery).encode()
+            elif isinstance(delivery, bytes):
+                body = delivery
+            else:
+                with open(delivery, "rb") as f:
+                    body = f.read()
+            environ = {"REQUEST_METHOD": "POST", "PATH_INFO": self.path or "/", "QUERY_STRING": "",
+                       "CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body)}
+            if event_type is not None:
+                environ["HTTP_X_SUPPORTBEE_EVENT"] = event_type
+            if self.secret is not None:
+                environ["HTTP_X_WEBHOOK_SECRET"] = self.secret
+            status = []
+            self(environ, lambda line, headers: status.append(int(line.split(" ", 1)[0])))
+            statuses.append(status[0])
+        return statuses
@@ -0,0 +1,16 @@
+import pytest
+
+from SupportBee import SupportBee
+from benchmarks.fake_server import FakeSupportBee
+
+
+@pytest.fixture
+def fake():
+    with FakeSupportBee() as server:
+        yield server
+
+
+@pytest.fixture
+def api(fake):
+    with SupportBee("test-token", fake.url) as client:
+        yield client
@@ -0,0 +1,52 @@
+import asyncio
+
+from SupportBee import AsyncSupportBee
+from benchmarks.fake_server import FakeSupportBee
+
+
+def run(main, **fake_options):
+    async def with_client(fake):
+        async with AsyncSupportBee("test-token", fake.url) as api:
+            return await main(api)
+
+    with FakeSupportBee(**fake_options) as fake:
+        return asyncio.run(with_client(fake)), fake
+
+
+def test_get():
+    async def main(api):
+        return await api.tickets.get(7)
+
+    result, fake = run(main)
+    assert result["ticket"]["id"] == 7
+    assert fake.requests == 1
+
+
+def test_iter_fetch_follows_pages():
+    async def main(api):
+        return [ticket["id"] async for ticket in api.tickets.iter_fetch(per_page=100)]
+
+    ids, fake = run(main, tickets=250)
+    assert ids == list(range(1, 251))
+    assert fake.requests == 3
+
+
+def test_iter_fetch_with_prefetch_and_stream():
+    async def main(api):
+        prefetched = [ticket["id"] async for ticket in api.tickets.iter_fetch(per_page=40, prefetch=True)]
+        streamed = [ticket["id"] async for ticket in api.tickets.iter_fetch(per_page=40, stream=True)]
+        return prefetched, streamed
+
+    (prefetched, streamed), _ = run(main, tickets=90)
+    assert prefetched == streamed == list(range(1, 91))
+
+
+def test_create():
+    async def main(api):
+        return await asyncio.gather(api.tickets.create("Refund", "Ada", "ada@example.com", "Please"),
+                                    api.replies.create(7, "Done"),
+                                    api.comments.create(7, "Checked"))
+
+    results, fake = run(main)
+    assert results == [{}, {}, {}]
+    assert fake.requests == 3
@@ -0,0 +1,47 @@
+import tracemalloc
+
+from benchmarks.fake_server import file_chunks
+
+SIZE = 32 * 1024 * 1024
+LIMIT = 4 * 1024 * 1024  # Peak Python allocations allowed while moving SIZE bytes
+
+
+class CountingSink:
+    def __init__(self):
+        self.written = 0
+
+    def write(self, chunk):
+        self.written += len(chunk)
+        return len(chunk)
+
+
+def peak_memory(function):
+    tracemalloc.start()
+    try:
+        result = function()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_download_streams_in_bounded_memory(fake, api):
+    sink = CountingSink()
+    url = fake.url + "/attachments/1/download?size={size}".format(size=SIZE)
+    written, peak = peak_memory(lambda: api.attachments.download(url, sink))
+    assert written == sink.written == SIZE
+    assert peak < LIMIT
+
+
+def test_upload_streams_in_bounded_memory(fake, api):
+    response, peak = peak_memory(lambda: api.attachments.create("big.bin", file_chunks(SIZE)))
+    assert response["attachment"]["size"] > SIZE  # File plus multipart framing
+    assert peak < LIMIT
+
+
+def test_download_query_is_sent_as_query(fake, api):
+    query = "method=DELETE&endpoint=/x&stream=0&body=b&files=f&data=d&params=p&signature=abc&empty="
+    url = fake.url + "/attachments/2/download?size=10&" + query
+    assert b"".join(api.attachments.download(url)) == b"x" * 10
+    assert fake.downloads == [{"auth_token": "test-token", "size": "10", "method": "DELETE", "endpoint": "/x",
+                               "stream": "0", "body": "b", "files": "f", "data": "d", "params": "p",
+                               "signature": "abc"}]
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+from endpoints.bulk import BulkOperations, AsyncBulkOperations
+
+
+# Tickets and Labels stand-in recording each call; ticket ids in `failing` raise
+class Recorder:
+    def __init__(self, failing=(), delay=0.0):
+        self.failing = set(failing)
+        self.delay = delay
+        self.calls = []
+        self.running = self.max_running = 0
+        self.in_flight = set()  # Tickets with an operation running
+        self.overlaps = 0       # Operations started while another one of the same ticket was running
+        self._lock = threading.Lock()
+
+    def _enter(self, operation, ticket_id, args):
+        with self._lock:
+            self.calls.append((ticket_id, operation) + args)
+            self.overlaps += ticket_id in self.in_flight
+            self.in_flight.add(ticket_id)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def _exit(self, operation, ticket_id):
+        with self._lock:
+            self.running -= 1
+            self.in_flight.discard(ticket_id)
+        if ticket_id in self.failing:
+            raise ConnectionError("{operation} failed".format(operation=operation))
+        return {"ok": operation}
+
+    def __getattr__(self, operation):
+        def call(ticket_id, *args):
+            self._enter(operation, ticket_id, args)
+            time.sleep(self.delay)
+            return self._exit(operation, ticket_id)
+        return call
+
+    def calls_of(self, ticket_id):
+        return [call[1:] for call in self.calls if call[0] == ticket_id]
+
+
+class AsyncRecorder(Recorder):
+    def __getattr__(self, operation):
+        async def call(ticket_id, *args):
+            self._enter(operation, ticket_id, args)
+            await asyncio.sleep(self.delay)
+            return self._exit(operation, ticket_id)
+        return call
+
+
+def test_operations_on_the_same_state_are_deduplicated():
+    recorder = Recorder()
+    bulk = BulkOperations(recorder, recorder)
+    bulk.archive([1, 2]).unarchive([1])
+    bulk.addLabel([1], "a").addLabel([1], "b").removeLabel([1], "a")
+    bulk.star([1]).star([1])
+    assert len(bulk) == 5
+
+    report = bulk.run()
+    assert report.deduplicated == 3
+    assert sorted(recorder.calls) == sorted([(1, "unarchive"), (2, "archive"), (1, "addLabel", "b"),
+                                             (1, "removeLabel", "a"), (1, "star")])
+    assert len(bulk) == 0  # Queue emptied by run()
+
+
+def test_operations_of_a_ticket_run_in_queue_order():
+    recorder = Recorder(delay=0.01)
+    bulk = BulkOperations(recorder, recorder, max_workers=4)
+    tickets = [1, 2, 3, 4]
+    bulk.markAsSpam(tickets).addLabel(tickets, "junk").archive(tickets).delete(tickets)
+
+    report = bulk.run()
+    assert report.ok and len(report) == 16
+    for ticket_id in tickets:
+        assert recorder.calls_of(ticket_id) == [("markAsSpam",), ("addLabel", "junk"), ("archive",), ("delete",)]
+    assert recorder.overlaps == 0
+    assert recorder.max_running > 1  # Tickets still run concurrently
+    assert [(result.operation, result.ticket_id) for result in report][:4] == \
+        [("markAsSpam", 1), ("markAsSpam", 2), ("markAsSpam", 3), ("markAsSpam", 4)]
+
+
+def test_requeued_operation_moves_to_the_end():
+    recorder = Recorder()
+    BulkOperations(recorder, recorder).archive([1]).delete([1]).unarchive([1]).run()
+    assert recorder.calls_of(1) == [("delete",), ("unarchive",)]
+
+
+def test_partial_failure_report():
+    recorder = Recorder(failing={2})
+    report = BulkOperations(recorder, recorder).archive([1, 2, 3]).star([2, 3]).run()
+
+    assert not report.ok
+    assert [(result.operation, result.ticket_id) for result in report.failed] == [("archive", 2), ("star", 2)]
+    assert [(result.operation, result.ticket_id) for result in report.succeeded] == \
+        [("archive", 1), ("archive", 3), ("star", 3)]
+    assert isinstance(report.failed[0].error, ConnectionError)
+    assert report.succeeded[0].response == {"ok": "archive"}
+    assert repr(report) == "<BulkReport 3 ok, 2 failed, 0 deduplicated>"
+
+
+def test_async_operations_of_a_ticket_run_in_queue_order():
+    recorder = AsyncRecorder(failing={3}, delay=0.01)
+    bulk = AsyncBulkOperations(recorder, recorder, max_workers=4)
+    tickets = [1, 2, 3]
+    bulk.archive(tickets).addLabel(tickets, "done").delete(tickets)
+
+    report = asyncio.run(bulk.run())
+    for ticket_id in tickets:
+        assert recorder.calls_of(ticket_id) == [("archive",), ("addLabel", "done"), ("delete",)]
+    assert recorder.overlaps == 0
+    assert recorder.max_running > 1
+    assert [result.ticket_id for result in report.failed] == [3, 3, 3]
+    assert [(result.operation, result.ticket_id) for result in report][:3] == \
+        [("archive", 1), ("archive", 2), ("archive", 3)]
@@ -0,0 +1,58 @@
+from SupportBee import SupportBee, ResponseCache
+from benchmarks.fake_server import REFERENCE_DATA
+
+
+def client(fake, cache, **kwargs):
+    return SupportBee("test-token", fake.url, cache=cache, **kwargs)
+
+
+def test_fresh_entry_is_served_without_a_request(fake):
+    cache = ResponseCache()
+    with client(fake, cache) as api:
+        first = api.labels.fetch()
+        assert api.labels.fetch() == first == REFERENCE_DATA["/labels"]
+    assert fake.requests == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entry_is_revalidated_with_its_etag(fake):
+    cache = ResponseCache(ttls={})  # Every read revalidates
+    with client(fake, cache) as api:
+        first = api.labels.fetch()
+        assert api.labels.fetch() is first
+    assert fake.requests == 2
+    assert fake.not_modified == 1
+    stats = cache.stats()
+    assert stats["revalidated"] == 1
+    assert stats["bytes_saved"] > 0
+
+
+# Drops every entry right before the conditional request leaves, as if it had been evicted meanwhile
+class Evictor:
+    def __init__(self, cache):
+        self.cache = cache
+
+    def before_request(self, event):
+        self.cache.clear()
+
+
+def test_304_for_an_evicted_entry_downloads_it_again(fake):
+    cache = ResponseCache(ttls={})
+    with client(fake, cache) as api:
+        api.labels.fetch()
+        api.hooks.add(Evictor(cache))
+        assert api.labels.fetch() == REFERENCE_DATA["/labels"]
+    assert fake.not_modified == 1
+    assert fake.requests == 3  # Download, 304, download again without validators
+
+
+def test_writes_invalidate_the_collection(fake):
+    cache = ResponseCache()
+    with client(fake, cache) as api:
+        api.snippets.fetch()
+        api.snippets.fetch()
+        api.snippets.update(1, name="renamed")
+        assert api.snippets.fetch() == REFERENCE_DATA["/snippets"]
+    assert fake.requests == 3  # fetch, update, fetch again
+    assert fake.not_modified == 0
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,41 @@
+import io
+import logging
+
+from SupportBee import SupportBee, MetricsCollector
+
+
+class FailingHook:
+    def before_request(self, event):
+        raise RuntimeError("before")
+
+    def after_response(self, event):
+        raise RuntimeError("after")
+
+
+def test_events_carry_the_route_template(fake):
+    metrics = MetricsCollector()
+    with SupportBee("test-token", fake.url, hooks=[metrics]) as api:
+        for ticket_id in (1, 2, 3):
+            api.tickets.get(ticket_id)
+            api.replies.fetch(ticket_id)
+        api.labels.fetch()
+        api.labels.addLabel(4, "to do")
+        api.attachments.download(fake.url + "/attachments/9/download?size=10", io.BytesIO())
+    stats = metrics.stats()
+    assert stats["GET /tickets/{ticket_id}"]["requests"] == 3
+    assert stats["GET /tickets/{ticket_id}/replies"]["requests"] == 3
+    assert stats["GET /labels"]["requests"] == 1
+    assert stats["POST /tickets/{ticket_id}/labels/{label_name}"]["requests"] == 1
+    assert stats["GET /attachments/{id}/download"]["requests"] == 1
+
+
+def test_failing_hook_does_not_fail_the_call(fake, caplog):
+    metrics = MetricsCollector()
+    with SupportBee("test-token", fake.url, hooks=[FailingHook(), metrics]) as api:
+        with caplog.at_level(logging.ERROR, logger="SupportBee.hooks"):
+            assert api.tickets.get(1)["ticket"]["id"] == 1
+        assert api.hooks.errors == 2
+    assert len(caplog.records) == 2
+    stats = metrics.stats()["GET /tickets/{ticket_id}"]
+    assert stats["requests"] == 1
+    assert stats["errors"] == 0  # The hook failure is not reported as a failed request
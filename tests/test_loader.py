@@ -0,0 +1,130 @@
+import asyncio
+import threading
+
+import pytest
+
+from SupportBee import BatchLoader
+from endpoints.loader import AsyncBatchLoader
+
+
+class Flaky:
+    def __init__(self, failures=1):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, key):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("down")
+        return {"id": key}
+
+
+def test_results_are_memoized():
+    with BatchLoader(lambda key: {"id": key}) as loader:
+        assert loader.get_many([1, 2, 1]) == [{"id": 1}, {"id": 2}, {"id": 1}]
+        assert loader.load(1) is loader.load(1)
+
+
+def test_failed_lookup_is_forgotten():
+    load_one = Flaky()
+    with BatchLoader(load_one) as loader:
+        with pytest.raises(ConnectionError):
+            loader.get(1)
+        assert 1 not in loader._futures
+        assert loader.get(1) == {"id": 1}
+    assert load_one.calls == 2
+
+
+def test_future_cancelled_before_its_batch_is_forgotten():
+    calls = []
+    with BatchLoader(lambda key: calls.append(key) or key, window=60) as loader:
+        future = loader.load(1)
+        assert future.cancel()
+        assert 1 not in loader._futures
+
+        again = loader.load(1)
+        assert again is not future
+        loader.dispatch()
+        assert again.result(timeout=5) == 1
+    assert calls == [1]  # The cancelled lookup was never sent
+
+
+def test_future_cancelled_while_resolving():
+    started, release = threading.Event(), threading.Event()
+
+    def load_one(key):
+        started.set()
+        release.wait(5)
+        return key
+
+    with BatchLoader(load_one, window=0) as loader:
+        future = loader.load(1)
+        started.wait(5)
+        assert not future.cancel()  # Running lookups finish, like executor futures
+        release.set()
+        assert future.result(timeout=5) == 1
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_async_failed_lookup_is_forgotten():
+    calls = []
+
+    async def load_one(key):
+        calls.append(key)
+        if len(calls) == 1:
+            raise ConnectionError("down")
+        return {"id": key}
+
+    async def main():
+        async with AsyncBatchLoader(load_one) as loader:
+            with pytest.raises(ConnectionError):
+                await loader.get(1)
+            await asyncio.sleep(0)
+            assert 1 not in loader._futures
+            return await loader.get(1)
+
+    assert run(main()) == {"id": 1}
+    assert calls == [1, 1]
+
+
+def test_async_cancelled_lookup_is_forgotten():
+    gate = None
+
+    async def load_one(key):
+        await gate.wait()
+        return {"id": key}
+
+    async def main():
+        nonlocal gate
+        gate = asyncio.Event()
+        async with AsyncBatchLoader(load_one) as loader:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(loader.load(1), 0.01)  # Cancels the memoized future
+            await asyncio.sleep(0)
+            assert 1 not in loader._futures
+
+            future = loader.load(1)
+            assert not future.done()
+            gate.set()
+            return await future
+
+    assert run(main()) == {"id": 1}
+
+
+def test_async_cancelled_before_its_batch_is_skipped():
+    calls = []
+
+    async def load_one(key):
+        calls.append(key)
+        return key
+
+    async def main():
+        async with AsyncBatchLoader(load_one) as loader:
+            loader.load(1).cancel()
+            assert await loader.get(2) == 2
+
+    run(main())
+    assert calls == [2]
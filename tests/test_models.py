@@ -0,0 +1,44 @@
+import pytest
+
+from SupportBee import SupportBee
+from endpoints.models import Ticket, User
+from benchmarks.fake_server import make_ticket
+
+
+def test_model_matches_the_decoded_dict():
+    data = make_ticket(7)
+    ticket = Ticket(data)
+    assert ticket.to_dict() == data
+    assert dict(ticket.items()) == data
+    assert sorted(ticket) == sorted(data)
+    assert len(ticket) == len(data)
+    assert ticket.values() == [data[key] for key in ticket.keys()]
+
+
+def test_null_keys_are_kept_and_missing_keys_are_not():
+    user = User({"id": 3, "name": None, "nickname": None})
+    assert user.to_dict() == {"id": 3, "name": None, "nickname": None}
+    assert "name" in user and "nickname" in user
+    assert "email" not in user
+    assert user.get("name", "unknown") is None
+    assert user.get("email", "unknown") == "unknown"
+    assert user.email is None  # Attribute access still gives None for any declared field
+    assert len(user) == 3
+    with pytest.raises(KeyError):
+        user["email"]
+
+
+def test_null_nested_object_is_kept():
+    ticket = Ticket(dict(make_ticket(1), current_team_assignee=None, requester=None))
+    assert "current_team_assignee" in ticket and "requester" in ticket
+    assert ticket.requester is None
+    assert ticket.to_dict()["requester"] is None
+
+
+def test_models_client_returns_dict_compatible_objects(fake, api):
+    plain = api.tickets.get(5)["ticket"]
+    with SupportBee("test-token", fake.url, models=True) as models_api:
+        ticket = models_api.tickets.get(5)["ticket"]
+    assert isinstance(ticket, Ticket)
+    assert {key: value for key, value in ticket.items()} == plain
+    assert "current_team_assignee" in ticket
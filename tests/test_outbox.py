@@ -0,0 +1,57 @@
+import queue
+
+import pytest
+
+from SupportBee import Outbox
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return str(tmp_path / "outbox.db")
+
+
+def test_spool_path_is_required(api):
+    with pytest.raises(TypeError):
+        Outbox(api)
+
+
+def test_queued_messages_survive_a_restart(api, fake, spool):
+    box = Outbox(api, spool)
+    keys = [box.reply(ticket_id, "hello") for ticket_id in (1, 2, 3)]
+    box.close(drain=False)
+    assert fake.requests == 0
+
+    done = []
+    with Outbox(api, spool, on_done=done.append) as box:
+        assert box.join(10)
+        assert [box.status(key).state for key in keys] == ["delivered"] * 3
+    assert sorted(status.ticket_id for status in done) == [1, 2, 3]
+    assert fake.requests == 3
+
+
+def test_keys_are_deduplicated(api, fake, spool):
+    box = Outbox(api, spool)
+    key = box.comment(1, "once", key="welcome:1")
+    assert box.comment(1, "twice", key="welcome:1") == key
+    assert box.counts()["queued"] == 1
+    box.start()
+    assert box.join(10)
+
+    box.comment(1, "again", key="welcome:1")  # Delivered keys are never sent again
+    assert box.join(10)
+    box.close()
+    assert fake.requests == 1
+
+
+def test_backpressure(api, spool):
+    box = Outbox(api, spool, max_pending=2)
+    box.reply(1, "a")
+    box.reply(2, "b")
+    with pytest.raises(queue.Full):
+        box.reply(3, "c", timeout=0.05)
+
+    box.start()
+    box.reply(3, "c", timeout=10)
+    assert box.join(10)
+    assert box.counts()["delivered"] == 3
+    box.close()
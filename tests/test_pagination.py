@@ -0,0 +1,52 @@
+from SupportBee import SupportBee, SortByOptions
+from benchmarks.fake_server import FakeSupportBee
+
+
+def test_export_yields_every_ticket_once():
+    with FakeSupportBee(tickets=250) as fake, SupportBee("test-token", fake.url) as api:
+        pages = list(api.tickets.export(per_page=100, max_workers=4))
+    assert [page for page, _ in pages] == [1, 2, 3]
+    ids = [ticket["id"] for _, tickets in pages for ticket in tickets]
+    assert sorted(ids) == list(range(1, 251))
+
+
+def test_export_sorts_by_creation_time_and_follows_shifted_pages(api):
+    calls = []
+
+    # Sized at 4 tickets, then a ticket created after page 1 was read pushes ticket 2 onto page 2
+    # and ticket 4 onto a third page
+    pages = {1: [{"id": 1}, {"id": 2}], 2: [{"id": 2}, {"id": 3}], 3: [{"id": 4}]}
+
+    def fetch(per_page=100, page=1, total_only=None, **kwargs):
+        calls.append(kwargs)
+        if total_only:
+            return {"total": 4}
+        return {"tickets": pages.get(page, [])}
+
+    api.tickets.fetch = fetch
+    exported = list(api.tickets.export(per_page=2, max_workers=1))
+    assert exported == [(1, [{"id": 1}, {"id": 2}]), (2, [{"id": 3}]), (3, [{"id": 4}])]
+    assert all(call["sort_by"] is SortByOptions.CREATION_TIME for call in calls)
+
+
+def test_export_stops_at_an_empty_page(api):
+    fetched = []
+
+    def fetch(per_page=100, page=1, total_only=None, **kwargs):
+        if total_only:
+            return {"total": 4}
+        fetched.append(page)
+        return {"tickets": [{"id": n} for n in range(page * 2 - 1, page * 2 + 1)] if page <= 2 else []}
+
+    api.tickets.fetch = fetch
+    exported = list(api.tickets.export(per_page=2, max_workers=1))
+    assert [ticket["id"] for _, tickets in exported for ticket in tickets] == [1, 2, 3, 4]
+    assert sorted(fetched) == [1, 2, 3]
+
+
+def test_export_keeps_an_explicit_sort(api):
+    calls = []
+    api.tickets.fetch = lambda per_page=100, page=1, total_only=None, **kwargs: \
+        calls.append(kwargs) or {"total": 0}
+    list(api.tickets.export(sort_by=SortByOptions.LAST_ACTIVITY))
+    assert calls == [{"sort_by": SortByOptions.LAST_ACTIVITY}] * 2  # Sizing, then the first page
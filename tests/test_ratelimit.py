@@ -0,0 +1,67 @@
+import time
+
+from SupportBee import RateLimiter, RetryPolicy, Transport
+
+
+class ScriptedResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+
+# Answers each request with the next (status, headers) of the script
+class ScriptedTransport(Transport):
+    def __init__(self, script, **kwargs):
+        super().__init__(**kwargs)
+        self.script = list(script)
+        self.sent = 0
+
+    def send(self, method, url, headers=None, json=None, files=None, body=None, stream=False, timeout=None):
+        self.sent += 1
+        return ScriptedResponse(*self.script.pop(0))
+
+
+def test_throttles_do_not_use_up_the_retry_budget():
+    throttled = (429, {"Retry-After": "0"})
+    transport = ScriptedTransport([throttled, throttled, throttled, (500,), (200,)],
+                                  rate_limiter=RateLimiter(max_retries=5),
+                                  retry_policy=RetryPolicy(max_attempts=2, backoff=0.0))
+    assert transport.request("GET", "http://localhost/tickets").status_code == 200
+    assert transport.sent == 5
+
+
+def test_throttle_resends_are_bounded_by_the_rate_limiter():
+    throttled = (429, {"Retry-After": "0"})
+    transport = ScriptedTransport([throttled] * 4, rate_limiter=RateLimiter(max_retries=2))
+    assert transport.request("GET", "http://localhost/tickets").status_code == 429
+    assert transport.sent == 3
+
+
+def test_retry_after_past_the_deadline_returns_the_throttled_response():
+    transport = ScriptedTransport([(429, {"Retry-After": "30"}), (200,)],
+                                  retry_policy=RetryPolicy(deadline=1.0))
+    started = time.monotonic()
+    assert transport.request("GET", "http://localhost/tickets").status_code == 429
+    assert time.monotonic() - started < 1.0
+    assert transport.sent == 1
+
+
+def test_post_without_opt_in_is_not_resent_on_503():
+    transport = ScriptedTransport([(503, {"Retry-After": "0"}), (200,)])
+    assert transport.request("POST", "http://localhost/tickets").status_code == 503
+    assert transport.sent == 1
+
+
+def test_post_is_resent_on_429():
+    transport = ScriptedTransport([(429, {"Retry-After": "0"}), (200,)])
+    assert transport.request("POST", "http://localhost/tickets").status_code == 200
+    assert transport.sent == 2
+
+
+def test_post_with_opt_in_is_resent_on_503():
+    transport = ScriptedTransport([(503, {"Retry-After": "0"}), (200,)])
+    assert transport.request("POST", "http://localhost/tickets", idempotent=True).status_code == 200
+    assert transport.sent == 2
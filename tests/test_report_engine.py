@@ -0,0 +1,137 @@
+import asyncio
+import datetime
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from SupportBee import DataPointType
+from endpoints.report_engine import split_range, ReportFrame, ReportQuery, ReportsEngine, AsyncReportsEngine
+
+
+def days(value):
+    return datetime.date.fromisoformat(value)
+
+
+@pytest.mark.parametrize("since, until, period, expected", [
+    ("2024-03-05", "2024-03-05", "day", [("2024-03-05", "2024-03-05")]),
+    ("2024-03-05", "2024-03-05", "week", [("2024-03-05", "2024-03-05")]),
+    ("2024-03-06", "2024-03-05", "week", []),
+    # 2024-03-04 is a Monday: the first week is whole, the last one partial
+    ("2024-03-04", "2024-03-12", "week", [("2024-03-04", "2024-03-10"), ("2024-03-11", "2024-03-12")]),
+    ("2024-03-10", "2024-03-11", "week", [("2024-03-10", "2024-03-10"), ("2024-03-11", "2024-03-11")]),
+    ("2023-12-30", "2024-01-02", "week", [("2023-12-30", "2023-12-31"), ("2024-01-01", "2024-01-02")]),
+    ("2024-01-31", "2024-03-01", "month", [("2024-01-31", "2024-01-31"), ("2024-02-01", "2024-02-29"),
+                                           ("2024-03-01", "2024-03-01")]),
+    ("2023-02-15", "2023-03-01", "month", [("2023-02-15", "2023-02-28"), ("2023-03-01", "2023-03-01")]),
+    ("2024-02-28", "2024-03-01", "day", [("2024-02-28", "2024-02-28"), ("2024-02-29", "2024-02-29"),
+                                         ("2024-03-01", "2024-03-01")]),
+])
+def test_split_range(since, until, period, expected):
+    assert split_range(since, until, period) == [(days(start), days(end)) for start, end in expected]
+
+
+def test_split_range_accepts_dates_and_timestamps():
+    assert split_range(datetime.datetime(2024, 3, 4, 23, 59), datetime.date(2024, 3, 5), "day") == \
+        [(days("2024-03-04"), days("2024-03-04")), (days("2024-03-05"), days("2024-03-05"))]
+    assert split_range("2024-03-04T10:00:00Z", "2024-03-04T23:00:00Z") == [(days("2024-03-04"), days("2024-03-04"))]
+
+
+def test_split_range_rejects_unknown_periods():
+    with pytest.raises(ValueError):
+        split_range("2024-03-04", "2024-03-05", "year")
+
+
+# Reports stand-in counting the requests made for each window
+class Reports:
+    def __init__(self):
+        self.api = SimpleNamespace(BASE_URL="https://acme.supportbee.com")
+        self.calls = []
+
+    def get(self, data_points_type, since=None, until=None, **dimension):
+        self.calls.append((data_points_type, since, until))
+        return {"data_points": [[since, len(self.calls)]]}
+
+
+class AsyncReports(Reports):
+    async def get(self, data_points_type, since=None, until=None, **dimension):
+        return Reports.get(self, data_points_type, since, until, **dimension)
+
+
+def utc_today():
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+def test_past_windows_are_cached_and_the_current_one_is_not():
+    today = utc_today()
+    reports = Reports()
+    engine = ReportsEngine(reports, max_workers=2)
+    since = today - datetime.timedelta(days=2)
+
+    first = engine.fetch([DataPointType.TICKETS_COUNT], since, today, period="day")
+    assert len(reports.calls) == 3 and (engine.fetched, engine.cached) == (3, 0)
+
+    second = engine.fetch([DataPointType.TICKETS_COUNT], since, today, period="day")
+    assert reports.calls[3:] == [("tickets_count", today.isoformat(), today.isoformat())]
+    assert (engine.fetched, engine.cached) == (4, 2)
+    assert second.columns["value"][:2] == first.columns["value"][:2]
+    assert second.columns["value"][2] != first.columns["value"][2]  # Today's window was fetched again
+
+
+def test_windows_ending_after_today_are_not_cached():
+    today = utc_today()
+    reports = Reports()
+    engine = ReportsEngine(reports)
+    window = [ReportQuery("replies_count", "user", 7, today - datetime.timedelta(days=1),
+                          today + datetime.timedelta(days=1))]
+    engine.fetch_matrix(window)
+    engine.fetch_matrix(window)
+    assert len(reports.calls) == 2 and engine.cached == 0
+
+
+def test_async_engine_caches_past_windows():
+    today = utc_today()
+    reports = AsyncReports()
+    engine = AsyncReportsEngine(reports)
+    since = today - datetime.timedelta(days=1)
+
+    async def main():
+        await engine.fetch(["tickets_count"], since, today, period="day", teams=[1, 2])
+        return await engine.fetch(["tickets_count"], since, today, period="day", teams=[1, 2])
+
+    frame = asyncio.run(main())
+    assert len(frame) == 4
+    assert len(reports.calls) == 6 and engine.cached == 2
+
+
+def make_frame():
+    frame = ReportFrame()
+    frame.append(ReportQuery("tickets_count", "user", 7, "2024-03-04", "2024-03-10"),
+                 {"data_points": [[1, 2], {"x": 2, "y": 3}]})
+    frame.append(ReportQuery("tickets_count", "user", 8, "2024-03-04", "2024-03-10"), {})
+    return frame
+
+
+def test_frame_rows_and_aggregate():
+    frame = make_frame()
+    assert len(frame) == 3
+    assert frame.rows()[2] == {"data_points_type": "tickets_count", "dimension": "user", "dimension_id": 8,
+                               "since": "2024-03-04", "until": "2024-03-10", "timestamp": None, "value": None}
+    assert frame.aggregate() == {("tickets_count", "user", 7): 5}
+
+
+def test_frame_without_pandas_or_numpy_falls_back_to_columns(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pandas", None)
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    frame = make_frame()
+    assert frame.to_native() is frame.columns
+    with pytest.raises(ImportError):
+        frame.to_pandas()
+    with pytest.raises(ImportError):
+        frame.to_numpy()
+
+
+def test_frame_prefers_pandas(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pandas", SimpleNamespace(DataFrame=lambda columns: ("DataFrame", columns)))
+    frame = make_frame()
+    assert frame.to_native() == ("DataFrame", frame.columns)
@@ -0,0 +1,126 @@
+import random
+import time
+
+import pytest
+import requests
+
+from SupportBee import SupportBee, RetryPolicy, Transport
+from benchmarks.fake_server import FakeSupportBee
+from endpoints.retry import cap_timeout
+
+
+def test_backoff_doubles_up_to_the_cap():
+    policy = RetryPolicy(max_attempts=8, backoff=0.5, max_backoff=3.0, jitter=False)
+    started = time.monotonic()
+    assert [policy.next_delay(attempt, started) for attempt in range(8)] == [0.5, 1.0, 2.0, 3.0, 3.0, 3.0, 3.0, None]
+
+
+def test_jitter_stays_within_the_backoff():
+    random.seed(1)
+    policy = RetryPolicy(max_attempts=10, backoff=1.0, max_backoff=4.0)
+    started = time.monotonic()
+    for attempt, cap in ((0, 1.0), (1, 2.0), (5, 4.0)):
+        delays = [policy.next_delay(attempt, started) for _ in range(500)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert max(delays) > cap * 0.9 and min(delays) < cap * 0.1
+
+
+def test_deadline_expiry():
+    policy = RetryPolicy(backoff=1.0, jitter=False, deadline=2.0)
+    now = time.monotonic()
+    assert policy.next_delay(0, now) == 1.0
+    assert policy.next_delay(0, now - 1.5) is None  # The delay would end past the deadline
+    assert not policy.expired(now)
+    assert policy.expired(now - 2.5)
+    assert 1.9 < policy.remaining(now) <= 2.0
+    assert policy.remaining(now - 5) == 0.001
+    assert RetryPolicy().remaining(now) is None
+
+
+@pytest.mark.parametrize("timeout, budget, expected", [
+    ((5, 30), None, (5, 30)),
+    ((5, 30), 2.0, (2.0, 2.0)),
+    ((5, 30), 10.0, (5, 10.0)),
+    (None, 1.5, 1.5),
+    (3, 1.5, 1.5),
+])
+def test_cap_timeout(timeout, budget, expected):
+    assert cap_timeout(timeout, budget) == expected
+
+
+@pytest.mark.parametrize("method, retryable", [
+    ("GET", True), ("HEAD", True), ("OPTIONS", True), ("PUT", True), ("DELETE", True), ("delete", True),
+    ("POST", False), ("PATCH", False),
+])
+def test_idempotent_methods_are_retried(method, retryable):
+    policy = RetryPolicy()
+    assert policy.allows(method) is retryable
+    assert policy.allows(method, idempotent=True) is True
+    assert policy.allows(method, idempotent=False) is False
+
+
+class OkResponse:
+    status_code = 200
+    headers = {}
+    content = b"{}"
+    text = "{}"
+
+    def close(self):
+        pass
+
+
+# Records the idempotent flag each call reaches the transport with
+class FlagTransport(Transport):
+    def __init__(self):
+        super().__init__()
+        self.flags = []
+
+    def request(self, method, url, idempotent=None, **kwargs):
+        self.flags.append((method, self.retry_policy.allows(method, idempotent)))
+        return OkResponse()
+
+
+@pytest.mark.parametrize("call, expected", [
+    (lambda api: api.tickets.get(1), ("GET", True)),
+    (lambda api: api.tickets.delete(1), ("DELETE", True)),
+    (lambda api: api.tickets.archive(1), ("POST", True)),
+    (lambda api: api.tickets.create("s", "n", "e@example.com", "c"), ("POST", False)),
+    (lambda api: api.tickets.create("s", "n", "e@example.com", "c", retry=True), ("POST", True)),
+    (lambda api: api.replies.create(1, "c"), ("POST", False)),
+    (lambda api: api.replies.create(1, "c", retry=True), ("POST", True)),
+    (lambda api: api.comments.create(1, "c"), ("POST", False)),
+    (lambda api: api.comments.create(1, "c", retry=True), ("POST", True)),
+])
+def test_writes_retry_only_when_idempotent_or_opted_in(call, expected):
+    transport = FlagTransport()
+    call(SupportBee("test-token", "https://example.supportbee.com", transport=transport))
+    assert transport.flags == [expected]
+
+
+class TimeoutRecorder(Transport):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.timeouts = []
+
+    def send(self, method, url, headers=None, json=None, files=None, body=None, stream=False, timeout=None):
+        self.timeouts.append(timeout)
+        return OkResponse()
+
+
+def test_attempts_get_what_is_left_of_the_deadline():
+    transport = TimeoutRecorder(retry_policy=RetryPolicy(deadline=1.0))
+    transport.request("GET", "http://localhost/tickets")
+    assert 0.9 < transport.timeouts[0] <= 1.0
+
+    transport = TimeoutRecorder()
+    transport.request("GET", "http://localhost/tickets")
+    assert transport.timeouts == [None]
+
+
+def test_deadline_cuts_a_slow_read_short():
+    with FakeSupportBee(latency=3.0) as fake, \
+            SupportBee("test-token", fake.url, retry_policy=RetryPolicy(deadline=0.3)) as api:
+        started = time.monotonic()
+        with pytest.raises(requests.exceptions.Timeout):
+            api.tickets.get(1)
+        assert time.monotonic() - started < 1.5
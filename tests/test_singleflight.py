@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from endpoints.singleflight import SingleFlight, AsyncSingleFlight
+
+
+# Runs `callers` concurrent do() calls while the leader's function is held, then lets it finish
+def run_together(flight, function, callers=3):
+    release, calls = threading.Event(), []
+
+    def held():
+        calls.append(1)
+        release.wait(5)
+        return function()
+
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        futures = [executor.submit(flight.do, "key", held)]
+        while flight.in_flight == 0:
+            time.sleep(0.001)
+        futures += [executor.submit(flight.do, "key", held) for _ in range(callers - 1)]
+        while flight.collapsed < callers - 1:
+            time.sleep(0.001)
+        release.set()
+    return futures, calls
+
+
+def test_concurrent_callers_share_one_request():
+    flight = SingleFlight()
+    futures, calls = run_together(flight, lambda: {"tickets": [{"id": 1}]})
+    results = [future.result() for future in futures]
+    assert len(calls) == 1
+    assert flight.requests == 1 and flight.collapsed == 2
+    assert results == [{"tickets": [{"id": 1}]}] * 3
+
+
+def test_shared_results_are_copied_per_caller():
+    flight = SingleFlight()
+    futures, _ = run_together(flight, lambda: {"tickets": [{"id": 1}]})
+    results = [future.result() for future in futures]
+    results[0]["tickets"].append({"id": 2})
+    assert results[1] == results[2] == {"tickets": [{"id": 1}]}
+    assert len({id(result) for result in results}) == 3
+
+
+def test_unshared_results_are_not_copied():
+    value = {"id": 1}
+    assert SingleFlight().do("key", lambda: value) is value
+
+
+def test_copy_can_be_turned_off():
+    flight = SingleFlight(copy=False)
+    futures, _ = run_together(flight, lambda: {"id": 1})
+    assert len({id(future.result()) for future in futures}) == 1
+
+
+def test_errors_reach_every_caller():
+    def fail():
+        raise ConnectionError("down")
+
+    flight = SingleFlight()
+    futures, calls = run_together(flight, fail)
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result()
+    assert len(calls) == 1
+
+
+def test_key_is_released_after_success_and_failure():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.in_flight == 0
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: int("x"))
+    assert flight.in_flight == 0
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.requests == 3 and flight.collapsed == 0
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_async_callers_share_one_request_and_get_copies():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"tickets": [{"id": 1}]}
+
+    async def main():
+        flight = AsyncSingleFlight()
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)))
+        assert flight.in_flight == 0
+        return flight, results
+
+    flight, results = run(main())
+    assert len(calls) == 1
+    assert flight.requests == 1 and flight.collapsed == 2
+    results[0]["tickets"].clear()
+    assert results[1] == results[2] == {"tickets": [{"id": 1}]}
+
+
+def test_async_errors_reach_every_caller_and_release_the_key():
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ConnectionError("down")
+
+    async def main():
+        flight = AsyncSingleFlight()
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert flight.in_flight == 0
+        assert await flight.do("key", lambda: asyncio.sleep(0, result="ok")) == "ok"
+        return results
+
+    results = run(main())
+    assert len(calls) == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_async_follower_takes_over_from_a_cancelled_leader():
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return {"id": 1}
+
+    async def main():
+        flight = AsyncSingleFlight()
+        leader = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        result = await follower
+        assert flight.in_flight == 0
+        return flight, result
+
+    flight, result = run(main())
+    assert result == {"id": 1}
+    assert flight.requests == 2
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from SupportBee import TicketStore
+from benchmarks.fake_server import make_ticket
+
+
+@pytest.fixture
+def store():
+    store = TicketStore()
+    tickets = [make_ticket(n) for n in range(1, 6)]
+    tickets[0]["subject"] = "Invoice-2024 from customer3@example.com"
+    tickets[1]["content"]["text"] = "I don't see the C++ help AND the docs"
+    tickets[2]["subject"] = 'The "quoted" plan'
+    store.add(tickets)
+    yield store
+    store.close()
+
+
+def ids(result):
+    return [ticket["id"] for ticket in result["tickets"]]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("customer3@example.com", [1]),
+    ("invoice-2024", [1]),
+    ("don't", [2]),
+    ("C++ help", [2]),
+    ("AND", [2]),
+    ('"quoted"', [3]),
+    ("OR NOT NEAR", []),
+    ("   ", []),
+])
+def test_search_takes_user_input_literally(store, query, expected):
+    assert ids(store.search(query)) == expected
+
+
+def test_raw_search_uses_fts_syntax(store):
+    assert sorted(ids(store.search("quoted OR docs", raw=True))) == [2, 3]
+    assert ids(store.search("subject:customer3*", raw=True)) == [1]
+
+
+def test_reads_and_writes_from_several_threads(store):
+    errors = []
+
+    def write():
+        try:
+            for n in range(100, 300):
+                store.add([make_ticket(n)])
+        except Exception as error:
+            errors.append(error)
+
+    def read():
+        try:
+            for n in range(200):
+                store.get(n % 5 + 1)
+                store.search("invoice")
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(store) == 205
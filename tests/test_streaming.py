@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from benchmarks.fake_server import FakeSupportBee, make_ticket
+from SupportBee import SupportBee
+from endpoints.streaming import ArrayItemParser
+
+CHUNK_SIZES = [1, 2, 3, 7, 64, None]  # None = the whole body at once
+
+
+def parse(body, key="tickets", chunk_size=None):
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode()
+    chunk_size = chunk_size or len(body) or 1
+    parser = ArrayItemParser(key)
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items += parser.feed(body[start:start + chunk_size])
+    return items, parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_items_and_metadata_around_the_array(chunk_size):
+    tickets = [make_ticket(n) for n in range(1, 4)]
+    items, metadata = parse({"total": 3, "total_pages": 1, "tickets": tickets, "current_page": 1},
+                            chunk_size=chunk_size)
+    assert items == tickets
+    assert metadata == {"total": 3, "total_pages": 1, "tickets": [], "current_page": 1}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_strings_with_escapes_and_json_punctuation(chunk_size):
+    tricky = 'quote " backslash \\ brackets ]}[{ comma, colon: \\"escaped\\" end\\'
+    body = {'we"ird \\ key': "before", "tickets": [{"id": 1, "subject": tricky, "k\\\"ey": ["]"]}],
+            "after": tricky}
+    items, metadata = parse(body, chunk_size=chunk_size)
+    assert items == body["tickets"]
+    assert metadata == {'we"ird \\ key': "before", "tickets": [], "after": tricky}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_only_the_top_level_key_is_streamed(chunk_size):
+    body = {"meta": {"tickets": [{"id": 99}]}, "note": "tickets",
+            "tickets": [{"id": 1, "tickets": [{"id": 2}]}]}
+    items, metadata = parse(body, chunk_size=chunk_size)
+    assert items == [{"id": 1, "tickets": [{"id": 2}]}]
+    assert metadata == {"meta": {"tickets": [{"id": 99}]}, "note": "tickets", "tickets": []}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_empty_array(chunk_size):
+    assert parse(b'{"total": 0, "tickets": [ ]}', chunk_size=chunk_size) == ([], {"total": 0, "tickets": []})
+
+
+def test_missing_key():
+    assert parse({"error": "Not found"}) == ([], {"error": "Not found"})
+    assert parse(b"") == ([], {})
+
+
+def test_scalar_items_are_dropped():
+    items, metadata = parse({"tickets": [1, "two", None, {"id": 3}, [4]]})
+    assert items == [{"id": 3}, [4]]
+    assert metadata == {"tickets": []}
+
+
+def test_stream_pages_from_the_server():
+    with FakeSupportBee(tickets=250) as fake, SupportBee("test-token", fake.url) as api:
+        ids = [ticket["id"] for ticket in api.tickets.iter_fetch(per_page=100, stream=True)]
+    assert ids == list(range(1, 251))
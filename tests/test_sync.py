@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+import pytest
+
+from SupportBee import IncrementalSync, JsonFileSyncState, SqliteSyncState, TicketStore
+
+T1, T2, T3 = "2024-02-01T10:00:00Z", "2024-02-01T11:00:00Z", "2024-02-01T12:00:00Z"
+
+
+# Tickets.iter_fetch over an editable set of tickets: newest activity first, `since` inclusive
+class FakeTickets:
+    def __init__(self, activity):
+        self.activity = dict(activity)  # id -> last_activity_at
+        self.fail_after = None          # Raise after yielding this many tickets
+
+    def iter_fetch(self, since=None, **kwargs):
+        tickets = sorted(({"id": ticket_id, "last_activity_at": activity}
+                          for ticket_id, activity in self.activity.items() if since is None or activity >= since),
+                         key=lambda ticket: (ticket["last_activity_at"], ticket["id"]), reverse=True)
+        for count, ticket in enumerate(tickets):
+            if count == self.fail_after:
+                raise ConnectionError("down")
+            yield ticket
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def make_state(request, tmp_path):
+    states = []
+
+    def make_state():
+        if request.param == "json":
+            return JsonFileSyncState(str(tmp_path / "cursor.json"))
+        state = SqliteSyncState(str(tmp_path / "cursor.db"))
+        states.append(state)
+        return state
+
+    yield make_state
+    for state in states:
+        state.close()
+
+
+def sync(tickets, state, **kwargs):
+    return IncrementalSync(SimpleNamespace(tickets=tickets), state, **kwargs)
+
+
+def synced_ids(tickets, state, **kwargs):
+    return sorted(synced.ticket["id"] for synced in sync(tickets, state, **kwargs).run())
+
+
+def test_tickets_sharing_the_boundary_timestamp(make_state):
+    tickets = FakeTickets({1: T2, 2: T2, 3: T2, 4: T1})
+    state = make_state()
+    assert synced_ids(tickets, state) == [1, 2, 3, 4]
+    cursor = state.load()
+    assert (cursor.since, cursor.boundary_ids) == (T2, {1, 2, 3})
+
+    assert synced_ids(tickets, state) == []  # The boundary tickets are not synced again
+
+    tickets.activity[5] = T2  # New activity at the boundary timestamp
+    assert synced_ids(tickets, state) == [5]
+    assert state.load().boundary_ids == {1, 2, 3, 5}
+
+
+def test_ticket_updated_between_runs(make_state):
+    tickets = FakeTickets({1: T1, 2: T2, 3: T2})
+    state = make_state()
+    synced_ids(tickets, state)
+
+    tickets.activity[3] = T3
+    assert synced_ids(tickets, state) == [3]
+    cursor = state.load()
+    assert (cursor.since, cursor.boundary_ids) == (T3, {3})
+    assert synced_ids(tickets, state) == []
+
+
+def test_cursor_is_reloaded_by_a_new_state(make_state):
+    tickets = FakeTickets({1: T1, 2: T2})
+    synced_ids(tickets, make_state())
+
+    cursor = make_state().load()
+    assert (cursor.since, cursor.boundary_ids) == (T2, {2})
+    assert synced_ids(tickets, make_state()) == []
+
+
+def test_new_state_starts_from_scratch(make_state):
+    cursor = make_state().load()
+    assert (cursor.since, cursor.boundary_ids) == (None, set())
+
+
+def test_abandoned_run_keeps_the_cursor(make_state):
+    tickets = FakeTickets({1: T1, 2: T2, 3: T3})
+    state = make_state()
+    run = sync(tickets, state).run()
+    assert next(run).ticket["id"] == 3
+    run.close()
+    assert state.load().since is None
+    assert synced_ids(tickets, state) == [1, 2, 3]
+
+
+def test_failed_run_keeps_the_cursor(make_state):
+    tickets = FakeTickets({1: T1, 2: T2})
+    state = make_state()
+    synced_ids(tickets, state)
+
+    tickets.activity.update({3: T3, 4: T3})
+    tickets.fail_after = 1
+    with pytest.raises(ConnectionError):
+        synced_ids(tickets, state)
+    assert state.load().since == T2
+
+    tickets.fail_after = None
+    assert synced_ids(tickets, state) == [3, 4]
+
+
+def test_synced_tickets_are_stored(make_state):
+    store = TicketStore()
+    tickets = FakeTickets({1: T1, 2: T2})
+    synced_ids(tickets, make_state(), store=store)
+    assert len(store) == 2
+    store.close()
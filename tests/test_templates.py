@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import pytest
+
+from SupportBee import AsyncSupportBee, Template
+from endpoints.models import Ticket
+from endpoints.templates import AsyncSnippetRenderer, text_to_html
+
+
+class Snippets:
+    def __init__(self):
+        self.text = "Hello {{ requester.name }}"
+        self.fetches = 0
+
+    async def fetch(self):
+        self.fetches += 1
+        return {"snippets": [{"id": 1, "name": "hello", "content": {"text": self.text}}]}
+
+
+TICKET = {"id": 1, "requester": {"name": "Ada"}}
+
+
+def test_text_output_is_not_escaped():
+    template = Template("Re: {{ ticket.subject }}")
+    assert template.render(ticket={"subject": "<b>Fish & \"Chips\"</b>"}) == 'Re: <b>Fish & "Chips"</b>'
+
+
+def test_html_output_escapes_values_not_the_template():
+    template = Template("<p>Re: <b>{{ ticket.subject }}</b></p>", html=True)
+    assert template.render(ticket={"subject": "<script>x</script> & 'y'"}) == \
+        "<p>Re: <b>&lt;script&gt;x&lt;/script&gt; &amp; &#x27;y&#x27;</b></p>"
+
+
+def test_text_snippet_shown_as_html():
+    assert text_to_html("a < b\r\nc & d\n") == "a &lt; b<br>c &amp; d<br>"
+
+
+@pytest.mark.parametrize("context, expected", [
+    ({"requester": {"first_name": "Ada"}}, "Hi Ada!"),
+    ({"requester": {"first_name": ""}}, "Hi there!"),
+    ({"requester": {"first_name": None}}, "Hi there!"),
+    ({"requester": {}}, "Hi there!"),
+    ({"requester": None}, "Hi there!"),
+    ({}, "Hi there!"),
+])
+def test_defaults_fill_missing_values(context, expected):
+    assert Template("Hi {{ requester.first_name | there }}!").render(context) == expected
+
+
+def test_missing_values_without_default_render_empty():
+    assert Template("[{{ agent.name }}] {{ nothing }}").render({}) == "[] "
+
+
+def test_braces_and_spacing():
+    template = Template("{json} {{ticket.id}} {{  ticket.id  |  0  }} }")
+    assert template.fields == ("ticket.id", "ticket.id")
+    assert template.render(ticket={"id": 7}) == "{json} 7 7 }"
+
+
+def test_models_are_looked_up_like_dicts():
+    ticket = Ticket({"id": 3, "subject": "Refund", "requester": {"name": "Ada"}})
+    assert Template("{{ ticket.subject }} for {{ ticket.requester.name }}").render(ticket=ticket) == "Refund for Ada"
+
+
+def test_sync_renderer(api, fake):
+    renderer = api.snippets.renderer(agent={"name": "Sam"})
+    ticket = {"id": 4, "subject": "Invoice <2>", "requester": {"first_name": "Ada"}}
+    assert renderer.render("greeting", ticket) == 'Hi Ada,\n\nabout "Invoice <2>": Sam will follow up.'
+    assert renderer.render(50, ticket, html=True) == \
+        "<p>Hi Ada,</p><p>about <b>Invoice &lt;2&gt;</b>: Sam will follow up.</p>"
+    assert renderer.render("snippet 1", ticket, html=True) == "Thanks for reaching out"
+    assert renderer.replies("greeting", [ticket, {"id": 5, "subject": "Other"}]) == [
+        (4, {"content": "<p>Hi Ada,</p><p>about <b>Invoice &lt;2&gt;</b>: Sam will follow up.</p>",
+             "content_as_html": True}),
+        (5, {"content": "<p>Hi there,</p><p>about <b>Other</b>: Sam will follow up.</p>", "content_as_html": True}),
+    ]
+    with pytest.raises(KeyError):
+        renderer.render("no such snippet", ticket)
+    assert fake.requests == 1  # The snippet list is fetched once
+
+
+def test_sync_renderer_max_age(api, fake):
+    renderer = api.snippets.renderer(max_age=0)
+    renderer.render("greeting", {})
+    time.sleep(0.01)
+    renderer.render("greeting", {})
+    assert fake.requests == 2
+
+
+def test_async_client_renderer_fills_snippets(fake):
+    async def main():
+        async with AsyncSupportBee("test-token", fake.url) as api:
+            renderer = await api.snippets.renderer(agent={"name": "Sam"}, max_age=60).load()
+            assert renderer.max_age == 60
+            return renderer.render("greeting", {"subject": "Invoice", "requester": {}})
+
+    assert asyncio.run(main()) == 'Hi there,\n\nabout "Invoice": Sam will follow up.'
+
+
+def test_stale_snippets_refresh_in_background():
+    snippets = Snippets()
+
+    async def main():
+        renderer = await AsyncSnippetRenderer(snippets, max_age=0.05).load()
+        assert renderer.render("hello", TICKET) == "Hello Ada"
+
+        snippets.text = "Hi {{ requester.name }}"
+        assert renderer.render("hello", TICKET) == "Hello Ada"  # Still fresh
+        renderer._loaded_at = time.monotonic() - 1
+        assert renderer.render("hello", TICKET) == "Hello Ada"  # Stale: served while the refresh runs
+        renderer.render("hello", TICKET)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return renderer.render("hello", TICKET)
+
+    assert asyncio.run(main()) == "Hi Ada"
+    assert snippets.fetches == 2  # One refresh for the renders made while it ran
+
+
+def test_without_max_age_snippets_are_kept():
+    snippets = Snippets()
+
+    async def main():
+        renderer = await AsyncSnippetRenderer(snippets).load()
+        renderer._loaded_at = time.monotonic() - 3600
+        snippets.text = "Hi {{ requester.name }}"
+        renderer.render("hello", TICKET)
+        await asyncio.sleep(0)
+        return renderer.render("hello", TICKET)
+
+    assert asyncio.run(main()) == "Hello Ada"
+    assert snippets.fetches == 1
+
+
+def test_render_before_load():
+    with pytest.raises(RuntimeError):
+        AsyncSnippetRenderer(Snippets()).render("hello", TICKET)
@@ -0,0 +1,51 @@
+from SupportBee import SupportBee, Transport
+
+
+def test_requests_reuse_one_pooled_connection(fake, api):
+    for ticket_id in range(1, 21):
+        assert api.tickets.get(ticket_id)["ticket"]["id"] == ticket_id
+    assert fake.requests == 20
+    assert fake.connections == 1
+
+
+def test_keep_alive_off_opens_a_connection_per_request(fake):
+    with SupportBee("test-token", fake.url, keep_alive=False) as api:
+        for ticket_id in range(1, 6):
+            api.tickets.get(ticket_id)
+    assert fake.connections == 5
+
+
+def test_resources_share_the_client_transport(fake, api):
+    api.tickets.get(1)
+    api.labels.fetch()
+    api.replies.fetch(1)
+    assert fake.connections == 1
+    assert api.tickets.api.transport is api.labels.api.transport
+
+
+class RecordingTransport(Transport):
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def send(self, method, url, headers=None, json=None, files=None, body=None, stream=False, timeout=None):
+        self.sent.append((method, url))
+        return FakeResponse()
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+    content = b'{"ticket": {"id": 3}}'
+    text = content.decode()
+
+    def close(self):
+        pass
+
+
+def test_custom_transport_is_used(fake):
+    transport = RecordingTransport()
+    api = SupportBee("test-token", "https://example.supportbee.com", transport=transport)
+    assert api.tickets.get(3) == {"ticket": {"id": 3}}
+    assert transport.sent == [("GET", "https://example.supportbee.com/tickets/3?auth_token=test-token")]
+    assert fake.requests == 0
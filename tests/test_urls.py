@@ -0,0 +1,60 @@
+import datetime
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+from SupportBee import BasicOptions, SortByOptions, UserRoles
+from endpoints.urls import encode_value, encode_query, template_of, Endpoint, UrlBuilder
+
+
+@pytest.mark.parametrize("value, expected", [
+    (12, "12"),
+    (True, "true"),
+    (False, "false"),
+    ("a+b@example.com", "a%2Bb%40example.com"),
+    ("to do", "to%20do"),
+    ("a/b?c&d=e#f", "a%2Fb%3Fc%26d%3De%23f"),
+    ("café", "caf%C3%A9"),
+    (BasicOptions.ANY, "any"),
+    (SortByOptions.CREATION_TIME, "creation_time"),
+    (UserRoles.ADMIN, "admin"),
+    (datetime.date(2024, 2, 1), "2024-02-01"),
+    (datetime.datetime(2024, 2, 1, 10, 30, tzinfo=datetime.timezone.utc), "2024-02-01T10%3A30%3A00%2B00%3A00"),
+    (["a+b@example.com", "c d"], "a%2Bb%40example.com,c%20d"),
+    (2.5, "2.5"),
+])
+def test_encode_value(value, expected):
+    assert encode_value(value) == expected
+
+
+def test_encode_query_skips_none_and_keeps_order():
+    assert encode_query([("page", 2), ("label", None), ("spam", False)]) == "&page=2&spam=false"
+
+
+def test_requester_emails_survive_a_round_trip():
+    url = UrlBuilder("https://acme.supportbee.com", "t+k/n").build("/tickets", {
+        "requester_emails": "a+b@example.com,c@example.com", "archived": BasicOptions.ANY, "label": "to do"})
+    query = parse_qs(urlsplit(url).query)
+    assert query == {"auth_token": ["t+k/n"], "requester_emails": ["a+b@example.com,c@example.com"],
+                     "archived": ["any"], "label": ["to do"]}
+    assert url.startswith("https://acme.supportbee.com/tickets?auth_token=t%2Bk%2Fn&")
+
+
+def test_endpoint_encodes_path_segments():
+    endpoint = Endpoint("/tickets/{ticket_id}/labels/{label_name}")
+    assert endpoint.fields == ("ticket_id", "label_name")
+    assert endpoint.format(ticket_id=12, label_name="to do/later") == "/tickets/12/labels/to%20do%2Flater"
+
+
+def test_endpoint_keeps_literal_braces():
+    assert Endpoint("/{{x}}/{id}").format(id=1) == "/{x}/1"
+
+
+def test_formatted_endpoint_remembers_its_template():
+    endpoint = Endpoint("/tickets/{ticket_id}")
+    path = endpoint.format(ticket_id=12)
+    assert isinstance(path, str) and path == "/tickets/12"
+    assert path.template == "/tickets/{ticket_id}"
+    assert template_of(path) == "/tickets/{ticket_id}"
+    assert template_of("/tickets") == "/tickets"
+    assert Endpoint("/users/{id}").format(id=1).template == "/users/{id}"  # One path type per endpoint
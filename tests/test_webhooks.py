@@ -0,0 +1,99 @@
+import pytest
+
+from SupportBee import TicketStore, WebhookDispatcher, WebhookReceiver, StoreUpdater
+from benchmarks.fake_server import make_ticket
+
+
+# Deliveries as SupportBee posts them: the event name in "action", the objects under "payload"
+def delivery(action, **objects):
+    return {"action": action, "payload": objects}
+
+
+def message(text, agent=False, created_at="2024-03-01T09:00:00Z"):
+    return {"id": 900, "created_at": created_at, "content": {"text": text, "html": "<p>" + text + "</p>"},
+            "replier": {"id": 3, "name": "Someone", "agent": agent}}
+
+
+@pytest.fixture
+def store():
+    store = TicketStore()
+    store.add([make_ticket(1), make_ticket(2)])
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def replay(store):
+    dispatcher = WebhookDispatcher(max_workers=2)
+    dispatcher.on("*", StoreUpdater(store))
+    receiver = WebhookReceiver(dispatcher)
+
+    def replay(*deliveries):
+        statuses = receiver.replay(deliveries)
+        dispatcher.join()
+        assert not dispatcher.errors
+        return statuses
+
+    with dispatcher:
+        yield replay
+
+
+def ids(result):
+    return sorted(ticket["id"] for ticket in result["tickets"])
+
+
+def test_reply_with_its_ticket_is_indexed(store, replay):
+    ticket = dict(make_ticket(1), replies_count=7, unanswered=False)
+    assert replay(delivery("agent_reply.created", ticket=ticket, reply=message("Refund approved", agent=True))) \
+        == [202]
+
+    assert ids(store.search("refund approved")) == [1]
+    stored = store.get(1)["ticket"]
+    assert stored["replies_count"] == 7  # The delivered ticket already counts the reply
+    assert stored["unanswered"] is False
+
+
+def test_comment_with_its_ticket_is_indexed(store, replay):
+    ticket = dict(make_ticket(2), comments_count=4)
+    replay(delivery("comment.created", ticket=ticket, comment=message("Escalated to finance")))
+
+    assert ids(store.search("finance")) == [2]
+    assert store.get(2)["ticket"]["comments_count"] == 4
+
+
+def test_reply_without_ticket_bumps_counters(store, replay):
+    before = store.get(1)["ticket"]["replies_count"]
+    replay(delivery("customer_reply.created", reply=dict(message("Still broken"), ticket_id=1)))
+
+    stored = store.get(1)["ticket"]
+    assert stored["replies_count"] == before + 1
+    assert stored["last_activity_at"] == "2024-03-01T09:00:00Z"
+    assert stored["unanswered"] is True
+    assert ids(store.search("still broken")) == [1]
+
+
+def test_indexed_text_accumulates(store, replay):
+    replay(delivery("agent_reply.created", ticket=make_ticket(1), reply=message("first answer")),
+           delivery("customer_reply.created", ticket=make_ticket(1), reply=message("second question")),
+           delivery("ticket.updated", ticket=dict(make_ticket(1), subject="Renamed")))
+
+    assert ids(store.search("first answer")) == [1]
+    assert ids(store.search("second question")) == [1]
+    assert store.get(1)["ticket"]["subject"] == "Renamed"
+
+
+def test_new_ticket_with_reply(store, replay):
+    replay(delivery("agent_reply.created", ticket=make_ticket(3), reply=message("Welcome aboard")))
+
+    assert store.get(3)["ticket"]["id"] == 3
+    assert ids(store.search("welcome aboard")) == [3]
+
+
+def test_label_without_ticket(store, replay):
+    replay(delivery("ticket.labeled", ticket_id=2, label={"id": 5, "name": "urgent"}))
+
+    assert ids(store.fetch(label="urgent")) == [2]
+
+
+def test_rejected_deliveries(replay):
+    assert replay(b"not json", {"action": "ticket.created", "payload": {}}) == [400, 400]